@@ -1,4 +1,17 @@
+from .cache import CacheBackend, LRUCache
 from .engine import AlchemyQLSync, AlchemyQLAsync
 from .models import Order
+from .routing import LeastOutstanding, RoundRobin, RoutingPolicy
+from .views import MaterializedView
 
-__all__ = ["AlchemyQLSync", "AlchemyQLAsync", "Order"]
+__all__ = [
+    "AlchemyQLSync",
+    "AlchemyQLAsync",
+    "Order",
+    "CacheBackend",
+    "LRUCache",
+    "RoutingPolicy",
+    "RoundRobin",
+    "LeastOutstanding",
+    "MaterializedView",
+]
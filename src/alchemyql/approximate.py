@@ -0,0 +1,232 @@
+import json
+import threading
+import weakref
+from itertools import chain
+
+from graphql import GraphQLResolveInfo
+from sqlalchemy import Select, event, func, inspect, literal_column, select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from .filters import build_filter_conditions
+from .models import Table
+from .resolver import shared_async_resolver, shared_sync_resolver
+from .timeout import async_deadline_scope, deadline_scope
+
+
+class RowCountCache:
+    """
+    Number of rows of a table per database (engine), counted once then kept up to date by the
+    session events below: rows added & deleted through a SQLAlchemy session are counted when the
+    session commits, bulk INSERT / UPDATE / DELETE statements discard the count.
+
+    NOTE: Changes made outside of SQLAlchemy sessions are not counted.
+    """
+
+    def __init__(self, sqlalchemy_cls):
+        self.sqlalchemy_cls = sqlalchemy_cls
+        self.tables = set(inspect(sqlalchemy_cls).tables)
+        self.counts: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+        _row_counts.add(self)
+
+    def get(self, bind) -> int | None:
+        return self.counts.get(bind)
+
+    def set(self, bind, count: int):
+        with self.lock:
+            self.counts[bind] = count
+
+    def adjust(self, bind, delta: int | None):
+        """
+        Apply committed changes to the count of a database (None discards the count).
+        """
+        with self.lock:
+            if delta is None:
+                self.counts.pop(bind, None)
+            elif bind in self.counts:
+                self.counts[bind] = max(self.counts[bind] + delta, 0)
+
+
+# All row count caches (maintained by the session events below)
+_row_counts: "weakref.WeakSet[RowCountCache]" = weakref.WeakSet()
+
+_COUNTED = "alchemyql_counted"
+
+
+@event.listens_for(Session, "after_flush")
+def _count_flushed(session, flush_context):
+    counted = session.info.setdefault(_COUNTED, [])
+
+    for obj, delta in chain(
+        ((obj, 1) for obj in session.new), ((obj, -1) for obj in session.deleted)
+    ):
+        for cache in list(_row_counts):
+            if isinstance(obj, cache.sqlalchemy_cls):
+                counted.append((cache, session.get_bind(cache.sqlalchemy_cls), delta))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _count_executed(orm_execute_state):
+    # Bulk INSERT / UPDATE / DELETE statements (their number of rows is unknown)
+    if orm_execute_state.is_select:
+        return
+
+    table = getattr(orm_execute_state.statement, "table", None)
+    session = orm_execute_state.session
+    for cache in list(_row_counts):
+        if table in cache.tables:
+            session.info.setdefault(_COUNTED, []).append(
+                (cache, session.get_bind(cache.sqlalchemy_cls), None)
+            )
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_counted(session):
+    for cache, bind, delta in session.info.pop(_COUNTED, []):
+        cache.adjust(bind, delta)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_counted(session):
+    session.info.pop(_COUNTED, None)
+
+
+class Explain(Executable, ClauseElement):
+    """
+    PostgreSQL "EXPLAIN (FORMAT JSON)" of a statement (its plan, with the planner's row estimates).
+    """
+
+    inherit_cache = False
+
+    def __init__(self, stmt: Select):
+        self.stmt = stmt
+
+
+@compiles(Explain, "postgresql")
+def compile_explain(element: Explain, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+
+def build_count_stmt(
+    table: Table,
+    filters: dict | None,
+    in_list: tuple[int | None, int] = (None, 1000),
+) -> Select:
+    """
+    Build a SQL Alchemy Select statement counting the (filtered) rows of a table.
+    """
+    stmt = select(func.count()).select_from(table.sqlalchemy_cls)
+    if filters:
+        stmt = stmt.where(
+            *build_filter_conditions(table.sqlalchemy_cls, filters, in_list)
+        )
+    return stmt
+
+
+def planner_estimate(
+    session, table: Table, filters: dict | None, in_list: tuple[int | None, int]
+) -> int | None:
+    """
+    Number of (filtered) rows of a table estimated by the PostgreSQL planner, given a sync
+    session: the table's "reltuples" statistic, or the row estimate of the plan of a filtered
+    query (None if the table has not been analyzed).
+    """
+    if not filters:
+        preparer = session.get_bind(table.sqlalchemy_cls).dialect.identifier_preparer
+        name = preparer.format_table(table.inspected.local_table)
+        estimate = session.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = CAST(:name AS regclass)"),
+            {"name": name},
+        ).scalar()
+        return None if estimate is None or estimate < 0 else int(estimate)
+
+    stmt = select(literal_column("1")).select_from(table.sqlalchemy_cls)
+    stmt = stmt.where(*build_filter_conditions(table.sqlalchemy_cls, filters, in_list))
+    plan = session.execute(Explain(stmt)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def has_uncommitted_changes(session) -> bool:
+    """
+    Whether a (sync) session has changes which are not committed yet: rows it counts are not
+    committed rows (& the changes are counted again by the row count caches on commit).
+    """
+    return bool(session.info.get(_COUNTED) or session.new or session.deleted)
+
+
+def count_rows(
+    session,
+    table: Table,
+    filters: dict | None,
+    approximate: bool,
+    in_list: tuple[int | None, int] = (None, 1000),
+) -> int:
+    """
+    Count the (filtered) rows of a table, given a sync session.
+
+    Approximate counts use the planner's estimates on PostgreSQL, and the table's row count
+    cache (for unfiltered counts) on other databases. Otherwise the rows are counted exactly.
+    Counts of sessions with uncommitted changes are not cached.
+    """
+    stmt = build_count_stmt(table, filters, in_list)
+    if not approximate:
+        return session.execute(stmt).scalar_one()
+
+    bind = session.get_bind(table.sqlalchemy_cls)
+    if bind.dialect.name == "postgresql":
+        estimate = planner_estimate(session, table, filters, in_list)
+        if estimate is not None:
+            return estimate
+    elif not filters and table.row_count is not None:
+        count = table.row_count.get(bind)
+        if count is None:
+            count = session.execute(stmt).scalar_one()
+            if not has_uncommitted_changes(session):
+                table.row_count.set(bind, count)
+        return count
+
+    return session.execute(stmt).scalar_one()
+
+
+def build_async_count_resolver(table: Table):
+    """
+    Resolver function for Async row count queries.
+    Returns a function that can be called at query execution to resolve query.
+    """
+
+    async def execute(info: GraphQLResolveInfo, **kwargs):
+        async with async_deadline_scope(
+            info.context["deadline"], cancel=info.context["partial_results"]
+        ):
+            return await info.context["session"].run_sync(
+                count_rows,
+                table,
+                kwargs.get("filter"),
+                kwargs.get("approximate", False),
+                info.context["in_list"],
+            )
+
+    return shared_async_resolver(execute)
+
+
+def build_sync_count_resolver(table: Table):
+    """
+    Resolver function for Sync row count queries.
+    Returns a function that can be called at query execution to resolve query.
+    """
+
+    def execute(info: GraphQLResolveInfo, **kwargs):
+        with deadline_scope(info.context["deadline"]):
+            return count_rows(
+                info.context["session"],
+                table,
+                kwargs.get("filter"),
+                kwargs.get("approximate", False),
+                info.context["in_list"],
+            )
+
+    return shared_sync_resolver(execute)
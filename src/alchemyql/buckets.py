@@ -0,0 +1,199 @@
+from datetime import date
+
+from graphql import GraphQLResolveInfo
+from sqlalchemy import Date, Select, cast, func, literal_column, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import ColumnElement
+
+from .errors import QueryExecutionError
+from .filters import build_filter_conditions
+from .models import Table
+from .resolver import (
+    build_limit,
+    extract_root_selected_fields,
+    shared_async_resolver,
+    shared_sync_resolver,
+    validations,
+)
+from .scalars import Interval
+from .timeout import async_deadline_scope, deadline_scope
+
+# Aggregates of the aggregate fields (selected as "<field>_<aggregate>")
+AGGREGATES = {"sum": func.sum, "avg": func.avg, "min": func.min, "max": func.max}
+
+
+# Intervals shorter than a day (which date columns cannot be bucketed by)
+TIME_INTERVALS = {Interval.MINUTE, Interval.HOUR}
+
+# strftime formats of the start of a bucket (SQLite), weeks are computed separately
+STRFTIME_FORMATS = {
+    Interval.MINUTE: "%Y-%m-%d %H:%M:00",
+    Interval.HOUR: "%Y-%m-%d %H:00:00",
+    Interval.DAY: "%Y-%m-%d",
+    Interval.MONTH: "%Y-%m-01",
+    Interval.YEAR: "%Y-01-01",
+}
+
+
+class TimeBucket(ColumnElement):
+    """
+    Start of the time bucket (of an interval) of a date / datetime column, compiled for the database:
+     - PostgreSQL (& other databases) - "date_trunc(interval, column)" (cast back to a date for
+       date columns)
+     - SQLite - "strftime(format, column)" (weeks start on monday, as "date_trunc")
+
+    The bucket has the type of the column, so it is loaded as a date / datetime.
+    """
+
+    inherit_cache = False
+
+    def __init__(self, attribute, interval: Interval):
+        self.column = attribute.expression
+        self.type = self.column.type
+        self.interval = interval
+
+        is_date = self.type.python_type is date
+        if is_date and interval in TIME_INTERVALS:
+            raise QueryExecutionError(
+                f"Date fields cannot be bucketed by {interval.name} (field={attribute.key})"
+            )
+        self.is_date = is_date
+
+    @property
+    def _from_objects(self) -> list:
+        # Selected from the table of the column
+        return self.column._from_objects
+
+
+@compiles(TimeBucket)
+def compile_date_trunc(element: TimeBucket, compiler, **kw):
+    # The interval is inlined, so the bucket is the same expression in SELECT & GROUP BY
+    interval = literal_column(f"'{element.interval.name.lower()}'")
+    bucket = func.date_trunc(interval, element.column)
+    if element.is_date:
+        bucket = cast(bucket, Date)
+    return compiler.process(bucket, **kw)
+
+
+@compiles(TimeBucket, "sqlite")
+def compile_strftime(element: TimeBucket, compiler, **kw):
+    if element.interval is Interval.WEEK:
+        # Monday of the week (the next sunday, or the day itself, minus 6 days)
+        day = func.date(
+            element.column,
+            literal_column("'weekday 0'"),
+            literal_column("'-6 days'"),
+        )
+        if element.is_date:
+            return compiler.process(day, **kw)
+        return compiler.process(func.datetime(day), **kw)
+
+    bucket_format = STRFTIME_FORMATS[element.interval]
+    if not element.is_date and element.interval not in TIME_INTERVALS:
+        # Datetime buckets start at midnight
+        bucket_format += " 00:00:00"
+    return compiler.process(
+        func.strftime(literal_column(f"'{bucket_format}'"), element.column), **kw
+    )
+
+
+def build_bucket_stmt(
+    table: Table,
+    fields: dict,
+    by: str,
+    interval: Interval,
+    filters: dict | None = None,
+    offset: int | None = None,
+    limit: int | None = None,
+    in_list: tuple[int | None, int] = (None, 1000),
+) -> Select:
+    """
+    Build a SQL Alchemy Select statement grouping the (filtered) rows of a table into the time
+    buckets of a bucket field, ordered by bucket. Only the selected aggregates are computed.
+    """
+    cls = table.sqlalchemy_cls
+    bucket = TimeBucket(getattr(cls, by), interval)
+
+    columns = [bucket.label("bucket"), func.count().label("count")]
+    for field in table.aggregate_fields:
+        attribute = getattr(cls, field)
+        for name, aggregate in AGGREGATES.items():
+            if f"{field}_{name}" in fields:
+                columns.append(aggregate(attribute).label(f"{field}_{name}"))
+
+    stmt = select(*columns).group_by(bucket).order_by(bucket)
+    if filters:
+        stmt = stmt.where(*build_filter_conditions(cls, filters, in_list))
+    if offset:
+        stmt = stmt.offset(offset)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def build_bucket_query(table: Table, info: GraphQLResolveInfo, **kwargs) -> Select:
+    """
+    Build the SQL query of a time bucket query field.
+    """
+    validations(table, **kwargs)
+
+    max_query_depth = info.context["max_query_depth"]
+    fields = extract_root_selected_fields(info, max_query_depth, **kwargs)
+
+    return build_bucket_stmt(
+        table=table,
+        fields=fields,
+        by=kwargs["by"],
+        interval=Interval[kwargs["interval"]],
+        filters=kwargs.get("filter", {}),
+        offset=kwargs.get("offset", 0),
+        limit=build_limit(table, info, **kwargs),
+        in_list=info.context["in_list"],
+    )
+
+
+def consume_buckets(info: GraphQLResolveInfo, res) -> list[dict]:
+    """
+    Rows of a time bucket query (counted towards the request's budget).
+    """
+    data = [dict(row) for row in res.mappings()]
+    info.context["budget"].consume_rows(len(data))
+    info.context["budget"].consume_size(data)
+    return data
+
+
+def build_async_bucket_resolver(table: Table):
+    """
+    Resolver function for Async time bucket queries.
+    Returns a function that can be called at query execution to resolve query.
+    """
+
+    async def execute(info, **kwargs):
+        with info.context["stats"].measure_blocking():
+            query = build_bucket_query(table, info, **kwargs)
+
+        async with async_deadline_scope(
+            info.context["deadline"], cancel=info.context["partial_results"]
+        ):
+            res = await info.context["session"].execute(query)
+
+        return consume_buckets(info, res)
+
+    return shared_async_resolver(execute)
+
+
+def build_sync_bucket_resolver(table: Table):
+    """
+    Resolver function for Sync time bucket queries.
+    Returns a function that can be called at query execution to resolve query.
+    """
+
+    def execute(info, **kwargs):
+        query = build_bucket_query(table, info, **kwargs)
+
+        with deadline_scope(info.context["deadline"]):
+            res = info.context["session"].execute(query)
+
+        return consume_buckets(info, res)
+
+    return shared_sync_resolver(execute)
@@ -0,0 +1,67 @@
+import json
+import threading
+
+from .errors import QueryExecutionError
+
+
+def _encode_default(val):
+    # Values yet to be loaded are counted when they are loaded
+    return None if hasattr(val, "resolve") else str(val)
+
+
+class Budget:
+    """
+    Request wide budget of rows & response size across the whole query tree.
+    """
+
+    def __init__(self, max_rows: int | None, max_size: int | None):
+        self.max_rows = max_rows
+        self.max_size = max_size
+        self.rows = 0
+        self.size = 0
+        # Rows may be counted from a worker thread (see "serialize_async")
+        self.lock = threading.Lock()
+
+    def cap_limit(self, limit: int | None) -> int | None:
+        """
+        Cap a SQL limit so that no more than 1 row over the remaining row budget is loaded.
+        """
+        if self.max_rows is None:
+            return limit
+
+        self.check_rows()
+        cap = self.max_rows - self.rows + 1
+        return cap if limit is None else min(limit, cap)
+
+    def check_rows(self):
+        if self.max_rows is not None and self.rows > self.max_rows:
+            raise QueryExecutionError(
+                f"Query exceeded the maximum number of rows (max_rows={self.max_rows})"
+            )
+
+    def consume_rows(self, count: int):
+        """
+        Count rows materialized by the request (raises once the budget is exceeded).
+        """
+        if self.max_rows is None:
+            return
+
+        with self.lock:
+            self.rows += count
+        self.check_rows()
+
+    def consume_size(self, data):
+        """
+        Count the (JSON encoded) size of serialized data (raises once the budget is exceeded).
+        """
+        if self.max_size is None:
+            return
+
+        size = len(json.dumps(data, default=_encode_default))
+        with self.lock:
+            self.size += size
+
+        if self.size > self.max_size:
+            raise QueryExecutionError(
+                f"Query exceeded the maximum response size (max_response_size={self.max_size})"
+            )
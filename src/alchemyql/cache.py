@@ -0,0 +1,196 @@
+import json
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from enum import Enum
+from itertools import chain
+from typing import Any
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+
+class CacheBackend(ABC):
+    """
+    Storage of an entity cache (e.g. in memory, redis ...).
+
+    Keys are strings & values are dictionaries of column values.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None:
+        """
+        Get a value (None if missing or expired).
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float | None):
+        """
+        Set a value, expiring after "ttl" seconds (if provided).
+        """
+
+    @abstractmethod
+    def delete(self, key: str):
+        """
+        Delete a value (if present).
+        """
+
+
+class LRUCache(CacheBackend):
+    """
+    Bounded in memory cache evicting the least recently used values.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.values: OrderedDict[str, tuple[Any, float | None]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self.lock:
+            if key not in self.values:
+                return None
+
+            value, expires = self.values[key]
+            if expires is not None and expires <= time.monotonic():
+                del self.values[key]
+                return None
+
+            self.values.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float | None):
+        expires = None if ttl is None else time.monotonic() + ttl
+
+        with self.lock:
+            self.values[key] = (value, expires)
+            self.values.move_to_end(key)
+
+            while len(self.values) > self.max_size:
+                self.values.popitem(last=False)
+
+    def delete(self, key: str):
+        with self.lock:
+            self.values.pop(key, None)
+
+
+class EntityCache:
+    """
+    Second level cache of the (serialized) column values of a table's rows, keyed by primary key.
+
+    Rows are invalidated when they are updated or deleted through a SQLAlchemy session (on flush
+    and again on commit / rollback), the TTL covers any other changes to the database.
+    Bulk UPDATE / DELETE statements (whose rows are unknown) invalidate all rows of the table, by
+    moving the cache to a new generation of keys.
+
+    NOTE: Generations are kept in memory, so bulk statements executed by other processes sharing
+    the backend are only covered by the TTL.
+    """
+
+    def __init__(
+        self,
+        sqlalchemy_cls,
+        fields: list[str],
+        backend: CacheBackend,
+        ttl: float | None,
+    ):
+        self.sqlalchemy_cls = sqlalchemy_cls
+        self.fields = fields
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = inspect(sqlalchemy_cls).persist_selectable.name
+        self.tables = set(inspect(sqlalchemy_cls).tables)
+        self.generation = 0
+
+        _caches.add(self)
+
+    def key(self, identity: tuple) -> str:
+        return f"{self.prefix}:{self.generation}:{json.dumps(identity, default=str)}"
+
+    def cacheable(self, fields: dict) -> bool:
+        """
+        Whether the selected fields can be served from the cache (i.e. cached columns only).
+        """
+        return all(v is True and k in self.fields for k, v in fields.items())
+
+    def get(self, identity: tuple, fields: dict) -> dict | None:
+        """
+        Get the cached column values of a row (None unless all selected fields are cached).
+        """
+        values = self.backend.get(self.key(identity))
+        if values is None or any(field not in values for field in fields):
+            return None
+        return values
+
+    def set(self, identity: tuple, obj):
+        values = {}
+        for field in self.fields:
+            val = getattr(obj, field)
+            values[field] = val.name if isinstance(val, Enum) else val
+
+        self.backend.set(self.key(identity), values, self.ttl)
+
+    def invalidate(self, identity: tuple | None):
+        """
+        Invalidate a row (all rows if None).
+        """
+        if identity is None:
+            # Values of the previous generation are left to expire / be evicted
+            self.generation += 1
+        else:
+            self.backend.delete(self.key(identity))
+
+
+# All entity caches (invalidated by the session events below)
+_caches: "weakref.WeakSet[EntityCache]" = weakref.WeakSet()
+
+_INVALIDATED = "alchemyql_invalidated"
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed(session, flush_context):
+    invalidated = session.info.setdefault(_INVALIDATED, [])
+
+    for obj in chain(session.dirty, session.deleted):
+        for cache in list(_caches):
+            if isinstance(obj, cache.sqlalchemy_cls):
+                identity = inspect(obj).identity
+                cache.invalidate(identity)
+                invalidated.append((cache, identity))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_executed(orm_execute_state):
+    # Bulk INSERT / UPDATE / DELETE statements (their rows are unknown)
+    if orm_execute_state.is_select:
+        return
+
+    invalidated = orm_execute_state.session.info.setdefault(_INVALIDATED, [])
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+
+    table = getattr(orm_execute_state.statement, "table", None)
+    for cache in list(_caches):
+        if table in cache.tables:
+            cache.invalidate(None)
+            invalidated.append((cache, None))
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_transaction(session):
+    # Rows may have been cached from this transaction's uncommitted data after the flush
+    for cache, identity in session.info.pop(_INVALIDATED, []):
+        cache.invalidate(identity)
+
+
+def has_uncommitted_changes(session) -> bool:
+    """
+    Whether a session has changes which are not committed yet (pending, or flushed / executed in
+    its transaction): rows it loads may not be committed rows, so they are not cached.
+    """
+    return bool(
+        _INVALIDATED in session.info or session.new or session.dirty or session.deleted
+    )
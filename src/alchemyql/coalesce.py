@@ -0,0 +1,71 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
+
+from graphql import ExecutionResult
+
+log = logging.getLogger("alchemyql")
+
+
+@dataclass
+class CoalescingStats:
+    """
+    Statistics of the requests handled by a coalescer.
+    """
+
+    # Number of requests which were executed
+    executions: int = 0
+
+    # Number of requests which shared an in flight execution (i.e. executions saved)
+    coalesced: int = 0
+
+
+class Coalescer:
+    """
+    Shares a single in flight execution between identical concurrent requests (singleflight).
+
+    Requests are identical when their query, variables, operation & options match within the
+    same scope (e.g. a user or tenant, so results never cross security boundaries) & on the same
+    session: requests given different sessions never share an execution, while requests without
+    a session share the session the engine opens for the execution.
+    """
+
+    def __init__(self):
+        self.in_flight: dict[tuple, asyncio.Future] = {}
+        self.stats = CoalescingStats()
+
+    def key(self, scope: Hashable | None, session: Any, *request: Any) -> tuple:
+        """
+        Key identifying identical requests (within the running event loop), on the same session
+        (compared by identity, None for sessions opened by the engine).
+        """
+        return (
+            asyncio.get_running_loop(),
+            scope,
+            session,
+            json.dumps(request, sort_keys=True, default=str),
+        )
+
+    async def run(
+        self, key: tuple, execute: Callable[[], Awaitable[ExecutionResult]]
+    ) -> ExecutionResult:
+        """
+        Run an execution, or wait for the identical execution already in flight.
+
+        The execution is shielded, so cancelling one of the waiting requests does not cancel
+        it for the others.
+        """
+        task = self.in_flight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(execute())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+            self.stats.executions += 1
+        else:
+            self.stats.coalesced += 1
+            log.debug("Coalesced query with an identical in flight query")
+
+        return await asyncio.shield(task)
@@ -1,17 +1,44 @@
+import asyncio
 import logging
 import time
 from abc import ABC
-from typing import Any
-
-from graphql import ExecutionResult, GraphQLSchema, graphql, graphql_sync
+from typing import Any, Callable, Hashable
+
+from graphql import (
+    ExecutionResult,
+    GraphQLError,
+    GraphQLSchema,
+    graphql,
+    graphql_sync,
+)
 from graphql.utilities import print_schema
+from sqlalchemy import Table as SQLTable
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import DeclarativeBase, Session
 
-from .errors import ConfigurationError
-from .models import Order, Table
-from .register import register_transform
+from .budget import Budget
+from .cache import CacheBackend, EntityCache
+from .coalesce import Coalescer
+from .errors import ConfigurationError, QueryTimeoutError
+from .loader import Loaders
+from .models import Order, RequestStats, StitchedRelationship, Table
+from .register import (
+    build_foreign_key_relationships,
+    build_stitched_relationship,
+    link_polymorphic_tables,
+    register_transform,
+    stitch_foreign_keys,
+)
+from .routing import DatabaseNode, RoundRobin, Router, RoutingPolicy, ping
 from .schema import build_gql_schema
+from .search import create_search_index
+from .timeout import (
+    async_statement_timeout,
+    check_deadline,
+    get_deadline,
+    statement_timeout,
+)
+from .views import MaterializedView, ViewRefresher, map_view
 
 log = logging.getLogger("alchemyql")
 
@@ -23,17 +50,77 @@ class AlchemyQL(ABC):
     An Engine supports adding tables, building Graph QL schema and executing queries.
     """
 
-    def __init__(self, max_query_depth: int | None = None):
+    def __init__(
+        self,
+        max_query_depth: int | None = None,
+        batch_relationships: bool = False,
+        offload_threshold: int | None = None,
+        timeout: float | None = None,
+        partial_results: bool = False,
+        max_rows: int | None = None,
+        max_response_size: int | None = None,
+        auto_limit: int | None = None,
+        session_factory: Callable | None = None,
+        replica_session_factories: list[Callable] | None = None,
+        routing_policy: RoutingPolicy | None = None,
+        health_check: Callable = ping,
+        health_check_interval: float = 30,
+        read_only: bool = False,
+        coalesce: bool = False,
+        in_list_threshold: int | None = 1000,
+        in_chunk_size: int = 1000,
+    ):
         """
         Initialize Alchemy QL Engine.
 
         Options:
             - max_query_depth - Maximum number of nested relationships that can be queries in 1 query
+            - batch_relationships - Load relationships with 1 batched IN query per relationship per level (instead of joins)
+            - offload_threshold - Row count above which results are serialized in a worker thread (async only)
+            - timeout - Default maximum time (in seconds) a query can take to execute
+            - partial_results - Whether to return the results of root fields which completed before a timeout
+            - max_rows - Maximum number of rows (across all root & nested lists) 1 query can return
+            - max_response_size - Maximum (JSON encoded) size in bytes of the data 1 query can return
+            - auto_limit - Limit applied to root queries which would otherwise be unbounded
+            - session_factory - Factory of sessions on the primary database (used when no session is passed to execute_query)
+            - replica_session_factories - Factories of sessions on read replicas (queries are routed to healthy replicas)
+            - routing_policy - Policy choosing the replica of a query (defaults to round robin)
+            - health_check - Function checking a replica is healthy, given a sync session (defaults to "SELECT 1")
+            - health_check_interval - Number of seconds between health checks of a replica
+            - read_only - Whether sessions opened by the engine run read only transactions (PostgreSQL & SQLite)
+            - coalesce - Whether identical concurrent queries share a single execution (async only)
+            - in_list_threshold - Number of values above which IN filters are bound as a single array / JSON parameter (None to disable)
+            - in_chunk_size - Maximum number of values per IN list, for large IN filters on databases without array / JSON binding
         """
         self.schema: GraphQLSchema | None = None
         self.tables: list[Table] = []
+        self.caches: dict[type, EntityCache] = {}
+        self.stitched: dict[type, dict[str, StitchedRelationship]] = {}
+        self.core: set[type] = set()
+        self.computed: dict[type, dict[str, Any]] = {}
+        self.views: list[MaterializedView] = []
         self.is_async: bool
         self.max_query_depth = max_query_depth
+        self.batch_relationships = batch_relationships
+        self.offload_threshold = offload_threshold
+        self.timeout = timeout
+        self.partial_results = partial_results
+        self.max_rows = max_rows
+        self.max_response_size = max_response_size
+        self.auto_limit = auto_limit
+        self.coalescer = Coalescer() if coalesce else None
+        self.in_list_threshold = in_list_threshold
+        self.in_chunk_size = in_chunk_size
+        self.router = None
+        if session_factory or replica_session_factories:
+            self.router = Router(
+                session_factory,
+                replica_session_factories or [],
+                routing_policy or RoundRobin(),
+                health_check,
+                health_check_interval,
+                read_only,
+            )
 
     def register(
         self,
@@ -43,13 +130,30 @@ class AlchemyQL(ABC):
         query: bool = True,
         include_fields: list[str] | None = None,
         exclude_fields: list[str] | None = None,
+        computed_fields: list[str] | None = None,
         relationships: list[str] | None = None,
+        relationship_counts: list[str] | None = None,
+        recursive: str | None = None,
         filter_fields: list[str] | None = None,
+        search_fields: list[str] | None = None,
         order_fields: list[str] | None = None,
         default_order: dict[str, Order] | None = None,
+        bucket_fields: list[str] | None = None,
+        aggregate_fields: list[str] | None = None,
         pagination: bool = False,
         default_limit: int | None = None,
         max_limit: int | None = None,
+        pk_lookup: bool = False,
+        row_count: bool = False,
+        sample: bool = False,
+        cache: bool = False,
+        cache_size: int = 1000,
+        cache_ttl: float | None = None,
+        cache_backend: CacheBackend | None = None,
+        shards: dict[str, Callable] | None = None,
+        shard_key: str | None = None,
+        shard_for: Callable[[Any], str] | None = None,
+        micro_batch_window: float | None = None,
     ):
         """
         Register a SQL Alchemy Table into your Alchemy QL engine.
@@ -60,13 +164,30 @@ class AlchemyQL(ABC):
          - query - whether to support direct querying of table
          - include_fields - list of column names to expose
          - exclude_fields - list of column names not to expose
+         - computed_fields - list of hybrid property names to expose (computed by their SQL expression in the SELECT)
          - relationships - list of relationship names to expose (target table must also be registered before schema is built)
-         - filter_fields - list of column names to allow filtering by
+         - relationship_counts - list of (exposed) list relationship names to expose a "<name>_count" field for
+         - recursive - self-referential relationship name to expose "descendants" & "ancestors" fields for (loaded with 1 recursive query)
+         - filter_fields - list of column names (& exposed relationships) to allow filtering by
+         - search_fields - list of string column names to allow full text search on (with a "search" filter & "<name>_rank" ordering)
          - order_fields - list of column names to allow ordering by
          - default_order - column -> order map to be applied by default
+         - bucket_fields - list of date / datetime column names to allow aggregating rows per time bucket of (with a "<graphql_name>_buckets" query)
+         - aggregate_fields - list of numeric column names to aggregate per time bucket (sum, avg, min & max)
          - pagination - whether to support pagination
          - default_limit - default max number of rows to return
          - max_limit - max limit to allow
+         - pk_lookup - whether to support fetching rows by primary key (single & batch by ids)
+         - row_count - whether to expose a "<graphql_name>s_count" query counting the filtered rows (exactly, or approximately with "approximate: true")
+         - sample - whether list queries accept a "sample" argument (percentage of rows to randomly sample, the primary key must be a single integer column)
+         - cache - whether to cache rows by primary key (used by primary key lookups & many-to-one relationships)
+         - cache_size - max number of rows to cache (ignored when a cache backend is provided)
+         - cache_ttl - number of seconds after which cached rows expire
+         - cache_backend - custom storage of cached rows (defaults to an in memory LRU cache)
+         - shards - shard name -> session factory map of the databases the table is split across
+         - shard_key - column name deciding the shard of a row (queries filtering on it only query its shard)
+         - shard_for - function returning the shard name of a shard key value (defaults to a stable hash)
+         - micro_batch_window - number of seconds eq / in lookups of unique columns are collected across requests (on sessions opened by the engine) to run as 1 query (async only)
         """
 
         table = register_transform(
@@ -76,13 +197,30 @@ class AlchemyQL(ABC):
             query,
             include_fields,
             exclude_fields,
+            computed_fields,
             relationships,
+            relationship_counts,
+            recursive,
             filter_fields,
+            search_fields,
             order_fields,
             default_order,
+            bucket_fields,
+            aggregate_fields,
             pagination,
             default_limit,
             max_limit,
+            pk_lookup,
+            row_count,
+            sample,
+            cache,
+            cache_size,
+            cache_ttl,
+            cache_backend,
+            shards,
+            shard_key,
+            shard_for,
+            micro_batch_window,
         )
 
         # Checks the table is not already registerd
@@ -98,6 +236,154 @@ class AlchemyQL(ABC):
             f"Registerd table {table.graphql_name}! (Now {len(self.tables)} tables registered!)"
         )
 
+    def register_relationship(
+        self,
+        sqlalchemy_cls,
+        name: str,
+        target_cls,
+        local_key: str,
+        remote_key: str,
+        uselist: bool = True,
+        session_factory: Callable | None = None,
+    ):
+        """
+        Register a relationship between 2 registered tables which are not related in SQL Alchemy
+        (e.g. tables stored in different databases).
+
+        The relationship is loaded with 1 batched IN query (on the remote key) per relationship per level.
+
+        Options:
+         - name - name of the relationship field (on the registered table)
+         - target_cls - SQL Alchemy class of the related table (must also be registered before schema is built)
+         - local_key - column name of the registered table matching the remote key
+         - remote_key - column name of the related table matching the local key
+         - uselist - whether the relationship returns a list of rows (or a single row)
+         - session_factory - factory of sessions on the related table's database (defaults to the query's session)
+        """
+        table = next(
+            (t for t in self.tables if t.sqlalchemy_cls is sqlalchemy_cls), None
+        )
+        if table is None:
+            raise ConfigurationError("Sqlalchemy Table is not registered")
+
+        table.stitched[name] = build_stitched_relationship(
+            table, name, target_cls, local_key, remote_key, uselist, session_factory
+        )
+
+    def register_table(
+        self,
+        table: SQLTable,
+        primary_key: list[str] | None = None,
+        graphql_name: str | None = None,
+        description: str | None = None,
+        query: bool = True,
+        include_fields: list[str] | None = None,
+        exclude_fields: list[str] | None = None,
+        relationships: list[str] | None = None,
+        filter_fields: list[str] | None = None,
+        search_fields: list[str] | None = None,
+        order_fields: list[str] | None = None,
+        default_order: dict[str, Order] | None = None,
+        pagination: bool = False,
+        default_limit: int | None = None,
+        max_limit: int | None = None,
+        pk_lookup: bool = False,
+    ) -> type:
+        """
+        Register a SQL Alchemy Core Table into your Alchemy QL engine, without mapping it with the ORM.
+
+        Rows are loaded with Core selects (as row mappings), relationships are derived from foreign keys
+        & loaded with 1 batched IN query per relationship per level. Returns the class describing the table
+        (its rows are never loaded as instances of it).
+
+        Options:
+         - primary_key - column names uniquely identifying a row (defaults to the table's primary key)
+         - relationships - list of related table names (lowercase) to expose, related by a foreign key of
+           the table (a record) or of the related table (a list of records). The related table must also be
+           registered before schema is built
+         - graphql_name, description, query, include_fields, exclude_fields, filter_fields, search_fields,
+           order_fields, default_order, pagination, default_limit, max_limit & pk_lookup - as "register"
+           (its other options are not supported for Core tables)
+        """
+        self.register(
+            map_view(table, primary_key),
+            graphql_name=graphql_name,
+            description=description,
+            query=query,
+            include_fields=include_fields,
+            exclude_fields=exclude_fields,
+            filter_fields=filter_fields,
+            search_fields=search_fields,
+            order_fields=order_fields,
+            default_order=default_order,
+            pagination=pagination,
+            default_limit=default_limit,
+            max_limit=max_limit,
+            pk_lookup=pk_lookup,
+        )
+
+        registered = self.tables[-1]
+        registered.core = True
+        registered.foreign_keys = build_foreign_key_relationships(
+            registered, table, relationships
+        )
+        return registered.sqlalchemy_cls
+
+    def register_view(
+        self, view, primary_key: list[str] | None = None, **kwargs
+    ) -> type:
+        """
+        Register a table, view, named select (e.g. "select(...).subquery(name)") or materialized view
+        into your Alchemy QL engine (as a read only table). Returns the SQL Alchemy class it is mapped to.
+
+        Options:
+         - primary_key - column names uniquely identifying a row (defaults to the table's primary key)
+         - All options of "register" (e.g. filter_fields, order_fields, pagination ...)
+        """
+        view_cls = map_view(view, primary_key)
+        self.register(view_cls, **kwargs)
+
+        if isinstance(view, MaterializedView):
+            self.views.append(view)
+        return view_cls
+
+    def create_materialized_views(self, connection):
+        """
+        Create the registered materialized views (if they do not exist).
+
+        On PostgreSQL, a materialized view is created. On other databases, a cache table is created
+        & filled with the result of the view's query.
+
+        NOTE: This takes a sync connection (e.g. "await conn.run_sync(engine.create_materialized_views)" for async drivers)
+        """
+        for view in self.views:
+            view.create(connection)
+            log.debug(f"Created materialized view {view.name}!")
+
+    def refresh_materialized_views(self, connection):
+        """
+        Refresh the registered materialized views (recomputing their rows).
+
+        NOTE: This takes a sync connection (e.g. "await conn.run_sync(engine.refresh_materialized_views)" for async drivers)
+        """
+        for view in self.views:
+            view.refresh(connection)
+
+    def schedule_view_refresh(
+        self, bind, interval: float | None = None, on_commit: bool = False
+    ) -> ViewRefresher:
+        """
+        Refresh the registered materialized views in the background, using a sync engine.
+        Returns the refresher (call "stop()" to stop refreshing).
+
+        Options:
+         - interval - number of seconds between refreshes (in a daemon thread)
+         - on_commit - whether to refresh the views (in the background) after a session commits changes to the tables they are computed from
+        """
+        refresher = ViewRefresher(bind, self.views, interval, on_commit)
+        refresher.start()
+        return refresher
+
     def register_all_tables(self, base: type[DeclarativeBase]):
         """
         Register all tables under a DeclarativeBase.
@@ -107,6 +393,22 @@ class AlchemyQL(ABC):
         for mapper in base.registry.mappers:
             self.register(mapper.class_)
 
+    def create_search_indexes(self, connection):
+        """
+        Create the full text search indexes of the search fields of all registered tables (if they do not exist).
+
+        On SQLite, the FTS5 index of a table is kept up to date by triggers & rebuilt from the table's rows.
+        On PostgreSQL, a GIN index is created for every search field.
+
+        NOTE: This takes a sync connection (e.g. "await conn.run_sync(engine.create_search_indexes)" for async drivers)
+        """
+        for table in self.tables:
+            if table.search_fields:
+                create_search_index(
+                    connection, table.sqlalchemy_cls, table.search_fields
+                )
+                log.debug(f"Created search index for table {table.graphql_name}!")
+
     def build_schema(self):
         """
         Builds a Graph QL Schema using all registered SQL Alchemy Tables.
@@ -115,7 +417,18 @@ class AlchemyQL(ABC):
         """
         start = time.perf_counter()
 
+        stitch_foreign_keys(self.tables)
+        link_polymorphic_tables(self.tables)
+
         self.schema = build_gql_schema(self.tables, self.is_async)
+        self.core = {t.sqlalchemy_cls for t in self.tables if t.core}
+        self.caches = {t.sqlalchemy_cls: t.cache for t in self.tables if t.cache}
+        self.stitched = {
+            t.sqlalchemy_cls: t.stitched for t in self.tables if t.stitched
+        }
+        self.computed = {
+            t.sqlalchemy_cls: t.computed for t in self.tables if t.computed
+        }
 
         log.debug(
             "Build schema complete! (Time taken: %.6f seconds)",
@@ -132,6 +445,83 @@ class AlchemyQL(ABC):
             )
         return print_schema(self.schema)
 
+    def _build_context(
+        self, db_session, deadline: float | None, node: DatabaseNode | None
+    ) -> dict[str, Any]:
+        """
+        Build the request scoped context made available to resolvers.
+        """
+        context = {
+            "session": db_session,
+            "router": self.router,
+            "node": node,
+            "is_async": self.is_async,
+            "max_query_depth": self.max_query_depth,
+            "shared_results": {},
+            "offload_threshold": self.offload_threshold,
+            "deadline": deadline,
+            "partial_results": self.partial_results,
+            "auto_limit": self.auto_limit,
+            "budget": Budget(self.max_rows, self.max_response_size),
+            "stats": RequestStats(),
+            "caches": self.caches,
+            "stitched": self.stitched,
+            "core": self.core,
+            "computed": self.computed,
+            "batch_relationships": self.batch_relationships,
+            "in_list": (self.in_list_threshold, self.in_chunk_size),
+        }
+        context["loaders"] = Loaders(db_session, context)
+
+        return context
+
+    def _check_ready(self, db_session):
+        """
+        Checks the engine is ready to execute a query (on the given or a routed session).
+        """
+        if not self.schema:
+            raise ConfigurationError(
+                "Schema is not setup yet. You must run 'build_schema()' first"
+            )
+
+        if db_session is None and self.router is None:
+            raise ConfigurationError(
+                "No db session provided & no session factories configured"
+            )
+
+    def _check_warmup_result(self, query: str, result: ExecutionResult):
+        """
+        Checks a warm up query executed successfully.
+        """
+        if result.errors:
+            raise ConfigurationError(
+                f"Warm up query failed ({query=}): {result.errors[0].message}"
+            )
+
+    def _get_deadline(self, timeout: float | None) -> float | None:
+        """
+        Deadline of a request (the request timeout takes precedence over the engine default).
+        """
+        return get_deadline(timeout if timeout is not None else self.timeout)
+
+    def _timed_out(self, result: ExecutionResult) -> bool:
+        """
+        Whether any part of the query execution timed out.
+        """
+        return any(
+            isinstance(err.original_error, QueryTimeoutError)
+            for err in result.errors or []
+        )
+
+    def _timeout_result(self) -> ExecutionResult:
+        """
+        Result returned for a timed out query.
+        """
+        err = QueryTimeoutError("Query execution timed out")
+        return ExecutionResult(
+            data=None, errors=[GraphQLError(str(err), original_error=err)]
+        )
+
 
 class AlchemyQLSync(AlchemyQL):
     def __init__(self, max_query_depth: int | None = None, *args, **kwargs):
@@ -141,30 +531,97 @@ class AlchemyQLSync(AlchemyQL):
     def execute_query(
         self,
         query: str,
-        db_session: Session,
+        db_session: Session | None = None,
         variables: dict[str, Any] | None = None,
         operation: str | None = None,
+        timeout: float | None = None,
+        read_your_writes: bool = False,
     ) -> ExecutionResult:
         """
         Executes a Graph QL query on the Alchemy QL engine.
+
+        Without a db session, the query runs on a session opened on a replica (or the primary).
+        After a timeout, the transaction of a provided db session is left to the caller (it is not
+        rolled back by the engine).
+
+        Options:
+            - timeout - Maximum time (in seconds) the query can take (defaults to the engine timeout)
+            - read_your_writes - Whether to route the query to the primary (when no db session is provided)
         """
-        if not self.schema:
-            raise ConfigurationError(
-                "Schema is not setup yet. You must run 'build_schema()' first"
-            )
+        self._check_ready(db_session)
 
-        start = time.perf_counter()
+        if db_session is not None:
+            return self._execute(query, db_session, variables, operation, timeout, None)
 
-        result = graphql_sync(
-            self.schema,
-            query,
-            variable_values=variables,
-            operation_name=operation,
-            context_value={
-                "session": db_session,
-                "max_query_depth": self.max_query_depth,
-            },
-        )
+        with self.router.session(read_your_writes) as (node, session):  # type: ignore
+            result = self._execute(query, session, variables, operation, timeout, node)
+        self.router.report(node, result)  # type: ignore
+
+        return result
+
+    def warmup(self, queries: list[str] | None = None, connections: int = 1):
+        """
+        Warm up the databases of the engine's session factories (e.g. before a service reports ready).
+
+        Connections are opened on every database (primary & replicas), then the queries are executed
+        on every database so their SQL is compiled & cached before the first request.
+
+        Options:
+            - queries - Queries to execute on every database
+            - connections - Number of connections to open (& return to the pool) per database
+        """
+        self._check_ready(None)
+
+        for node in self.router.nodes:  # type: ignore
+            if not self.router.warm_sync(node, connections):  # type: ignore
+                continue
+
+            for query in queries or []:
+                with self.router.open_sync(node) as session:  # type: ignore
+                    result = self._execute(query, session, None, None, None, node)
+                self._check_warmup_result(query, result)
+
+    def _execute(
+        self,
+        query: str,
+        db_session: Session,
+        variables: dict[str, Any] | None,
+        operation: str | None,
+        timeout: float | None,
+        node: DatabaseNode | None,
+    ) -> ExecutionResult:
+        """
+        Execute a query on a session, opened by the engine on a database node (None for sessions
+        provided by the caller).
+
+        Timed out statements are cancelled by the database (see "statement_timeout"), then the
+        transaction of sessions opened by the engine is rolled back. Transactions of sessions
+        provided by the caller are left to the caller.
+        """
+        start = time.perf_counter()
+        deadline = self._get_deadline(timeout)
+
+        context = self._build_context(db_session, deadline, node)
+
+        try:
+            with statement_timeout(db_session, deadline):
+                result = graphql_sync(
+                    self.schema,
+                    query,
+                    variable_values=variables,
+                    operation_name=operation,
+                    context_value=context,
+                )
+        finally:
+            # Sessions opened on the databases of stitched relationships
+            context["loaders"].close()
+
+        if self._timed_out(result):
+            if node is not None:
+                # Release the connection held by the timed out transaction
+                db_session.rollback()
+            if not self.partial_results:
+                result = self._timeout_result()
 
         log.debug(
             "Query execution complete! (Time taken: %.6f seconds)",
@@ -182,34 +639,151 @@ class AlchemyQLAsync(AlchemyQL):
     async def execute_query(
         self,
         query: str,
-        db_session: AsyncSession,
+        db_session: AsyncSession | None = None,
         variables: dict[str, Any] | None = None,
         operation: str | None = None,
+        timeout: float | None = None,
+        read_your_writes: bool = False,
+        coalesce_scope: Hashable | None = None,
     ) -> ExecutionResult:
         """
         Executes a Graph QL query on the Alchemy QL engine.
+
+        Without a db session, the query runs on a session opened on a replica (or the primary).
+        After a timeout, the transaction of a provided db session is left to the caller (it is not
+        rolled back by the engine).
+
+        Options:
+            - timeout - Maximum time (in seconds) the query can take (defaults to the engine timeout)
+            - read_your_writes - Whether to route the query to the primary (when no db session is provided)
+            - coalesce_scope - Scope (e.g. user or tenant) identical queries are coalesced within (defaults to the process)
         """
-        if not self.schema:
-            raise ConfigurationError(
-                "Schema is not setup yet. You must run 'build_schema()' first"
-            )
+        self._check_ready(db_session)
 
-        start = time.perf_counter()
+        if self.coalescer is None:
+            return await self._route(
+                query, db_session, variables, operation, timeout, read_your_writes
+            )
 
-        result = await graphql(
-            self.schema,
+        key = self.coalescer.key(
+            coalesce_scope,
+            db_session,
             query,
-            variable_values=variables,
-            operation_name=operation,
-            context_value={
-                "session": db_session,
-                "max_query_depth": self.max_query_depth,
-            },
+            variables,
+            operation,
+            timeout,
+            read_your_writes,
+        )
+        return await self.coalescer.run(
+            key,
+            lambda: self._route(
+                query, db_session, variables, operation, timeout, read_your_writes
+            ),
         )
 
+    async def _route(
+        self,
+        query: str,
+        db_session: AsyncSession | None,
+        variables: dict[str, Any] | None,
+        operation: str | None,
+        timeout: float | None,
+        read_your_writes: bool,
+    ) -> ExecutionResult:
+        if db_session is not None:
+            return await self._execute(
+                query, db_session, variables, operation, timeout, None
+            )
+
+        async with self.router.session_async(read_your_writes) as (node, session):  # type: ignore
+            result = await self._execute(
+                query, session, variables, operation, timeout, node
+            )
+        self.router.report(node, result)  # type: ignore
+
+        return result
+
+    async def warmup(self, queries: list[str] | None = None, connections: int = 1):
+        """
+        Warm up the databases of the engine's session factories (e.g. before a service reports ready).
+
+        Connections are opened on every database (primary & replicas), then the queries are executed
+        on every database so their SQL is compiled & cached before the first request.
+
+        Options:
+            - queries - Queries to execute on every database
+            - connections - Number of connections to open (& return to the pool) per database
+        """
+        self._check_ready(None)
+
+        for node in self.router.nodes:  # type: ignore
+            if not await self.router.warm_async(node, connections):  # type: ignore
+                continue
+
+            for query in queries or []:
+                async with self.router.open_async(node) as session:  # type: ignore
+                    result = await self._execute(query, session, None, None, None, node)
+                self._check_warmup_result(query, result)
+
+    async def _execute(
+        self,
+        query: str,
+        db_session: AsyncSession,
+        variables: dict[str, Any] | None,
+        operation: str | None,
+        timeout: float | None,
+        node: DatabaseNode | None,
+    ) -> ExecutionResult:
+        """
+        Execute a query on a session, opened by the engine on a database node (None for sessions
+        provided by the caller).
+
+        Timed out statements are cancelled by the database (see "statement_timeout"), then the
+        transaction of sessions opened by the engine is rolled back. Transactions of sessions
+        provided by the caller are left to the caller.
+        """
+        start = time.perf_counter()
+        deadline = self._get_deadline(timeout)
+        context = self._build_context(db_session, deadline, node)
+
+        try:
+            async with async_statement_timeout(db_session, deadline):
+                try:
+                    # Without partial results the whole execution is cancelled at the deadline
+                    async with asyncio.timeout_at(
+                        None if self.partial_results else deadline
+                    ):
+                        check_deadline(deadline)
+                        result = await graphql(
+                            self.schema,
+                            query,
+                            variable_values=variables,
+                            operation_name=operation,
+                            context_value=context,
+                        )
+                except (TimeoutError, QueryTimeoutError):
+                    result = self._timeout_result()
+        finally:
+            # Sessions opened on the databases of stitched relationships
+            await context["loaders"].close_async()
+
+        if self._timed_out(result):
+            if node is not None:
+                # Release the connection held by the timed out transaction
+                await db_session.rollback()
+            if not self.partial_results:
+                result = self._timeout_result()
+
+        # Time the request blocked the event loop (reported to the caller)
+        result.extensions = {
+            **(result.extensions or {}),
+            "loop_blocking": context["stats"].loop_blocking,
+        }
+
         log.debug(
-            "Query execution complete! (Time taken: %.6f seconds)",
+            "Query execution complete! (Time taken: %.6f seconds, Event loop blocked: %.6f seconds)",
             time.perf_counter() - start,
+            context["stats"].loop_blocking,
         )
 
         return result
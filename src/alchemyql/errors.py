@@ -14,3 +14,9 @@ class QueryExecutionError(AlchemyQLError):
     """Raised when the query execution fails."""
 
     pass
+
+
+class QueryTimeoutError(QueryExecutionError):
+    """Raised when the query execution exceeds its timeout."""
+
+    extensions = {"code": "TIMEOUT"}
@@ -1,6 +1,6 @@
 from datetime import date, datetime, time
 from enum import Enum
-from typing import Callable, cast
+from typing import Any, Callable, cast
 
 from graphql import (
     GraphQLEnumType,
@@ -8,7 +8,13 @@ from graphql import (
     GraphQLInputObjectType,
     GraphQLInputType,
     GraphQLList,
+    GraphQLNonNull,
 )
+from sqlalchemy import and_, inspect, or_, true
+
+from .inlist import in_filter
+from .jsonpath import json_path_conditions
+from .search import SearchMatch
 
 from .scalars import (
     BoolScalar,
@@ -16,6 +22,7 @@ from .scalars import (
     DateTimeScalar,
     FloatScalar,
     IntScalar,
+    JSONScalar,
     StringScalar,
     TimeScalar,
 )
@@ -78,6 +85,18 @@ StringFilter = cast(
     ),
 )
 
+# String filter of full text searchable columns
+SearchFilter = cast(
+    GraphQLInputObjectType,
+    GraphQLInputObjectType(
+        name="SearchFilter",
+        fields=lambda: {
+            **StringFilter.fields,
+            "search": GraphQLInputField(StringScalar),
+        },
+    ),
+)
+
 DateTimeFilter = cast(
     GraphQLInputObjectType,
     GraphQLInputObjectType(
@@ -126,6 +145,24 @@ TimeFilter = cast(
     ),
 )
 
+# Filter on the value at a path of a JSON column (e.g. {path: "address.city", eq: "London"})
+JSONFilter = cast(
+    GraphQLInputObjectType,
+    GraphQLInputObjectType(
+        name="JSONFilter",
+        fields=lambda: {
+            "path": GraphQLInputField(GraphQLNonNull(StringScalar)),
+            "eq": GraphQLInputField(JSONScalar),
+            "ne": GraphQLInputField(JSONScalar),
+            "gt": GraphQLInputField(JSONScalar),
+            "ge": GraphQLInputField(JSONScalar),
+            "lt": GraphQLInputField(JSONScalar),
+            "le": GraphQLInputField(JSONScalar),
+            "in": GraphQLInputField(GraphQLList(JSONScalar)),
+        },
+    ),
+)
+
 
 def build_enum_filter(cls: GraphQLEnumType) -> GraphQLInputObjectType:
     return cast(
@@ -141,7 +178,7 @@ def build_enum_filter(cls: GraphQLEnumType) -> GraphQLInputObjectType:
     )
 
 
-FILTERS: dict[type, Callable[[GraphQLInputType], GraphQLInputObjectType]] = {
+FILTERS: dict[type, Callable[[GraphQLInputType], GraphQLInputType]] = {
     int: lambda _: IntFilter,
     str: lambda _: StringFilter,
     bool: lambda _: BoolFilter,
@@ -150,4 +187,69 @@ FILTERS: dict[type, Callable[[GraphQLInputType], GraphQLInputObjectType]] = {
     datetime: lambda _: DateTimeFilter,
     date: lambda _: DateFilter,
     time: lambda _: TimeFilter,
+    dict: lambda _: GraphQLList(GraphQLNonNull(JSONFilter)),
+    list: lambda _: GraphQLList(GraphQLNonNull(JSONFilter)),
 }
+
+
+def build_filter_conditions(
+    sqlalchemy_cls, filters: dict[str, Any], in_list: tuple[int | None, int]
+) -> list:
+    """
+    Build the WHERE conditions of a filter on columns & relationships.
+
+    Relationship filters are compiled to correlated EXISTS subqueries (via any() / has()):
+     - some - at least one related row matches
+     - every - no related row does not match (rows whose condition is NULL do not match)
+     - none - no related row matches
+
+    JSON columns are filtered on the values at JSON paths (a list of path filters).
+    """
+    conditions = []
+    for name, operations in filters.items():
+        column = getattr(sqlalchemy_cls, name)
+
+        if name in inspect(sqlalchemy_cls).mapper.relationships:
+            exists = column.any if column.property.uselist else column.has
+            target_cls = column.property.mapper.class_
+            for op, val in operations.items():
+                if val is None:
+                    continue
+                cond = and_(true(), *build_filter_conditions(target_cls, val, in_list))
+                if op == "some":
+                    conditions.append(exists(cond))
+                elif op == "every":
+                    conditions.append(~exists(or_(~cond, cond.is_(None))))
+                elif op == "none":
+                    conditions.append(~exists(cond))
+            continue
+
+        if isinstance(operations, list):
+            conditions += json_path_conditions(column, operations)
+            continue
+
+        for op, val in operations.items():
+            if op == "eq":
+                conditions.append(column == val)
+            elif op == "ne":
+                conditions.append(column != val)
+            elif op == "lt":
+                conditions.append(column < val)
+            elif op == "le":
+                conditions.append(column <= val)
+            elif op == "gt":
+                conditions.append(column > val)
+            elif op == "ge":
+                conditions.append(column >= val)
+            elif op == "contains":
+                conditions.append(column.contains(val))
+            elif op == "in":
+                conditions.append(in_filter(column, val, *in_list))
+            elif op == "startswith":
+                conditions.append(column.startswith(val))
+            elif op == "endswith":
+                conditions.append(column.endswith(val))
+            elif op == "search" and val is not None:
+                conditions.append(SearchMatch(column, val))
+
+    return conditions
@@ -0,0 +1,65 @@
+import json
+
+from sqlalchemy import ARRAY, Boolean, any_, bindparam, func, or_, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import ColumnElement
+
+
+class LargeIn(ColumnElement):
+    """
+    IN filter of a large list of values, compiled for the database:
+     - PostgreSQL binds the list as a single array ("column = ANY(:values)")
+     - SQLite binds the list as a single JSON array ("column IN (SELECT value FROM json_each(:values))")
+     - Other databases split the list into chunks ("column IN (...) OR column IN (...)")
+
+    Statements with large IN filters are not cached by SQLAlchemy (their SQL depends on the list),
+    but binding the list as a single parameter keeps the SQL (and the database's plan) the same.
+    """
+
+    inherit_cache = False
+    _is_implicitly_boolean = True
+    type = Boolean()
+
+    def __init__(self, column, values: list, chunk_size: int):
+        self.column = column
+        self.values = values
+        self.chunk_size = chunk_size
+
+
+def in_filter(column, values: list, threshold: int | None, chunk_size: int):
+    """
+    Build an IN filter (lists longer than the threshold are bound as large lists, see "LargeIn").
+    """
+    if threshold is None or len(values) <= threshold:
+        return column.in_(values)
+    return LargeIn(column, values, chunk_size)
+
+
+@compiles(LargeIn)
+def compile_chunked(element: LargeIn, compiler, **kw):
+    size = element.chunk_size
+    chunks = [element.values[i : i + size] for i in range(0, len(element.values), size)]
+    return compiler.process(or_(*[element.column.in_(chunk) for chunk in chunks]), **kw)
+
+
+@compiles(LargeIn, "postgresql")
+def compile_array(element: LargeIn, compiler, **kw):
+    values = bindparam(None, element.values, type_=ARRAY(element.column.type))
+    return compiler.process(element.column == any_(values), **kw)
+
+
+@compiles(LargeIn, "sqlite")
+def compile_json_each(element: LargeIn, compiler, **kw):
+    # Values are converted to their stored format (e.g. dates & enums are stored as strings)
+    dialect = compiler.dialect
+    process = element.column.type.dialect_impl(dialect).bind_processor(dialect)
+    values = [process(val) for val in element.values] if process else element.values
+
+    try:
+        values_json = json.dumps(values)
+    except TypeError:
+        # Values which cannot be JSON encoded (e.g. bytes)
+        return compile_chunked(element, compiler, **kw)
+
+    json_each = func.json_each(bindparam(None, values_json)).table_valued("value")
+    return compiler.process(element.column.in_(select(json_each.c.value)), **kw)
@@ -0,0 +1,106 @@
+from typing import Any
+
+from sqlalchemy import false, or_
+
+from .errors import QueryExecutionError
+
+
+def parse_json_path(path: str) -> tuple:
+    """
+    Parse a dot separated JSON path (e.g. "address.lines.0") into its keys & list indexes.
+    """
+    segments = path.split(".")
+    if not all(segments):
+        raise QueryExecutionError(f"Provided JSON Path is invalid (Value: {path})")
+    return tuple(int(seg) if seg.isdigit() else seg for seg in segments)
+
+
+def extract_json_path(document, path: str) -> Any:
+    """
+    Extract the value at a JSON path of a loaded document (None if the path does not exist).
+    """
+    value = document
+    for seg in parse_json_path(path):
+        if isinstance(seg, int) and isinstance(value, list):
+            value = value[seg] if seg < len(value) else None
+        elif isinstance(value, dict):
+            value = value.get(str(seg))
+        else:
+            return None
+    return value
+
+
+def json_path_expression(column, path: str):
+    """
+    SQL expression of the value at a JSON path of a column ("json_extract" on SQLite, "#>" on
+    PostgreSQL, ...).
+    """
+    return column[parse_json_path(path)]
+
+
+def json_cast(value) -> str:
+    """
+    Name of the cast of a JSON path expression to the type of a scalar value it is compared with.
+    """
+    if isinstance(value, bool):
+        return "as_boolean"
+    if isinstance(value, (int, float)):
+        return "as_float"
+    if isinstance(value, str):
+        return "as_string"
+    raise QueryExecutionError(
+        f"Provided JSON filter value is not a scalar (Value: {value})"
+    )
+
+
+def typed_json_path(expr, value):
+    """
+    Cast a JSON path expression to the type of a scalar value it is compared with.
+    """
+    return getattr(expr, json_cast(value))()
+
+
+def typed_json_path_in(expr, values: list):
+    """
+    IN condition of a JSON path expression, cast to the type of each value (values of each type
+    are compared in their own IN list).
+    """
+    by_cast: dict[str, list] = {}
+    for value in values:
+        by_cast.setdefault(json_cast(value), []).append(value)
+
+    return or_(*[getattr(expr, cast)().in_(group) for cast, group in by_cast.items()])
+
+
+def json_path_conditions(column, filters: list[dict[str, Any]]) -> list:
+    """
+    Build the WHERE conditions of filters on values at JSON paths of a column.
+    Values are compared by type (strings, numbers & booleans), null matches missing values.
+    """
+    conditions = []
+    for operations in filters:
+        expr = json_path_expression(column, operations["path"])
+
+        for op, val in operations.items():
+            if op in ("eq", "ne") and val is None:
+                missing = expr.as_string().is_(None)
+                conditions.append(missing if op == "eq" else ~missing)
+            elif op == "eq":
+                conditions.append(typed_json_path(expr, val) == val)
+            elif op == "ne":
+                conditions.append(typed_json_path(expr, val) != val)
+            elif op == "lt":
+                conditions.append(typed_json_path(expr, val) < val)
+            elif op == "le":
+                conditions.append(typed_json_path(expr, val) <= val)
+            elif op == "gt":
+                conditions.append(typed_json_path(expr, val) > val)
+            elif op == "ge":
+                conditions.append(typed_json_path(expr, val) >= val)
+            elif op == "in":
+                if not val:
+                    conditions.append(false())
+                else:
+                    conditions.append(typed_json_path_in(expr, val))
+
+    return conditions
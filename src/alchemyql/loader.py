@@ -0,0 +1,948 @@
+import asyncio
+import json
+import threading
+from abc import ABC, abstractmethod
+from typing import Any
+
+from sqlalchemy import Select, func, inspect, literal, select, tuple_
+from sqlalchemy.orm import MANYTOONE, aliased, joinedload, load_only, object_session
+
+from .cache import EntityCache, has_uncommitted_changes
+from .filters import build_filter_conditions
+from .inlist import in_filter
+from .jsonpath import json_path_expression
+from .models import (
+    ComputedSelection,
+    CountSelection,
+    JSONPathSelection,
+    RecursiveSelection,
+    StitchedRelationship,
+)
+from .serializer import serialize, serialize_async, serialize_rows
+from .timeout import async_deadline_scope, deadline_scope
+
+
+class Deferred:
+    """
+    Placeholder for a value which is loaded in a batch by a loader when first resolved.
+    """
+
+    def __init__(self, loader: "BatchLoader", key: Any):
+        self.loader = loader
+        self.key = key
+
+    def resolve(self):
+        """
+        Resolve the deferred value (returns an awaitable for async loaders).
+        """
+        if self.loader.is_async:
+            return self.loader.load_async(self.key)
+        return self.loader.load_sync(self.key)
+
+
+class BatchLoader(ABC):
+    """
+    Request scoped loader which collects keys and loads all pending keys in a single query.
+
+    Keys are collected when a value is deferred (e.g. when parent rows are serialized) and
+    loaded on the first resolve of any of them, so all keys of a level are loaded together.
+    """
+
+    # Whether the query loads ORM rows to serialize (instead of plain values)
+    serialized = True
+
+    def __init__(self, loaders: "Loaders", session=None):
+        self.loaders = loaders
+        self.session = loaders.session if session is None else session
+        self.is_async = loaders.is_async
+        self.pending: dict[Any, None] = {}
+        self.results: dict[Any, Any] = {}
+        self.task: asyncio.Future | None = None
+        # Keys may be deferred from a worker thread (see "serialize_async")
+        self.lock = threading.Lock()
+
+    def defer(self, key: Any) -> Deferred:
+        """
+        Register a key to be loaded and return a placeholder for its value.
+        """
+        with self.lock:
+            if key not in self.results:
+                self.pending[key] = None
+        return Deferred(self, key)
+
+    def take_pending(self, key: Any) -> list:
+        """
+        Take all pending keys for loading (always including the requested key).
+        """
+        with self.lock:
+            self.pending[key] = None
+            keys = list(self.pending)
+            self.pending.clear()
+        return keys
+
+    @abstractmethod
+    def build_query(self, keys: list) -> Select:
+        """
+        Build the SQL query loading the values for the given keys.
+        """
+
+    @abstractmethod
+    def group(self, rows, keys: list) -> dict[Any, list]:
+        """
+        Group the result of the query by requested key (every key must be present).
+        """
+
+    @abstractmethod
+    def build_value(self, values: list) -> Any:
+        """
+        Build the value of a key from its serialized rows.
+        """
+
+    def load_cached(self, keys: list) -> list:
+        """
+        Store the values of keys which can be served without querying the database.
+        Returns the keys left to load.
+        """
+        return keys
+
+    def store(self, grouped: dict[Any, list], values: list):
+        """
+        Store the values of every key from the serialized rows of all groups.
+        """
+        i = 0
+        for key, group in grouped.items():
+            self.results[key] = self.build_value(values[i : i + len(group)])
+            i += len(group)
+
+        self.loaders.context["budget"].consume_size(values)
+
+    def limit(self, query: Select) -> Select:
+        """
+        Limit the query to the remaining row budget of the request.
+        """
+        if (limit := self.loaders.context["budget"].cap_limit(None)) is not None:
+            query = query.limit(limit)
+        return query
+
+    def load_sync(self, key: Any):
+        if key not in self.results:
+            context = self.loaders.context
+            keys = self.load_cached(self.take_pending(key))
+            if not keys:
+                return self.results[key]
+
+            with deadline_scope(context["deadline"]):
+                res = self.session.execute(self.limit(self.build_query(keys)))
+            grouped = self.group(res, keys)
+
+            # Serialize all groups at once
+            values = [obj for group in grouped.values() for obj in group]
+            if self.serialized:
+                budget = context["budget"]
+                values = serialize(values, self.fields, self.loaders, budget)
+            self.store(grouped, values)
+
+        return self.results[key]
+
+    async def fetch_async(self, keys: list):
+        context = self.loaders.context
+        stats = context["stats"]
+
+        if not (keys := self.load_cached(keys)):
+            return
+
+        with stats.measure_blocking():
+            query = self.limit(self.build_query(keys))
+
+        async with async_deadline_scope(
+            context["deadline"], cancel=context["partial_results"]
+        ):
+            res = await self.session.execute(query)
+
+        with stats.measure_blocking():
+            grouped = self.group(res, keys)
+
+        # Serialize all groups at once (allows large results to be offloaded)
+        values = [obj for group in grouped.values() for obj in group]
+        if self.serialized:
+            values = await serialize_async(values, self.fields, self.loaders, context)
+        self.store(grouped, values)
+
+    async def load_async(self, key: Any):
+        while key not in self.results:
+            if self.task is None or self.task.done():
+                self.task = asyncio.ensure_future(
+                    self.fetch_async(self.take_pending(key))
+                )
+            await self.task
+
+        return self.results[key]
+
+
+def identity(obj) -> tuple:
+    """
+    Primary key identity of an ORM object (does not emit SQL).
+    """
+    return inspect(obj).identity
+
+
+def primary_key_fields(mapper) -> list[str]:
+    """
+    Attribute names of the primary key columns of a mapper (in identity order).
+    """
+    return [mapper.get_property_by_column(c).key for c in mapper.primary_key]
+
+
+def foreign_key_fields(rel) -> list[str] | None:
+    """
+    Attribute names of the foreign key columns of a many-to-one relationship, in the order of the
+    target's primary key (None if the relationship does not reference the target's primary key).
+    """
+    if rel.direction is not MANYTOONE or rel.secondary is not None:
+        return None
+
+    remote_to_local = {remote: local for local, remote in rel.local_remote_pairs}
+    if any(col not in remote_to_local for col in rel.mapper.primary_key):
+        return None
+
+    return [
+        rel.parent.get_property_by_column(remote_to_local[col]).key
+        for col in rel.mapper.primary_key
+    ]
+
+
+def load_only_fields(mapper, fields: dict, foreign_keys: bool) -> list[str]:
+    """
+    Attribute names of the columns to load for the selected fields.
+
+    With "foreign_keys", the foreign keys of selected many-to-one relationships are also loaded
+    (so the relationships can be resolved from an entity cache).
+    Selecting a stitched relationship or a recursive field loads all columns (so their keys
+    are loaded), JSON columns selected at paths are not loaded (see "JSONPathLoader") & neither
+    are computed fields (see "ComputedLoader").
+    """
+    if any(
+        (isinstance(val, dict) and name not in mapper.relationships)
+        or isinstance(val, RecursiveSelection)
+        for name, val in fields.items()
+    ):
+        return []
+
+    keys = [name for name, val in fields.items() if val is True]
+    if not keys and any(
+        isinstance(val, (JSONPathSelection, ComputedSelection))
+        for val in fields.values()
+    ):
+        # Only values at JSON paths / computed fields are selected (loaded by their primary key)
+        keys = primary_key_fields(mapper)
+
+    if foreign_keys:
+        for name, val in fields.items():
+            if isinstance(val, dict):
+                rel_keys = foreign_key_fields(mapper.relationships[name]) or []
+                keys += [key for key in rel_keys if key not in keys]
+
+    return keys
+
+
+def whole_json_documents(fields: dict) -> dict:
+    """
+    Select the whole documents of JSON columns selected at paths (for queries without batch
+    loaders, the values are extracted from the documents).
+    """
+    result = {}
+    for name, subfields in fields.items():
+        if isinstance(subfields, JSONPathSelection):
+            result[name] = True
+        elif isinstance(subfields, dict):
+            result[name] = whole_json_documents(subfields)
+        else:
+            result[name] = subfields
+    return result
+
+
+def build_rels(sqlalchemy_cls, fields: dict) -> list:
+    """
+    Recursively build joinedload options for nested relationships.
+    This uses the input field list format from "extract_selected_fields"
+    (stitched relationships are skipped, they are loaded by batch loaders).
+    """
+    # Subclasses loaded polymorphically are aliased classes (of their mapper)
+    mapper = inspect(sqlalchemy_cls).mapper
+
+    joins = []
+    for field_name, subfields in fields.items():
+        if isinstance(subfields, dict) and field_name in mapper.relationships:
+            # Relationship SQLAlchemy class
+            rel_cls = mapper.relationships[field_name].mapper.class_
+
+            join = joinedload(getattr(sqlalchemy_cls, field_name))
+
+            # Columns to load for this relationship
+            if cols := load_only_fields(inspect(rel_cls), subfields, False):
+                join = join.load_only(*[getattr(rel_cls, col) for col in cols])
+
+            # Nested relationships to load
+            if nested := build_rels(rel_cls, subfields):
+                join = join.options(*nested)
+
+            joins.append(join)
+
+    return joins
+
+
+def primary_key_in(cls, keys: list, in_list: tuple[int | None, int] = (None, 1000)):
+    """
+    Build a WHERE condition matching rows of a mapped class by primary key identities.
+    Single column keys above the "in_list" threshold are bound as a large list.
+    """
+    pk = [getattr(cls, key) for key in primary_key_fields(inspect(cls))]
+
+    if len(pk) == 1:
+        return in_filter(pk[0], [key[0] for key in keys], *in_list)
+    return tuple_(*pk).in_(keys)
+
+
+class RelationshipLoader(BatchLoader):
+    """
+    Loads a relationship for many parent rows with one IN query on the parent primary keys.
+    """
+
+    def __init__(self, loaders: "Loaders", rel, fields: dict, session):
+        super().__init__(loaders, session)
+        self.rel = rel
+        self.fields = fields
+
+    def build_query(self, keys: list) -> Select:
+        parent = self.rel.parent
+        target = aliased(self.rel.mapper.class_)
+
+        pk = [getattr(parent.class_, key) for key in primary_key_fields(parent)]
+        stmt = (
+            select(*pk, target)
+            .select_from(parent.class_)
+            .join(getattr(parent.class_, self.rel.key).of_type(target))
+            .where(primary_key_in(parent.class_, keys, self.loaders.context["in_list"]))
+        )
+
+        if keys := load_only_fields(self.rel.mapper, self.fields, True):
+            stmt = stmt.options(load_only(*[getattr(target, key) for key in keys]))
+
+        return stmt
+
+    def group(self, rows, keys: list) -> dict[Any, list]:
+        n = len(self.rel.parent.primary_key)
+        grouped: dict[Any, list] = {key: [] for key in keys}
+        for row in rows:
+            grouped[tuple(row[:n])].append(row[n])
+        return grouped
+
+    def build_value(self, values: list) -> Any:
+        if self.rel.uselist:
+            return values
+        return values[0] if values else None
+
+
+class CountLoader(RelationshipLoader):
+    """
+    Counts the (filtered) related rows of a list relationship for many parent rows with one
+    grouped aggregate query, so no related rows are loaded.
+    """
+
+    serialized = False
+
+    def __init__(self, loaders: "Loaders", rel, filters: dict, session):
+        super().__init__(loaders, rel, {}, session)
+        self.filters = filters
+
+    def build_query(self, keys: list) -> Select:
+        parent = self.rel.parent
+        target = aliased(self.rel.mapper.class_)
+        in_list = self.loaders.context["in_list"]
+
+        pk = [getattr(parent.class_, key) for key in primary_key_fields(parent)]
+        return (
+            select(*pk, func.count())
+            .select_from(parent.class_)
+            .join(getattr(parent.class_, self.rel.key).of_type(target))
+            .where(primary_key_in(parent.class_, keys, in_list))
+            .where(*build_filter_conditions(target, self.filters, in_list))
+            .group_by(*pk)
+        )
+
+    def limit(self, query: Select) -> Select:
+        # Counts are not rows of the response (one row per parent at most)
+        return query
+
+    def build_value(self, values: list) -> Any:
+        return values[0] if values else 0
+
+
+class JSONPathLoader(BatchLoader):
+    """
+    Loads the values at JSON paths of a column for many rows with one IN query on their primary
+    keys, so only the selected values (not the whole documents) are transferred.
+    """
+
+    serialized = False
+
+    def __init__(
+        self, loaders: "Loaders", mapper, column: str, paths: tuple[str, ...], session
+    ):
+        super().__init__(loaders, session)
+        self.mapper = mapper
+        self.column = column
+        self.paths = paths
+
+    def build_query(self, keys: list) -> Select:
+        cls = self.mapper.class_
+        column = getattr(cls, self.column)
+        in_list = self.loaders.context["in_list"]
+
+        pk = [getattr(cls, key) for key in primary_key_fields(self.mapper)]
+        return select(
+            *pk, *[json_path_expression(column, path) for path in self.paths]
+        ).where(primary_key_in(cls, keys, in_list))
+
+    def limit(self, query: Select) -> Select:
+        # Values of rows already in the response (one row per key at most)
+        return query
+
+    def group(self, rows, keys: list) -> dict[Any, list]:
+        n = len(self.mapper.primary_key)
+        grouped: dict[Any, list] = {key: [] for key in keys}
+        for row in rows:
+            grouped[tuple(row[:n])].append(dict(zip(self.paths, row[n:])))
+        return grouped
+
+    def build_value(self, values: list) -> Any:
+        return values[0] if values else {}
+
+
+class ComputedLoader(BatchLoader):
+    """
+    Computes the computed fields (SQL expressions of hybrid properties) of many rows with one IN
+    query on their primary keys, for rows loaded without them (e.g. related rows). Rows of root
+    queries have them computed in the same SELECT (see "Loaders.store_computed").
+    """
+
+    serialized = False
+
+    def __init__(self, loaders: "Loaders", cls, names: tuple[str, ...], session):
+        super().__init__(loaders, session)
+        self.cls = cls
+        self.names = names
+
+    def build_query(self, keys: list) -> Select:
+        computed = self.loaders.context["computed"][self.cls]
+        in_list = self.loaders.context["in_list"]
+
+        pk = [getattr(self.cls, key) for key in primary_key_fields(inspect(self.cls))]
+        return select(*pk, *[computed[name] for name in self.names]).where(
+            primary_key_in(self.cls, keys, in_list)
+        )
+
+    def limit(self, query: Select) -> Select:
+        # Values of rows already in the response (one row per key at most)
+        return query
+
+    def group(self, rows, keys: list) -> dict[Any, list]:
+        n = len(inspect(self.cls).primary_key)
+        grouped: dict[Any, list] = {key: [] for key in keys}
+        for row in rows:
+            grouped[tuple(row[:n])].append(dict(zip(self.names, row[n:])))
+        return grouped
+
+    def build_value(self, values: list) -> Any:
+        return values[0] if values else {}
+
+
+def recursive_keys(rel) -> tuple[str, str]:
+    """
+    Attribute names of the referenced key & foreign key columns of a self-referential relationship.
+    """
+    ((local, remote),) = rel.local_remote_pairs
+    key, fk = (remote, local) if rel.direction is MANYTOONE else (local, remote)
+    return (
+        rel.parent.get_property_by_column(key).key,
+        rel.parent.get_property_by_column(fk).key,
+    )
+
+
+class RecursiveLoader(BatchLoader):
+    """
+    Loads the descendants (or ancestors) of many rows of a self-referential table with one
+    WITH RECURSIVE query, ordered by depth and grouped by row in one pass over the result.
+
+    Keys are the referenced key of a row (descendants) or its foreign key (ancestors).
+    """
+
+    def __init__(
+        self,
+        loaders: "Loaders",
+        rel,
+        ancestors: bool,
+        max_depth: int | None,
+        fields: dict,
+        session,
+    ):
+        super().__init__(loaders, session)
+        self.rel = rel
+        self.ancestors = ancestors
+        self.max_depth = max_depth
+        self.fields = fields
+
+    def build_query(self, keys: list) -> Select:
+        cls = self.rel.parent.class_
+        key_name, fk_name = recursive_keys(self.rel)
+        key, fk = getattr(cls, key_name), getattr(cls, fk_name)
+        in_list = self.loaders.context["in_list"]
+
+        # Rows are followed from the key of a row to its children's foreign key (descendants)
+        # or from the foreign key of a row to its parent's key (ancestors)
+        start, follow = (key, fk) if self.ancestors else (fk, key)
+        anchor = select(
+            start.label("root"),
+            follow.label("next"),
+            key.label("node"),
+            literal(1).label("depth"),
+        ).where(in_filter(start, keys, *in_list))
+        tree = anchor.cte("tree", recursive=True)
+
+        step = aliased(cls)
+        step_start = getattr(step, key_name if self.ancestors else fk_name)
+        step_follow = getattr(step, fk_name if self.ancestors else key_name)
+        recursive = select(
+            tree.c.root, step_follow, getattr(step, key_name), tree.c.depth + 1
+        ).where(step_start == tree.c.next)
+        if self.max_depth is not None:
+            recursive = recursive.where(tree.c.depth < self.max_depth)
+        tree = tree.union_all(recursive)
+
+        pk = [getattr(cls, name) for name in primary_key_fields(self.rel.parent)]
+        stmt = (
+            select(tree.c.root, cls)
+            .join(tree, key == tree.c.node)
+            .order_by(tree.c.root, tree.c.depth, *pk)
+        )
+
+        batch_relationships = self.loaders.batch_relationships
+        mapper = self.rel.parent
+        if cols := load_only_fields(mapper, self.fields, batch_relationships):
+            stmt = stmt.options(load_only(*[getattr(cls, col) for col in cols]))
+        if not batch_relationships:
+            stmt = stmt.options(*build_rels(cls, self.fields))
+
+        return stmt
+
+    def group(self, rows, keys: list) -> dict[Any, list]:
+        grouped: dict[Any, list] = {key: [] for key in keys}
+        for root, obj in rows.unique():
+            grouped[root].append(obj)
+        return grouped
+
+    def build_value(self, values: list) -> Any:
+        return values
+
+
+class EntityLoader(BatchLoader):
+    """
+    Loads rows of a cached table by primary key, from its entity cache where possible.
+    The rows loaded from the database are added to the cache (unless the session has
+    uncommitted changes).
+    """
+
+    def __init__(self, loaders: "Loaders", cache: EntityCache, fields: dict, session):
+        super().__init__(loaders, session)
+        self.cache = cache
+        self.fields = fields
+
+    def load_cached(self, keys: list) -> list:
+        hits = {}
+        for key in keys:
+            if (values := self.cache.get(key, self.fields)) is not None:
+                hits[key] = [values]
+
+        if hits:
+            values = [group[0] for group in hits.values()]
+            budget = self.loaders.context["budget"]
+            self.store(hits, serialize(values, self.fields, None, budget))
+
+        return [key for key in keys if key not in hits]
+
+    def build_query(self, keys: list) -> Select:
+        cls = self.cache.sqlalchemy_cls
+        cols = [getattr(cls, field) for field in self.cache.fields]
+        in_list = self.loaders.context["in_list"]
+        return (
+            select(cls)
+            .where(primary_key_in(cls, keys, in_list))
+            .options(load_only(*cols))
+        )
+
+    def group(self, rows, keys: list) -> dict[Any, list]:
+        cacheable = not has_uncommitted_changes(self.session)
+        grouped: dict[Any, list] = {key: [] for key in keys}
+        for (obj,) in rows:
+            if cacheable:
+                self.cache.set(identity(obj), obj)
+            grouped[identity(obj)].append(obj)
+        return grouped
+
+    def build_value(self, values: list) -> Any:
+        return values[0] if values else None
+
+
+class StitchedLoader(BatchLoader):
+    """
+    Loads a stitched relationship for many parent rows with one IN query on the remote key
+    (on the database of the target table).
+    """
+
+    def __init__(
+        self, loaders: "Loaders", stitched: StitchedRelationship, fields: dict, session
+    ):
+        super().__init__(loaders, session)
+        self.stitched = stitched
+        self.fields = fields
+
+    def build_query(self, keys: list) -> Select:
+        cls = self.stitched.target_cls
+        remote_key = getattr(cls, self.stitched.remote_key)
+        in_list = self.loaders.context["in_list"]
+        stmt = select(cls).where(in_filter(remote_key, keys, *in_list))
+
+        # The remote key is needed to group the rows
+        fields = {self.stitched.remote_key: True, **self.fields}
+        batch_relationships = self.loaders.batch_relationships
+        if cols := load_only_fields(inspect(cls), fields, batch_relationships):
+            stmt = stmt.options(load_only(*[getattr(cls, col) for col in cols]))
+        if not batch_relationships:
+            stmt = stmt.options(*build_rels(cls, self.fields))
+
+        return stmt
+
+    def group(self, rows, keys: list) -> dict[Any, list]:
+        grouped: dict[Any, list] = {key: [] for key in keys}
+        for obj in rows.unique().scalars():
+            grouped[getattr(obj, self.stitched.remote_key)].append(obj)
+        return grouped
+
+    def build_value(self, values: list) -> Any:
+        if self.stitched.uselist:
+            return values
+        return values[0] if values else None
+
+
+def core_columns(mapper, fields: dict) -> list:
+    """
+    Columns of a Core table to select for the selected fields.
+    All columns are selected when relationships are selected (so their keys are loaded).
+    """
+    keys = load_only_fields(mapper, fields, False) or list(mapper.columns.keys())
+    return [mapper.columns[key] for key in keys]
+
+
+class CoreStitchedLoader(StitchedLoader):
+    """
+    Loads a stitched relationship to a Core table for many parent rows with one Core IN query on
+    the remote key. Rows are serialized from their row mappings (no ORM objects are built).
+    """
+
+    serialized = False
+
+    def __init__(
+        self, loaders: "Loaders", stitched: StitchedRelationship, fields: dict, session
+    ):
+        super().__init__(loaders, stitched, whole_json_documents(fields), session)
+
+    def build_query(self, keys: list) -> Select:
+        mapper = inspect(self.stitched.target_cls)
+        remote_key = mapper.columns[self.stitched.remote_key]
+        in_list = self.loaders.context["in_list"]
+
+        fields = {self.stitched.remote_key: True, **self.fields}
+        return select(*core_columns(mapper, fields)).where(
+            in_filter(remote_key, keys, *in_list)
+        )
+
+    def group(self, rows, keys: list) -> dict[Any, list]:
+        rows = rows.mappings().all()
+        values = serialize_rows(
+            self.stitched.target_cls,
+            rows,
+            self.fields,
+            self.loaders,
+            self.loaders.context["budget"],
+        )
+
+        grouped: dict[Any, list] = {key: [] for key in keys}
+        for row, value in zip(rows, values):
+            grouped[row[self.stitched.remote_key]].append(value)
+        return grouped
+
+
+class Loaders:
+    """
+    Registry of the batch loaders used by a request.
+
+    Relationships are loaded from the session the parent rows were loaded from, stitched
+    relationships from a session opened (once per request) on the target table's database.
+    """
+
+    def __init__(self, session, context: dict[str, Any]):
+        self.session = session
+        self.context = context
+        self.is_async: bool = context["is_async"]
+        self.batch_relationships: bool = context["batch_relationships"]
+        self.loaders: dict[Any, BatchLoader] = {}
+        self.sessions: dict[Any, Any] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple, build) -> Any:
+        """
+        Get (or create) the loader for a key.
+        """
+        with self.lock:
+            if key not in self.loaders:
+                self.loaders[key] = build()
+
+        return self.loaders[key]
+
+    def relationship(self, rel, fields: dict, session=None) -> RelationshipLoader:
+        """
+        Get (or create) the loader for a relationship & selected fields.
+        """
+        session = self.session if session is None else session
+        return self.get(
+            (rel, json.dumps(fields, sort_keys=True, default=str), session),
+            lambda: RelationshipLoader(self, rel, fields, session),
+        )
+
+    def count(self, rel, filters: dict, session=None) -> CountLoader:
+        """
+        Get (or create) the loader counting a relationship with a filter.
+        """
+        session = self.session if session is None else session
+        return self.get(
+            ("count", rel, json.dumps(filters, sort_keys=True, default=str), session),
+            lambda: CountLoader(self, rel, filters, session),
+        )
+
+    def recursive(
+        self, rel, selection: RecursiveSelection, session=None
+    ) -> RecursiveLoader:
+        """
+        Get (or create) the loader for the descendants / ancestors of a recursive relationship.
+        """
+        session = self.session if session is None else session
+        fields = selection.fields
+        return self.get(
+            (
+                "recursive",
+                rel,
+                selection.ancestors,
+                selection.max_depth,
+                json.dumps(fields, sort_keys=True, default=str),
+                session,
+            ),
+            lambda: RecursiveLoader(
+                self, rel, selection.ancestors, selection.max_depth, fields, session
+            ),
+        )
+
+    def json_path(
+        self, mapper, column: str, paths: tuple[str, ...], session=None
+    ) -> JSONPathLoader:
+        """
+        Get (or create) the loader for the values at JSON paths of a column.
+        """
+        session = self.session if session is None else session
+        return self.get(
+            ("json", mapper, column, paths, session),
+            lambda: JSONPathLoader(self, mapper, column, paths, session),
+        )
+
+    def computed(self, cls, names: tuple[str, ...], session=None) -> ComputedLoader:
+        """
+        Get (or create) the loader for the computed fields of a table.
+        """
+        session = self.session if session is None else session
+        return self.get(
+            ("computed", cls, names, session),
+            lambda: ComputedLoader(self, cls, names, session),
+        )
+
+    def entity(self, cache: EntityCache, fields: dict, session=None) -> EntityLoader:
+        """
+        Get (or create) the loader for a cached table & selected fields.
+        """
+        session = self.session if session is None else session
+        return self.get(
+            (cache, json.dumps(fields, sort_keys=True, default=str), session),
+            lambda: EntityLoader(self, cache, fields, session),
+        )
+
+    def stitched(self, stitched: StitchedRelationship, fields: dict) -> StitchedLoader:
+        """
+        Get (or create) the loader for a stitched relationship & selected fields (loading rows of
+        Core tables as row mappings).
+        """
+        session = self.session_for(stitched.session_factory)
+        loader = (
+            CoreStitchedLoader
+            if stitched.target_cls in self.context["core"]
+            else StitchedLoader
+        )
+        return self.get(
+            (stitched, json.dumps(fields, sort_keys=True, default=str)),
+            lambda: loader(self, stitched, fields, session),
+        )
+
+    def session_for(self, session_factory) -> Any:
+        """
+        Session on the database of a session factory (opened on first use).
+        """
+        if session_factory is None:
+            return self.session
+
+        with self.lock:
+            if session_factory not in self.sessions:
+                self.sessions[session_factory] = session_factory()
+
+        return self.sessions[session_factory]
+
+    def session_of(self, obj) -> Any:
+        """
+        Session an ORM object was loaded from.
+        """
+        sync_session = object_session(obj)
+        for session in self.sessions.values():
+            if getattr(session, "sync_session", session) is sync_session:
+                return session
+        return self.session
+
+    def close(self):
+        """
+        Close the sessions opened by the request (sync).
+        """
+        for session in self.sessions.values():
+            session.close()
+
+    async def close_async(self):
+        """
+        Close the sessions opened by the request (async).
+        """
+        for session in self.sessions.values():
+            await session.close()
+
+    def defer_stitched(self, obj, name: str, fields: dict) -> Deferred | list | None:
+        """
+        Defer the loading of a stitched relationship of an ORM object to its batch loader.
+        """
+        stitched = self.context["stitched"][obj.__mapper__.class_][name]
+        return self.defer_key(stitched, getattr(obj, stitched.local_key), fields)
+
+    def defer_key(
+        self, stitched: StitchedRelationship, key: Any, fields: dict
+    ) -> Deferred | list | None:
+        """
+        Defer the loading of a stitched relationship of a local key value to its batch loader.
+        """
+        if key is None:
+            return [] if stitched.uselist else None
+        return self.stitched(stitched, fields).defer(key)
+
+    def defer_count(self, obj, name: str, count: CountSelection) -> Deferred:
+        """
+        Defer the count of a relationship of an ORM object to its batch loader.
+        """
+        rel = obj.__mapper__.relationships[name.removesuffix("_count")]
+        session = self.session_of(obj)
+        return self.count(rel, count.filter, session).defer(identity(obj))
+
+    def defer_recursive(self, obj, selection: RecursiveSelection) -> Deferred | list:
+        """
+        Defer the loading of the descendants / ancestors of an ORM object to its batch loader.
+        """
+        rel = obj.__mapper__.relationships[selection.relationship]
+        key_name, fk_name = recursive_keys(rel)
+
+        key = getattr(obj, fk_name if selection.ancestors else key_name)
+        if key is None:
+            return []
+        return self.recursive(rel, selection, self.session_of(obj)).defer(key)
+
+    def defer_json(self, obj, name: str, selection: JSONPathSelection) -> Any:
+        """
+        Defer the loading of the values at JSON paths of an ORM object to its batch loader.
+        Documents which are already loaded are returned as is (the values are extracted from them).
+        """
+        state = inspect(obj)
+        if name not in state.unloaded:
+            return state.dict[name]
+
+        loader = self.json_path(
+            state.mapper, name, selection.paths, self.session_of(obj)
+        )
+        return loader.defer(identity(obj))
+
+    def computed_names(self, cls, fields: dict) -> tuple[str, ...]:
+        """
+        Names of the selected computed fields of a table (in selection order).
+        """
+        computed = self.context["computed"][cls]
+        return tuple(
+            name
+            for name, val in fields.items()
+            if isinstance(val, ComputedSelection) and name in computed
+        )
+
+    def store_computed(self, cls, names: tuple[str, ...], rows: list) -> list:
+        """
+        Store the values of computed fields computed in the SELECT of a table's rows (ORM objects
+        followed by the values, see "build_sql_select_stmt"). Returns the ORM objects.
+        """
+        loader = self.computed(cls, names)
+        for obj, *values in rows:
+            loader.results[identity(obj)] = dict(zip(names, values))
+        return [row[0] for row in rows]
+
+    def defer_computed(self, obj, name: str, fields: dict) -> Any:
+        """
+        Defer the computing of a computed field of an ORM object to its batch loader.
+        Values computed in the SELECT of the object are returned as is.
+        """
+        cls = next(
+            mapper.class_
+            for mapper in inspect(obj).mapper.iterate_to_root()
+            if mapper.class_ in self.context["computed"]
+        )
+        key = identity(obj)
+        loader = self.computed(
+            cls, self.computed_names(cls, fields), self.session_of(obj)
+        )
+        if key in loader.results:
+            return loader.results[key][name]
+        return loader.defer(key)
+
+    def defer_relationship(self, obj, rel, fields: dict) -> Deferred | None:
+        """
+        Defer the loading of a relationship of an ORM object to its batch loader.
+
+        Many-to-one relationships to cached tables are loaded by foreign key from the entity
+        cache (when the foreign key of the object is loaded).
+        """
+        session = self.session_of(obj)
+        cache = self.context["caches"].get(rel.mapper.class_)
+
+        if cache is not None and cache.cacheable(fields):
+            state = inspect(obj)
+            keys = foreign_key_fields(rel)
+            if keys and not any(key in state.unloaded for key in keys):
+                fk = tuple(state.dict[key] for key in keys)
+                if None in fk:
+                    return None
+                return self.entity(cache, fields, session).defer(fk)
+
+        return self.relationship(rel, fields, session).defer(identity(obj))
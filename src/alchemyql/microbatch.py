@@ -0,0 +1,204 @@
+import asyncio
+import json
+import logging
+from enum import Enum
+
+from graphql import GraphQLResolveInfo
+from sqlalchemy import UniqueConstraint
+
+from .models import Table
+from .resolver import build_limit, build_sql_select_stmt
+from .timeout import async_deadline_scope
+
+log = logging.getLogger("alchemyql")
+
+
+class Batch:
+    """
+    Lookup values collected (across requests) for a single query.
+    """
+
+    def __init__(self):
+        self.values: dict = {}
+        self.requests = 0
+        self.task: asyncio.Future | None = None
+
+
+def unique_columns(mapper) -> set[str]:
+    """
+    Keys of the columns identifying at most 1 row: a single column primary key, or columns with
+    a single column unique constraint / index.
+    """
+    columns = []
+    if len(mapper.primary_key) == 1:
+        columns.append(mapper.primary_key[0])
+
+    table = mapper.local_table
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint) and len(constraint.columns) == 1:
+            columns += list(constraint.columns)
+    for index in table.indexes:
+        if index.unique and len(index.columns) == 1:
+            columns += list(index.columns)
+
+    return {
+        mapper.get_property_by_column(column).key
+        for column in columns
+        if column in mapper.columns.values()
+    }
+
+
+class MicroBatcher:
+    """
+    Collects the lookups of a table (eq / in filters on a primary key or unique column) made by
+    concurrent requests for a short window, then loads them all with a single IN query (async
+    only). Lookups of unique columns match at most 1 row per value, so the IN query is bounded by
+    the number of values.
+
+    Every request receives the rows matching its own values, with its own offset & limit applied
+    to them (the rows are ordered by the query, which is shared by requests with the same order).
+    Only requests running on sessions opened by the engine are batched, by database node: the IN
+    query runs on a short lived session the batcher opens on the node (sessions provided by the
+    caller are never shared with other requests).
+    """
+
+    def __init__(self, table: Table, window: float):
+        self.table = table
+        self.window = window
+        self.batches: dict[tuple, Batch] = {}
+        self.unique = unique_columns(table.inspected)
+
+    def batchable(self, info: GraphQLResolveInfo) -> bool:
+        """
+        Whether the lookups of a request can be batched (i.e. it runs on a session opened by the
+        engine).
+        """
+        return info.context["node"] is not None
+
+    def lookup(self, info: GraphQLResolveInfo, **kwargs) -> tuple[str, list] | None:
+        """
+        Column & values looked up by a root query (None if it cannot be micro batched).
+        """
+        filters = kwargs.get("filter", {})
+        if (
+            not self.batchable(info)
+            or len(filters) != 1
+            or kwargs.get("sample") is not None
+        ):
+            return None
+
+        column, operations = next(iter(filters.items()))
+        if list(operations) == ["eq"]:
+            values = [operations["eq"]]
+        elif list(operations) == ["in"]:
+            values = operations["in"]
+        else:
+            return None
+
+        # Rows are matched to requests by comparing values in python (of columns only)
+        if column not in self.unique:
+            return None
+
+        python_type = self.table.inspected.columns[column].type.python_type
+        if issubclass(python_type, Enum) or None in values:
+            return None
+
+        return column, values
+
+    async def run(self, key: tuple, batch: Batch, router, node, query_args: tuple):
+        """
+        Wait for the window to collect lookups, then load all collected values at once (on a
+        session opened on the database node).
+        Returns the names of the computed fields selected & the rows (ORM objects followed by the
+        computed values).
+        """
+        await asyncio.sleep(self.window)
+        del self.batches[key]
+
+        fields, column, order, load_relationships, in_list = query_args
+        log.debug(
+            "Micro batched %d lookups of %s into 1 query",
+            batch.requests,
+            self.table.graphql_name,
+        )
+
+        query = build_sql_select_stmt(
+            table=self.table,
+            fields={column: True, **fields},
+            filters={column: {"in": list(batch.values)}},
+            order=order,
+            load_relationships=load_relationships,
+            in_list=in_list,
+        )
+        async with router.open_async(node) as session:
+            res = await session.execute(query)
+            return tuple(res.keys())[1:], res.unique().all()
+
+    async def load(
+        self,
+        info: GraphQLResolveInfo,
+        fields: dict,
+        lookup: tuple[str, list],
+        paginate: bool = True,
+        **kwargs,
+    ) -> list:
+        """
+        Load the rows of a lookup, in a batch with the lookups of other requests (routed to the
+        same database node, selecting the same fields in the same order). Without "paginate", the
+        order, offset & limit are ignored.
+        """
+        column, values = lookup
+        order = kwargs.get("order", self.table.default_order) if paginate else None
+        load_relationships = not info.context["batch_relationships"]
+        node = info.context["node"]
+        key = (
+            asyncio.get_running_loop(),
+            node,
+            column,
+            json.dumps(fields, sort_keys=True, default=str),
+            json.dumps(order, default=str),
+            load_relationships,
+        )
+
+        batch = self.batches.get(key)
+        if batch is None:
+            batch = self.batches[key] = Batch()
+            batch.task = asyncio.ensure_future(
+                self.run(
+                    key,
+                    batch,
+                    info.context["router"],
+                    node,
+                    (
+                        fields,
+                        column,
+                        order,
+                        load_relationships,
+                        info.context["in_list"],
+                    ),
+                )
+            )
+        batch.requests += 1
+        batch.values.update(dict.fromkeys(values))
+
+        async with async_deadline_scope(
+            info.context["deadline"], cancel=info.context["partial_results"]
+        ):
+            names, rows = await asyncio.shield(batch.task)  # type: ignore
+
+        wanted = set(values)
+        rows = [row for row in rows if getattr(row[0], column) in wanted]
+        if names:
+            # Computed fields are stored for the batch loaders of the request
+            rows = info.context["loaders"].store_computed(
+                self.table.sqlalchemy_cls, names, rows
+            )
+        else:
+            rows = [row[0] for row in rows]
+
+        if not paginate:
+            return rows
+
+        offset = kwargs.get("offset", 0)
+        limit = build_limit(self.table, info, **kwargs)
+        return rows[offset : None if limit is None else offset + limit]
@@ -1,5 +1,14 @@
-from dataclasses import dataclass
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from enum import Enum, auto
+from typing import TYPE_CHECKING, Any, Callable
+
+from .cache import EntityCache
+
+if TYPE_CHECKING:
+    from .approximate import RowCountCache
+    from .microbatch import MicroBatcher
 
 
 class Order(Enum):
@@ -21,13 +30,29 @@ class Table:
     fields          : list[str]
     relationships   : list[str]
 
+    # Computed Fields (hybrid property name -> its SQL expression)
+    computed        : dict[str, Any]
+
+    # Relationship Counts (relationships exposing a "<name>_count" field)
+    counts          : list[str]
+
+    # Recursive Relationship (self-referential relationship exposing "descendants" & "ancestors")
+    recursive       : str | None
+
     # Filtering Details
     filter_fields   : list[str]
 
+    # Full Text Search Details (searchable columns, also exposing a "<name>_rank" ordering)
+    search_fields   : list[str]
+
     # Ordering Details
     order_fields    : list[str]
     default_order   : dict[str, Order] | None
 
+    # Time Bucketing Details (date / datetime columns rows are grouped by & numeric columns aggregated per bucket)
+    bucket_fields   : list[str]
+    aggregate_fields: list[str]
+
     # Pagination Details
     pagination      : bool
     default_limit   : int | None
@@ -35,5 +60,123 @@ class Table:
 
     # Querying Details
     query           : bool
+    pk_lookup       : bool
+
+    # Caching Details
+    cache           : EntityCache | None
+
+    # Sharding Details
+    shards          : dict[str, Callable] | None
+    shard_key       : str | None
+    shard_for       : Callable[[Any], str] | None
+
+    # Micro Batching Details (async only)
+    micro_batch     : "MicroBatcher | None" = None
+
+    # Row Count Details (exposing a "<name>s_count" query, with a cache of approximate counts)
+    row_count       : "RowCountCache | None" = None
+
+    # Sampling Details (list queries accept a "sample" percentage of rows)
+    sample          : bool = False
+
+    # Stitched Relationships (name -> relationship)
+    stitched        : dict[str, "StitchedRelationship"] = field(default_factory=dict)
+
+    # Registered Subclasses (of a table mapped with inheritance, exposed as implementations of its interface)
+    subclasses      : list[type] = field(default_factory=list)
+
+    # Core Table (loaded with Core selects as row mappings, no ORM objects are built)
+    core            : bool = False
+
+    # Foreign Key Relationships of a Core table (name -> relationship, stitched once the schema is built)
+    foreign_keys    : dict[str, "ForeignKeyRelationship"] = field(default_factory=dict)
 
     # fmt: on
+
+
+@dataclass(frozen=True)
+class StitchedRelationship:
+    """
+    Relationship between tables which are not related in SQLAlchemy (e.g. stored in different
+    databases), joined on a local key column matching a remote key column of the target table.
+    """
+
+    name: str
+    target_cls: type
+    local_key: str
+    remote_key: str
+    uselist: bool
+    # Factory of sessions on the target table's database (None to use the query's session)
+    session_factory: Callable | None
+
+
+@dataclass(frozen=True)
+class ForeignKeyRelationship:
+    """
+    Relationship of a Core table derived from a (single column) foreign key, to or from the
+    target table. It is loaded like a stitched relationship once the target table is registered.
+    """
+
+    name: str
+    target: Any
+    local_key: str
+    remote_key: str
+    uselist: bool
+
+
+@dataclass(frozen=True)
+class CountSelection:
+    """
+    Selection of a relationship count field (see "extract_selected_fields"), with its filter.
+    """
+
+    filter: dict
+
+
+@dataclass(frozen=True)
+class RecursiveSelection:
+    """
+    Selection of a "descendants" / "ancestors" field (see "extract_selected_fields"), with the
+    recursive relationship it follows and its maximum depth.
+    """
+
+    relationship: str
+    ancestors: bool
+    fields: dict
+    max_depth: int | None
+
+
+@dataclass(frozen=True)
+class JSONPathSelection:
+    """
+    Selection of values at paths of a JSON column (see "extract_selected_fields"), without
+    selecting the whole document.
+    """
+
+    paths: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class ComputedSelection:
+    """
+    Selection of a computed field (see "extract_selected_fields"), computed by the SQL expression
+    of its hybrid property.
+    """
+
+
+@dataclass
+class RequestStats:
+    """
+    Statistics collected while executing a single request.
+    """
+
+    # Time (in seconds) spent running synchronous work on the event loop (async only)
+    loop_blocking: float = 0.0
+
+    @contextmanager
+    def measure_blocking(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.loop_blocking += time.perf_counter() - start
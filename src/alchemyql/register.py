@@ -1,16 +1,32 @@
-from sqlalchemy import inspect
+from datetime import date, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable
 
+from sqlalchemy import Column, inspect
+from sqlalchemy.ext.hybrid import HybridExtensionType
+
+from .approximate import RowCountCache
+from .cache import CacheBackend, EntityCache, LRUCache
 from .errors import ConfigurationError
 from .filters import FILTERS
-from .models import Order, Table
+from .models import ForeignKeyRelationship, Order, StitchedRelationship, Table
+from .microbatch import MicroBatcher
+from .shard import hash_shard_for
+
+# Types sharded tables can be ordered by (compared by Python like the databases order them)
+SHARDED_ORDER_TYPES = (int, float, Decimal, date, time, timedelta)
 
 
-def validate_field(inspected, field_name: str):
+def validate_field(inspected, field_name: str, computed: dict[str, Any] | None = None):
     """
-    Validation to check the field exists in the sqlalchemy table.
+    Validation to check the field exists in the sqlalchemy table (or is a computed field).
 
     This will raise a ConfigurationError exception if the field does not exist.
     """
+    if computed and field_name in computed:
+        return computed[field_name]
+
     column = next((it for it in inspected.columns if field_name == it.key), None)
     if column is None:
         raise ConfigurationError(
@@ -48,13 +64,62 @@ def build_fields(
     return fields
 
 
-def validate_filter_fields(inspected, field_list: list[str]):
+def build_computed_fields(
+    inspected, field_list: list[str] | None, shards: dict[str, Callable] | None
+) -> dict[str, Any]:
+    """
+    Validates the hybrid properties requested as computed fields have a typed SQL expression.
+    Returns the computed field name -> SQL expression map (the mapped class is not modified, the
+    expressions are added to the SELECT of the queries selecting them).
+    """
+    if not field_list:
+        return {}
+
+    if shards is not None:
+        raise ConfigurationError("Computed fields are not supported for sharded tables")
+
+    computed = {}
+    for field in field_list:
+        descriptor = inspected.all_orm_descriptors.get(field)
+        if getattr(descriptor, "extension_type", None) is not (
+            HybridExtensionType.HYBRID_PROPERTY
+        ):
+            raise ConfigurationError(
+                f"Computed field {field} is not a hybrid property of {inspected.class_.__name__}"
+            )
+
+        expression = getattr(inspected.class_, field).expression
+        try:
+            expression.type.python_type
+        except NotImplementedError:
+            raise ConfigurationError(
+                f"Computed field {field} has no SQL type (its expression must be typed)"
+            )
+
+        computed[field] = expression
+
+    return computed
+
+
+def validate_filter_fields(
+    inspected,
+    field_list: list[str],
+    relationship_list: list[str] | None,
+    computed: dict[str, Any] | None = None,
+):
     """
     Validates the fields requested for filtering are valid.
-    This checks they exist and the type is supported.
+    This checks they exist and the type is supported (or they are exposed relationships).
     """
     for field in field_list:
-        col = validate_field(inspected, field)
+        if field in inspected.relationships:
+            if field not in (relationship_list or []):
+                raise ConfigurationError(
+                    f"Relationship {field} must be exposed to be filtered on"
+                )
+            continue
+
+        col = validate_field(inspected, field, computed)
 
         if col.type.python_type not in FILTERS and not any(
             issubclass(col.type.python_type, it) for it in FILTERS
@@ -64,15 +129,112 @@ def validate_filter_fields(inspected, field_list: list[str]):
             )
 
 
+def validate_search_fields(
+    inspected, field_list: list[str], shards: dict[str, Callable] | None
+):
+    """
+    Validates the fields requested for full text search are string columns (and their
+    "<name>_rank" orderings do not clash with columns).
+    """
+    if field_list and shards is not None:
+        raise ConfigurationError("Search fields are not supported for sharded tables")
+
+    for field in field_list:
+        col = validate_field(inspected, field)
+
+        if not isinstance(col, Column):
+            raise ConfigurationError(
+                f"Field {field} is not a table column, it cannot be searched"
+            )
+
+        if not issubclass(col.type.python_type, str):
+            raise ConfigurationError(
+                f"Column {field}'s data type of {col.type.python_type} is not supported for searching!"
+            )
+
+        if f"{field}_rank" in inspected.columns:
+            raise ConfigurationError(
+                f"Field {field}_rank already exists for {inspected.class_.__name__}"
+            )
+
+
+def validate_bucket_fields(
+    inspected,
+    bucket_fields: list[str],
+    aggregate_fields: list[str],
+    computed: dict[str, Any],
+    shards: dict[str, Callable] | None,
+):
+    """
+    Validates the fields requested for time bucketed aggregation: bucket fields are date /
+    datetime columns, aggregate fields are numeric (and require bucket fields).
+    """
+    if aggregate_fields and not bucket_fields:
+        raise ConfigurationError("Aggregate fields require bucket fields")
+
+    if bucket_fields and shards is not None:
+        raise ConfigurationError("Bucket fields are not supported for sharded tables")
+
+    bucket_types = set()
+    for field in bucket_fields:
+        col = validate_field(inspected, field, computed)
+
+        if not issubclass(col.type.python_type, date):
+            raise ConfigurationError(
+                f"Column {field}'s data type of {col.type.python_type} is not supported for bucketing!"
+            )
+        bucket_types.add(col.type.python_type)
+
+    # Buckets have the type of their field
+    if len(bucket_types) > 1:
+        raise ConfigurationError("Bucket fields must all be dates or all be datetimes")
+
+    for field in aggregate_fields:
+        col = validate_field(inspected, field, computed)
+        if col.type.python_type not in (int, float):
+            raise ConfigurationError(
+                f"Column {field}'s data type of {col.type.python_type} is not supported for aggregating!"
+            )
+
+
+def validate_sampling(inspected, sample: bool):
+    """
+    Validates a table can be sampled (its primary key is a single integer column, so ranges of
+    primary keys can be sampled).
+    """
+    if not sample:
+        return
+
+    pk = inspected.primary_key
+    if len(pk) != 1 or pk[0].type.python_type is not int:
+        raise ConfigurationError(
+            f"Sampling requires a single integer primary key column (table={inspected.class_.__name__})"
+        )
+
+
 def validate_order_fields(
-    inspected, field_list: list[str], default: dict[str, Order] | None
+    inspected,
+    field_list: list[str],
+    default: dict[str, Order] | None,
+    computed: dict[str, Any] | None = None,
+    shards: dict[str, Callable] | None = None,
 ):
     """
     Validates the fields requested for ordering and the default order is valid.
-    This checks they exist.
+    This checks they exist (and, for sharded tables, that rows of the shards can be merged in
+    the order of the databases).
     """
     for field in field_list:
-        validate_field(inspected, field)
+        col = validate_field(inspected, field, computed)
+
+        # Strings are ordered by the collation of the database, enums by their definition
+        if shards is not None and (
+            issubclass(col.type.python_type, Enum)
+            or not issubclass(col.type.python_type, SHARDED_ORDER_TYPES)
+        ):
+            raise ConfigurationError(
+                f"Column {field}'s data type of {col.type.python_type} is not supported for ordering sharded tables!"
+            )
 
     if default and any(field not in field_list for field in default):
         raise ConfigurationError(
@@ -106,6 +268,20 @@ def validate_paginated_fields(enabled: bool, default: int | None, max: int | Non
         )
 
 
+def validate_json_fields(inspected, fields: list[str], computed: dict[str, Any]):
+    """
+    Validates the "<name>_path" fields of the JSON columns exposed do not clash with other fields.
+    """
+    for field in fields:
+        if inspected.columns[field].type.python_type not in (dict, list):
+            continue
+
+        if f"{field}_path" in inspected.attrs or f"{field}_path" in computed:
+            raise ConfigurationError(
+                f"Field {field}_path already exists for {inspected.class_.__name__}"
+            )
+
+
 def validate_relationships(inspected, relationship_list: list[str] | None):
     """
     Validates the requested relationships to be exposed are valid.
@@ -123,6 +299,149 @@ def validate_relationships(inspected, relationship_list: list[str] | None):
             )
 
 
+def validate_relationship_counts(
+    inspected,
+    count_list: list[str] | None,
+    relationship_list: list[str] | None,
+    shards: dict[str, Callable] | None,
+):
+    """
+    Validates the relationships requested to be counted are exposed list relationships
+    (and their count field does not clash with a column).
+    """
+    # We do not need to validate if no relationship counts requested
+    if not count_list:
+        return
+
+    if shards is not None:
+        raise ConfigurationError(
+            "Relationship counts are not supported for sharded tables"
+        )
+
+    for rel in count_list:
+        if rel not in (relationship_list or []):
+            raise ConfigurationError(
+                f"Relationship {rel} must be exposed to be counted"
+            )
+
+        if not inspected.relationships[rel].uselist:
+            raise ConfigurationError(
+                f"Relationship {rel} cannot be counted, it is not a list relationship"
+            )
+
+        if f"{rel}_count" in inspected.columns:
+            raise ConfigurationError(
+                f"Field {rel}_count already exists for {inspected.class_.__name__}"
+            )
+
+
+def validate_recursive_relationship(
+    inspected, name: str | None, shards: dict[str, Callable] | None
+):
+    """
+    Validates the recursive relationship is a self-referential relationship on a single
+    foreign key (and its "descendants" & "ancestors" fields do not clash with columns).
+    """
+    # We do not need to validate if no recursive relationship requested
+    if name is None:
+        return
+
+    if shards is not None:
+        raise ConfigurationError(
+            "Recursive relationships are not supported for sharded tables"
+        )
+
+    rel = inspected.relationships.get(name)
+    if rel is None:
+        raise ConfigurationError(
+            f"Requested relationship {name} does not exist for {inspected.class_.__name__}"
+        )
+
+    if (
+        rel.mapper is not inspected
+        or rel.secondary is not None
+        or len(rel.local_remote_pairs) != 1
+    ):
+        raise ConfigurationError(
+            f"Relationship {name} cannot be recursive, it is not self-referential on a single foreign key"
+        )
+
+    for field in ["descendants", "ancestors"]:
+        if field in inspected.columns:
+            raise ConfigurationError(
+                f"Field {field} already exists for {inspected.class_.__name__}"
+            )
+
+
+def build_cache(
+    sqlalchemy_cls,
+    fields: list[str],
+    enabled: bool,
+    size: int,
+    ttl: float | None,
+    backend: CacheBackend | None,
+) -> EntityCache | None:
+    """
+    Build the entity cache of a table (if enabled).
+    This validates the cache settings make sense (basic sanity checks).
+    """
+    if not enabled:
+        return None
+
+    if size < 1:
+        raise ConfigurationError(f"Cache size must be a positive number (value={size})")
+
+    if ttl is not None and ttl <= 0:
+        raise ConfigurationError(f"Cache TTL must be a positive number (value={ttl})")
+
+    return EntityCache(sqlalchemy_cls, fields, backend or LRUCache(size), ttl)
+
+
+def validate_sharding(
+    inspected,
+    shards: dict[str, Callable] | None,
+    shard_key: str | None,
+    shard_for: Callable | None,
+    pk_lookup: bool,
+):
+    """
+    Validates the sharding settings make sense (basic sanity checks).
+    """
+    if shards is None:
+        if shard_key or shard_for:
+            raise ConfigurationError("Shard key requires a shard map (shards)")
+        return
+
+    if not shards:
+        raise ConfigurationError("Shard map must contain at least 1 shard")
+
+    if shard_key:
+        validate_field(inspected, shard_key)
+    elif shard_for:
+        raise ConfigurationError("Shard function requires a shard key")
+
+    if pk_lookup:
+        raise ConfigurationError(
+            "Primary key lookups are not supported for sharded tables"
+        )
+
+
+def validate_micro_batching(window: float | None, shards: dict | None):
+    """
+    Validates the micro batching settings make sense (basic sanity checks).
+    """
+    if window is None:
+        return
+
+    if window <= 0:
+        raise ConfigurationError(
+            f"Micro batch window must be a positive number (value={window})"
+        )
+
+    if shards is not None:
+        raise ConfigurationError("Micro batching is not supported for sharded tables")
+
+
 def register_transform(
     sqlalchemy_cls,
     graphql_name: str | None,
@@ -130,13 +449,30 @@ def register_transform(
     query: bool,
     include_fields: list[str] | None,
     exclude_fields: list[str] | None,
+    computed_fields: list[str] | None,
     relationships: list[str] | None,
+    relationship_counts: list[str] | None,
+    recursive: str | None,
     filter_fields: list[str] | None,
+    search_fields: list[str] | None,
     order_fields: list[str] | None,
     default_order: dict[str, Order] | None,
+    bucket_fields: list[str] | None,
+    aggregate_fields: list[str] | None,
     pagination: bool,
     default_limit: int | None,
     max_limit: int | None,
+    pk_lookup: bool,
+    row_count: bool,
+    sample: bool,
+    cache: bool,
+    cache_size: int,
+    cache_ttl: float | None,
+    cache_backend: CacheBackend | None,
+    shards: dict[str, Callable] | None,
+    shard_key: str | None,
+    shard_for: Callable[[Any], str] | None,
+    micro_batch_window: float | None,
 ) -> Table:
     """
     Take the user inputs and convert it to a AlchemyQL table
@@ -144,19 +480,39 @@ def register_transform(
     inspected = inspect(sqlalchemy_cls)
 
     fields = build_fields(inspected, include_fields, exclude_fields)
+    computed = build_computed_fields(inspected, computed_fields, shards)
+    validate_json_fields(inspected, fields, computed)
     validate_relationships(inspected, relationships)
+    validate_relationship_counts(inspected, relationship_counts, relationships, shards)
+    validate_recursive_relationship(inspected, recursive, shards)
+    validate_sharding(inspected, shards, shard_key, shard_for, pk_lookup)
+    validate_micro_batching(micro_batch_window, shards)
 
     if query:
-        validate_filter_fields(inspected, filter_fields or [])
-        validate_order_fields(inspected, order_fields or [], default_order)
+        validate_filter_fields(inspected, filter_fields or [], relationships, computed)
+        validate_search_fields(inspected, search_fields or [], shards)
+        validate_order_fields(
+            inspected, order_fields or [], default_order, computed, shards
+        )
+        validate_bucket_fields(
+            inspected, bucket_fields or [], aggregate_fields or [], computed, shards
+        )
         validate_paginated_fields(pagination, default_limit, max_limit)
+        validate_sampling(inspected, sample)
     else:
         filter_fields = []
+        search_fields = []
         order_fields = []
         default_order = None
+        bucket_fields = []
+        aggregate_fields = []
         pagination = False
         default_limit = None
         max_limit = None
+        pk_lookup = False
+        row_count = False
+        sample = False
+        micro_batch_window = None
 
     # Perform initial transformation
     table = Table(
@@ -165,14 +521,209 @@ def register_transform(
         graphql_name=(graphql_name or sqlalchemy_cls.__tablename__).lower(),
         description=description or sqlalchemy_cls.__tablename__,
         fields=fields,
+        computed=computed,
         relationships=relationships or [],
-        filter_fields=filter_fields or [],
+        counts=relationship_counts or [],
+        recursive=recursive,
+        filter_fields=list(
+            dict.fromkeys([*(filter_fields or []), *(search_fields or [])])
+        ),
+        search_fields=search_fields or [],
         order_fields=order_fields or [],
         default_order=default_order,
+        bucket_fields=bucket_fields or [],
+        aggregate_fields=aggregate_fields or [],
         pagination=pagination,
         default_limit=default_limit,
         max_limit=max_limit,
         query=query,
+        pk_lookup=pk_lookup,
+        cache=build_cache(
+            sqlalchemy_cls,
+            fields,
+            cache,
+            cache_size,
+            cache_ttl,
+            cache_backend,
+        ),
+        shards=shards,
+        shard_key=shard_key,
+        shard_for=(shard_for or hash_shard_for(list(shards))) if shard_key else None,
+        row_count=RowCountCache(sqlalchemy_cls) if row_count else None,
+        sample=sample,
     )
 
+    if micro_batch_window is not None:
+        table.micro_batch = MicroBatcher(table, micro_batch_window)
+
     return table
+
+
+def build_stitched_relationship(
+    table: Table,
+    name: str,
+    target_cls,
+    local_key: str,
+    remote_key: str,
+    uselist: bool,
+    session_factory: Callable | None,
+) -> StitchedRelationship:
+    """
+    Validates & builds a stitched relationship of a registered table.
+
+    NOTE: This does not check that the target table is also registered, this happens during schema generation.
+    """
+    if (
+        name in table.fields
+        or name in table.inspected.relationships
+        or name in table.stitched
+    ):
+        raise ConfigurationError(
+            f"Field {name} already exists for {table.sqlalchemy_cls.__name__}"
+        )
+
+    if table.shards:
+        raise ConfigurationError(
+            "Stitched relationships are not supported for sharded tables"
+        )
+
+    validate_field(table.inspected, local_key)
+    validate_field(inspect(target_cls), remote_key)
+
+    return StitchedRelationship(
+        name=name,
+        target_cls=target_cls,
+        local_key=local_key,
+        remote_key=remote_key,
+        uselist=uselist,
+        session_factory=session_factory,
+    )
+
+
+def foreign_key_relationships(sql_table) -> dict[str, list[ForeignKeyRelationship]]:
+    """
+    Relationships derivable from the (single column) foreign keys of a Core table, named after
+    the related table (lowercase):
+     - many-to-one - foreign keys of the table
+     - one-to-many - foreign keys of other tables (of the same metadata) referencing the table
+    """
+    available: dict[str, list[ForeignKeyRelationship]] = {}
+
+    def add(target, local_key: str, remote_key: str, uselist: bool):
+        name = target.name.lower()
+        available.setdefault(name, []).append(
+            ForeignKeyRelationship(name, target, local_key, remote_key, uselist)
+        )
+
+    for constraint in sql_table.foreign_key_constraints:
+        if len(constraint.elements) == 1:
+            fk = constraint.elements[0]
+            add(fk.column.table, fk.parent.key, fk.column.key, False)
+
+    for other in sql_table.metadata.tables.values():
+        for constraint in other.foreign_key_constraints:
+            if len(constraint.elements) != 1:
+                continue
+            fk = constraint.elements[0]
+            if fk.column.table is sql_table:
+                add(other, fk.column.key, fk.parent.key, True)
+
+    return available
+
+
+def build_foreign_key_relationships(
+    table: Table, sql_table, relationship_list: list[str] | None
+) -> dict[str, ForeignKeyRelationship]:
+    """
+    Validates & builds the foreign key relationships requested for a Core table.
+
+    NOTE: This does not check that the target table is also registered, this happens when the foreign keys are stitched.
+    """
+    available = foreign_key_relationships(sql_table)
+
+    relationships = {}
+    for name in relationship_list or []:
+        if name not in available:
+            raise ConfigurationError(
+                f"Requested relationship {name} does not exist for {sql_table.name}"
+            )
+
+        if len(available[name]) > 1:
+            raise ConfigurationError(
+                f"Relationship {name} of {sql_table.name} is ambiguous (multiple foreign keys)"
+            )
+
+        if name in table.fields:
+            raise ConfigurationError(
+                f"Field {name} already exists for {sql_table.name}"
+            )
+
+        relationships[name] = available[name][0]
+
+    return relationships
+
+
+def stitch_foreign_keys(tables: list[Table]):
+    """
+    Build the stitched relationships of the foreign key relationships of Core tables, targeting
+    the registered table (Core or ORM mapped) of the related table.
+    """
+    by_table = {t.inspected.local_table: t.sqlalchemy_cls for t in tables}
+
+    for table in tables:
+        for name, fk in table.foreign_keys.items():
+            if fk.target not in by_table:
+                raise ConfigurationError(
+                    f"Relationship target table has not been registered (relationship={name})"
+                )
+
+            table.stitched[name] = StitchedRelationship(
+                name=name,
+                target_cls=by_table[fk.target],
+                local_key=fk.local_key,
+                remote_key=fk.remote_key,
+                uselist=fk.uselist,
+                session_factory=None,
+            )
+
+
+def link_polymorphic_tables(tables: list[Table]):
+    """
+    Link the registered subclasses of tables mapped with inheritance (joined or single table) to
+    the registered table at the root of their hierarchy.
+
+    This validates the hierarchy can be loaded polymorphically (i.e. has a discriminator column).
+    """
+    registered = {t.sqlalchemy_cls: t for t in tables}
+    for table in tables:
+        table.subclasses = []
+
+    for table in tables:
+        ancestors = [
+            mapper.class_
+            for mapper in table.inspected.iterate_to_root()
+            if mapper is not table.inspected and mapper.class_ in registered
+        ]
+        if ancestors:
+            registered[ancestors[-1]].subclasses.append(table.sqlalchemy_cls)
+
+    for table in tables:
+        if table.subclasses and discriminator_field(table.inspected) is None:
+            raise ConfigurationError(
+                f"Table {table.sqlalchemy_cls.__name__} has registered subclasses but no discriminator column (polymorphic_on)"
+            )
+
+
+def discriminator_field(mapper) -> str | None:
+    """
+    Attribute name of the discriminator column (polymorphic_on) of a mapper, if it is mapped.
+    """
+    return next(
+        (
+            prop.key
+            for prop in mapper.column_attrs
+            if mapper.polymorphic_on is not None
+            and any(col is mapper.polymorphic_on for col in prop.columns)
+        ),
+        None,
+    )
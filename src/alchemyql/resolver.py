@@ -1,96 +1,276 @@
-from enum import Enum
+import asyncio
+import json
+from dataclasses import replace
 from typing import Any
 
-from sqlalchemy import Select, desc, select
-from sqlalchemy.orm import joinedload, load_only
-
+from graphql import (
+    FieldNode,
+    GraphQLInterfaceType,
+    GraphQLObjectType,
+    GraphQLResolveInfo,
+    get_named_type,
+)
+from graphql.execution.collect_fields import collect_fields, collect_sub_fields
+from graphql.execution.values import get_argument_values
+from sqlalchemy import Select, desc, inspect, select
+from sqlalchemy.orm import load_only, with_polymorphic
+
+from .cache import has_uncommitted_changes
 from .errors import QueryExecutionError
-from .models import Table
-
-
-def serialize(obj, selected_fields):
-    """
-    Serialize ORM objects to graphql response format.
-    """
-    # Handle lists / tuples
-    if isinstance(obj, (list, tuple)):
-        return [serialize(o, selected_fields) for o in obj]
-
-    # ORM object
-    if hasattr(obj, "__mapper__"):
-        data = {}
-        mapper = obj.__mapper__
-        for field, subfields in selected_fields.items():
-            if field in mapper.columns:
-                val = getattr(obj, field)
-                # Convert enum if column value is enum
-                data[field] = val.name if isinstance(val, Enum) else val
-            elif field in mapper.relationships:
-                rel_obj = getattr(obj, field)
-                if isinstance(rel_obj, list):
-                    data[field] = [serialize(r, subfields) for r in rel_obj]
-                else:
-                    data[field] = serialize(rel_obj, subfields)
-        return data
+from .filters import build_filter_conditions
+from .jsonpath import extract_json_path, parse_json_path
+from .loader import (
+    Deferred,
+    build_rels,
+    core_columns,
+    identity,
+    load_only_fields,
+    primary_key_fields,
+    primary_key_in,
+    whole_json_documents,
+)
+from .models import (
+    ComputedSelection,
+    CountSelection,
+    JSONPathSelection,
+    RecursiveSelection,
+    Table,
+)
+from .sampling import SampleRows
+from .search import SearchRank
+from .serializer import (
+    polymorphic_field,
+    serialize,
+    serialize_async,
+    serialize_rows,
+)
+from .timeout import async_deadline_scope, deadline_scope
+
+
+def merge_selected_fields(left: dict, right: dict) -> dict:
+    """
+    Merge two selected field dictionaries (as built by "extract_selected_fields").
+    Relationships selected more than once (e.g. via aliases or fragments) have their sub fields combined.
+    """
+    merged = dict(left)
+    for name, subfields in right.items():
+        current = merged.get(name)
+        if isinstance(subfields, dict) and isinstance(current, dict):
+            merged[name] = merge_selected_fields(current, subfields)
+        elif (
+            isinstance(subfields, RecursiveSelection)
+            and isinstance(current, RecursiveSelection)
+            and current.max_depth == subfields.max_depth
+        ):
+            fields = merge_selected_fields(current.fields, subfields.fields)
+            merged[name] = replace(subfields, fields=fields)
+        elif isinstance(subfields, JSONPathSelection):
+            if isinstance(current, JSONPathSelection):
+                paths = tuple(sorted({*current.paths, *subfields.paths}))
+                merged[name] = JSONPathSelection(paths)
+            elif current is None:
+                merged[name] = subfields
+            # Otherwise the whole document is selected (the values are extracted from it)
+        elif isinstance(subfields, (CountSelection, RecursiveSelection)) and (
+            current is not None and current != subfields
+        ):
+            raise QueryExecutionError(
+                f"Field {name} cannot be selected with different arguments"
+            )
+        else:
+            merged[name] = subfields
+    return merged
+
+
+def build_recursive_selection(
+    recursive: tuple[str, bool], fields: dict, **kwargs
+) -> RecursiveSelection:
+    """
+    Build the selection of a "descendants" / "ancestors" field (validating its max depth).
+    """
+    max_depth = kwargs.get("max_depth")
+    if max_depth is not None and max_depth < 1:
+        raise QueryExecutionError(
+            f"Provided Max Depth is not positive (Value: {max_depth}, Min: 1)"
+        )
+
+    relationship, ancestors = recursive
+    return RecursiveSelection(relationship, ancestors, fields, max_depth)
+
+
+def build_json_path_selection(
+    info: GraphQLResolveInfo, field_def, nodes: list[FieldNode]
+) -> JSONPathSelection:
+    """
+    Build the selection of a JSON path field (the value at a path of a JSON column).
+    """
+    args = get_argument_values(field_def, nodes[0], info.variable_values)
+    path = args["path"]
+
+    parse_json_path(path)
+    return JSONPathSelection((path,))
 
 
 def extract_selected_fields(
-    selection_set, max_depth: int | None, depth: int = 1
+    info: GraphQLResolveInfo,
+    field_nodes: list[FieldNode],
+    return_type: GraphQLObjectType | GraphQLInterfaceType,
+    max_depth: int | None,
+    depth: int = 1,
 ) -> dict:
     """
     Recursively extract selected fields from GraphQL AST.
-    Builds nested dictionary of fields where key is the field name and value is True (if column), dict (if relationship)
+    Builds nested dictionary of fields where key is the field name and value is True (if column), dict (if relationship),
+    CountSelection (if relationship count), RecursiveSelection (if descendants / ancestors) or
+    JSONPathSelection (if JSON column only selected at paths) or ComputedSelection (if computed field).
+
+    Named fragments, inline fragments and @include / @skip directives are expanded, and selections
+    of the same field under different aliases are merged so each table is loaded once.
+    Interfaces (of tables with registered subclasses) select the fields of every implementation.
     """
     if max_depth and depth > max_depth:
         raise QueryExecutionError(f"Max query depth exceeded ({max_depth=})")
 
-    result = {}
+    if isinstance(return_type, GraphQLInterfaceType):
+        # Fields selected for any implementation (& the discriminator to resolve the type by)
+        result = {return_type.extensions["discriminator"]: True}
+        for object_type in info.schema.get_possible_types(return_type):
+            result = merge_selected_fields(
+                result,
+                extract_selected_fields(
+                    info, field_nodes, object_type, max_depth, depth
+                ),
+            )
+        return result
+
+    result: dict = {}
 
-    for sel in selection_set.selections:
-        name = sel.name.value
-        if sel.selection_set:
-            result[name] = extract_selected_fields(
-                sel.selection_set, max_depth, depth + 1
+    sub_fields = collect_sub_fields(
+        info.schema, info.fragments, info.variable_values, return_type, field_nodes
+    )
+    for nodes in sub_fields.values():
+        name = nodes[0].name.value
+
+        # Meta fields are resolved by graphql itself
+        if name.startswith("__"):
+            continue
+
+        field_def = return_type.fields[name]
+        if nodes[0].selection_set:
+            field_type = get_named_type(field_def.type)
+            subfields = extract_selected_fields(
+                info, nodes, field_type, max_depth, depth + 1
+            )
+            if recursive := field_def.extensions.get("recursive"):
+                args = get_argument_values(field_def, nodes[0], info.variable_values)
+                subfields = build_recursive_selection(recursive, subfields, **args)
+            result = merge_selected_fields(result, {name: subfields})
+        elif field_def.extensions.get("relationship_count"):
+            args = get_argument_values(field_def, nodes[0], info.variable_values)
+            count = CountSelection(args.get("filter") or {})
+            result = merge_selected_fields(result, {name: count})
+        elif column := field_def.extensions.get("json"):
+            result = merge_selected_fields(
+                result, {column: build_json_path_selection(info, field_def, nodes)}
             )
+        elif field_def.extensions.get("computed"):
+            result[name] = ComputedSelection()
         else:
             result[name] = True
 
     return result
 
 
-def build_rels(sqlalchemy_cls, fields: dict):
+def extract_root_selected_fields(
+    info: GraphQLResolveInfo, max_depth: int | None, **kwargs
+) -> dict:
     """
-    Recursively build joinedload options for nested relationships.
-    This uses the input field list format from "extract_selected_fields"
+    Extract the selected fields for a root query field.
+
+    All root fields (aliases) querying the same table with identical arguments are merged, so
+    that a single SQL query can serve all of them.
     """
-    joins = []
-    for field_name, subfields in fields.items():
-        if isinstance(subfields, dict):
-            # Relationship attribute
-            rel = getattr(sqlalchemy_cls, field_name)
+    root_fields = collect_fields(
+        info.schema,
+        info.fragments,
+        info.variable_values,
+        info.parent_type,
+        info.operation.selection_set,
+    )
+    field_def = info.parent_type.fields[info.field_name]
+
+    field_nodes = [
+        node
+        for nodes in root_fields.values()
+        if nodes[0].name.value == info.field_name
+        and get_argument_values(field_def, nodes[0], info.variable_values) == kwargs
+        for node in nodes
+    ]
+
+    return extract_selected_fields(
+        info, field_nodes, get_named_type(info.return_type), max_depth
+    )
+
 
-            # Relationship SQLAlchemy class
-            rel_cls = rel.prop.mapper.class_
+def shared_result_key(info: GraphQLResolveInfo, **kwargs) -> str:
+    """
+    Key identifying a root query field & its arguments within a request.
+    """
+    return f"{info.field_name}:{json.dumps(kwargs, sort_keys=True, default=str)}"
+
+
+def is_desc(direction) -> bool:
+    """
+    Whether an ordering direction is descending.
+    """
+    return str(direction).upper() == "DESC"
 
-            join = joinedload(rel)
 
-            # Columns to load for this relationship
-            if cols := [
-                getattr(rel_cls, col) for col, v in subfields.items() if v is True
-            ]:
-                join = join.load_only(*cols)
+def build_search_rank(table: Table, name: str, filters: dict[str, Any]) -> SearchRank:
+    """
+    Build the relevance of rows to the search filter of a search field (ordered by "<name>_rank").
+    """
+    field = name.removesuffix("_rank")
+    query = filters.get(field, {}).get("search")
+    if query is None:
+        raise QueryExecutionError(
+            f"Ordering by {name} requires a search filter on {field}"
+        )
+    return SearchRank(getattr(table.sqlalchemy_cls, field), query)
 
-            # Nested relationships to load
-            if nested_rels := {
-                rel_name: rel_fields
-                for rel_name, rel_fields in subfields.items()
-                if isinstance(rel_fields, dict)
-            }:
-                join = join.options(*build_rels(rel_cls, nested_rels))
 
-            joins.append(join)
+def polymorphic_targets(table: Table, fields: dict) -> tuple[Any, list[tuple]]:
+    """
+    Entity to select for the selected fields of a table & the fields loaded for each class.
 
-    return joins
+    Tables with registered subclasses select the subclasses whose own fields are selected
+    "with_polymorphic" (their tables are joined in the same query, or their columns selected for
+    single table inheritance), other subclasses are neither joined nor loaded.
+    """
+    own = {
+        name: val
+        for name, val in fields.items()
+        if not polymorphic_field(table.inspected, name)
+    }
+    subclasses = []
+    for subclass in table.subclasses:
+        mapper = inspect(subclass)
+        subclass_fields = {
+            name: val
+            for name, val in fields.items()
+            if name in mapper.attrs and name not in table.inspected.attrs
+        }
+        if subclass_fields:
+            subclasses.append((subclass, subclass_fields))
+
+    if not subclasses:
+        return table.sqlalchemy_cls, [(table.sqlalchemy_cls, own)]
+
+    entity = with_polymorphic(table.sqlalchemy_cls, [cls for cls, _ in subclasses])
+    return entity, [(entity, own)] + [
+        (getattr(entity, cls.__name__), subclass_fields)
+        for cls, subclass_fields in subclasses
+    ]
 
 
 def build_sql_select_stmt(
@@ -100,48 +280,59 @@ def build_sql_select_stmt(
     offset: int | None = None,
     limit: int | None = None,
     order: dict[str, Any] | None = None,
+    load_relationships: bool = True,
+    in_list: tuple[int | None, int] = (None, 1000),
+    sample: float | None = None,
+    nulls_first: bool = False,
 ) -> Select:
     """
     Build a SQLAlchemy Select statement based on GraphQL args.
+
+    Relationships are joined into the statement unless "load_relationships" is False
+    (i.e. they are loaded separately by batch loaders). Core tables select their columns only,
+    tables with registered subclasses only join the selected subclasses. IN filters with more values than the
+    "in_list" threshold are bound as large lists (with the given chunk size). With "sample", only a
+    random sample of that percentage of the rows is selected. With "nulls_first", NULLs are ordered
+    first in both directions (instead of the database's default). Selected computed fields are
+    computed in the SELECT (labeled columns following the entity, see "result_rows").
     """
     # Step 1 - Build SELECT & FROM clauses
-    cols = [
-        getattr(table.sqlalchemy_cls, name)
-        for name, val in fields.items()
-        if val is True
-    ]
-    rels = {name: val for name, val in fields.items() if isinstance(val, dict)}
-
-    stmt = select(table.sqlalchemy_cls)
-    stmt = stmt.options(load_only(*cols))
-    if rels:
-        stmt = stmt.options(*build_rels(table.sqlalchemy_cls, rels))
+    if table.core:
+        # Core tables select their columns (relationships are loaded by batch loaders)
+        stmt = select(*core_columns(table.inspected, fields))
+    else:
+        entity, targets = polymorphic_targets(table, fields)
+
+        stmt = select(entity)
+        for target, target_fields in targets:
+            cols = [
+                getattr(target, name)
+                for name in load_only_fields(
+                    inspect(target).mapper, target_fields, not load_relationships
+                )
+            ]
+            if cols:
+                stmt = stmt.options(load_only(*cols))
+            if load_relationships:
+                stmt = stmt.options(*build_rels(target, target_fields))
+
+        stmt = stmt.add_columns(
+            *[
+                table.computed[name].label(name)
+                for name, val in fields.items()
+                if isinstance(val, ComputedSelection) and name in table.computed
+            ]
+        )
 
     # Step 2 - Build WHERE clause
     if filters:
-        for col_name, operations in filters.items():
-            column = getattr(table.sqlalchemy_cls, col_name)
-            for op, val in operations.items():
-                if op == "eq":
-                    stmt = stmt.where(column == val)
-                elif op == "ne":
-                    stmt = stmt.where(column != val)
-                elif op == "lt":
-                    stmt = stmt.where(column < val)
-                elif op == "le":
-                    stmt = stmt.where(column <= val)
-                elif op == "gt":
-                    stmt = stmt.where(column > val)
-                elif op == "ge":
-                    stmt = stmt.where(column >= val)
-                elif op == "contains":
-                    stmt = stmt.where(column.contains(val))
-                elif op == "in":
-                    stmt = stmt.where(column.in_(val))
-                elif op == "startswith":
-                    stmt = stmt.where(column.startswith(val))
-                elif op == "endswith":
-                    stmt = stmt.where(column.endswith(val))
+        stmt = stmt.where(
+            *build_filter_conditions(table.sqlalchemy_cls, filters, in_list)
+        )
+
+    if sample is not None:
+        [pk] = primary_key_fields(table.inspected)
+        stmt = stmt.where(SampleRows(getattr(table.sqlalchemy_cls, pk), sample))
 
     # Step 3 - Build pagination clauses (OFFSET, LIMIT)
     if offset is not None:
@@ -153,9 +344,14 @@ def build_sql_select_stmt(
     # Step 4 - Build ORDER BY clause
     if order:
         for col_name, direction in order.items():
-            column = getattr(table.sqlalchemy_cls, col_name)
-            if str(direction).upper() == "DESC":
+            if col_name.removesuffix("_rank") in table.search_fields:
+                column = build_search_rank(table, col_name, filters or {})
+            else:
+                column = getattr(table.sqlalchemy_cls, col_name)
+            if is_desc(direction):
                 column = desc(column)
+            if nulls_first:
+                column = column.nulls_first()
             stmt = stmt.order_by(column)
     return stmt
 
@@ -176,63 +372,450 @@ def validations(table: Table, **kwargs):
             )
 
 
-def build_async_resolver(table: Table):
+def build_limit(table: Table, info: GraphQLResolveInfo, **kwargs) -> int | None:
     """
-    Resolver function for Async queries.
-    Returns a function that can be called at query execution to resolve query.
+    Limit to apply to a root query field.
+    Unbounded queries get the engine's automatic limit, and all limits are capped to the
+    request's remaining row budget.
     """
+    limit = kwargs.get("limit", table.default_limit)
 
-    async def resolver(root, info, **kwargs):
-        validations(table, **kwargs)
+    if limit is None:
+        limit = info.context["auto_limit"]
 
-        db_session = info.context["session"]
-        max_query_depth = info.context["max_query_depth"]
+    return info.context["budget"].cap_limit(limit)
+
+
+def build_query(table: Table, info: GraphQLResolveInfo, **kwargs):
+    """
+    Build the selected fields & SQL query for a root query field.
+    """
+    validations(table, **kwargs)
+
+    max_query_depth = info.context["max_query_depth"]
+    fields = extract_root_selected_fields(info, max_query_depth, **kwargs)
+    if table.core:
+        # Values at JSON paths are extracted from the documents of Core rows
+        fields = whole_json_documents(fields)
+
+    query = build_sql_select_stmt(
+        table=table,
+        fields=fields,
+        filters=kwargs.get("filter", {}),
+        offset=kwargs.get("offset", 0),
+        limit=build_limit(table, info, **kwargs),
+        order=kwargs.get("order", table.default_order),
+        load_relationships=not info.context["batch_relationships"],
+        in_list=info.context["in_list"],
+        sample=kwargs.get("sample"),
+    )
+
+    return fields, query
+
+
+def lookup_identities(table: Table, many: bool, **kwargs) -> list[tuple]:
+    """
+    Primary key identities requested by a lookup field (de-duplicated, in input order).
+    """
+    pk = primary_key_fields(table.inspected)
+
+    if not many:
+        return [tuple(kwargs[key] for key in pk)]
+
+    if len(pk) == 1:
+        identities = [(id,) for id in kwargs["ids"]]
+    else:
+        identities = [tuple(id[key] for key in pk) for id in kwargs["ids"]]
+    return list(dict.fromkeys(identities))
+
+
+def is_loaded(obj, fields: dict, relationships: bool) -> bool:
+    """
+    Whether all selected fields of an ORM object are already loaded (i.e. serializing it
+    does not emit SQL). Relationships are only checked if they are read from the object.
+    """
+    state = inspect(obj)
+    unloaded = state.unloaded
+
+    for name, subfields in fields.items():
+        if polymorphic_field(state.mapper, name):
+            # Field of another class of the hierarchy (not serialized for this object)
+            continue
+
+        if (
+            isinstance(subfields, dict) and name not in state.mapper.relationships
+        ) or isinstance(subfields, RecursiveSelection):
+            # Stitched relationship / recursive field (its keys may not be loaded)
+            return False
+
+        if isinstance(subfields, dict) and not relationships:
+            continue
+
+        if name in unloaded:
+            return False
+
+        if isinstance(subfields, dict):
+            value = state.dict[name]
+            values = value if isinstance(value, list) else [value]
+            if not all(is_loaded(v, subfields, True) for v in values if v is not None):
+                return False
+
+    return True
+
+
+def lookup_cache(table: Table, fields: dict):
+    """
+    Entity cache usable by a primary key lookup (None if the table is not cached or
+    the selected fields are not all cached).
+    """
+    if table.cache is not None and table.cache.cacheable(fields):
+        return table.cache
+    return None
 
-        selection = info.field_nodes[0].selection_set
-        fields = extract_selected_fields(selection, max_query_depth)
 
+def build_lookup(table: Table, info: GraphQLResolveInfo, many: bool, **kwargs):
+    """
+    Build the selected fields, requested identities & objects for a primary key lookup field.
+
+    Objects already held (& fully loaded) by the session's identity map are used directly, then
+    rows held by the table's entity cache. The SQL query (None if every row was found) only loads
+    the remaining identities.
+    """
+    max_query_depth = info.context["max_query_depth"]
+    fields = extract_root_selected_fields(info, max_query_depth, **kwargs)
+    if table.core:
+        fields = whole_json_documents(fields)
+    identities = lookup_identities(table, many, **kwargs)
+    load_relationships = not info.context["batch_relationships"]
+    cache = lookup_cache(table, fields)
+
+    identity_map = info.context["session"].identity_map
+    found = {}
+    for ident in identities:
+        obj = identity_map.get(table.inspected.identity_key_from_primary_key(ident))
+        if obj is not None and is_loaded(obj, fields, load_relationships):
+            found[ident] = obj
+        elif cache is not None and (values := cache.get(ident, fields)) is not None:
+            found[ident] = values
+
+    query = None
+    if missing := [ident for ident in identities if ident not in found]:
         query = build_sql_select_stmt(
             table=table,
-            fields=fields,
-            filters=kwargs.get("filter", {}),
-            offset=kwargs.get("offset", 0),
-            limit=kwargs.get("limit", table.default_limit),
-            order=kwargs.get("order", table.default_order),
+            fields=lookup_query_fields(table, fields),
+            load_relationships=load_relationships,
+        ).where(primary_key_in(table.sqlalchemy_cls, missing, info.context["in_list"]))
+
+    return fields, identities, found, query
+
+
+def lookup_query_fields(table: Table, fields: dict) -> dict:
+    """
+    Fields loaded by the SQL query of a primary key lookup.
+    Rows added to the cache must have all cached columns loaded.
+    """
+    if (cache := lookup_cache(table, fields)) is not None:
+        return {**dict.fromkeys(cache.fields, True), **fields}
+    return fields
+
+
+def micro_batch_lookup(
+    table: Table, info: GraphQLResolveInfo, found: dict, identities: list
+) -> tuple | None:
+    """
+    Primary key column & values left to load by a primary key lookup, if they can be micro
+    batched (tables with a single column primary key & micro batching enabled, on sessions
+    opened by the engine).
+    """
+    pk = primary_key_fields(table.inspected)
+    if (
+        table.micro_batch is None
+        or len(pk) != 1
+        or not table.micro_batch.batchable(info)
+    ):
+        return None
+    return pk[0], [ident[0] for ident in identities if ident not in found]
+
+
+def store_lookup(table: Table, fields: dict, found: dict, objs, session):
+    """
+    Store the objects (or Core rows) loaded by a primary key lookup (adding them to the entity
+    cache, unless the session loading them has uncommitted changes).
+    """
+    cache = lookup_cache(table, fields)
+    if cache is not None and has_uncommitted_changes(session):
+        cache = None
+    pk = primary_key_fields(table.inspected)
+
+    for obj in objs:
+        if table.core:
+            found[tuple(obj[key] for key in pk)] = obj
+            continue
+
+        found[identity(obj)] = obj
+        if cache is not None:
+            cache.set(identity(obj), obj)
+
+
+def result_rows(table: Table, res, loaders) -> list:
+    """
+    Rows of the result of a table's query: ORM objects, or row mappings for Core tables.
+    Computed fields selected with the objects are stored for their batch loader.
+    """
+    if table.core:
+        return res.mappings().all()
+    if len(res.keys()) == 1:
+        return res.unique().scalars().all()
+    return loaders.store_computed(
+        table.sqlalchemy_cls, tuple(res.keys())[1:], res.unique().all()
+    )
+
+
+def serialize_result(table: Table, rows: list, fields: dict, context: dict) -> list:
+    """
+    Serialize the rows of a table's query (sync).
+    """
+    if table.core:
+        return serialize_rows(
+            table.sqlalchemy_cls, rows, fields, context["loaders"], context["budget"]
         )
+    return serialize(rows, fields, context["loaders"], context["budget"])
+
+
+def core_class(table: Table) -> type | None:
+    """
+    Class of a Core table (whose rows are serialized as row mappings), None for ORM tables.
+    """
+    return table.sqlalchemy_cls if table.core else None
+
+
+def resolve_relationship(root, info: GraphQLResolveInfo):
+    """
+    Resolver for relationship fields.
+    Relationships deferred to a batch loader are loaded on first resolve.
+    """
+    value = root.get(info.field_name)
+
+    if isinstance(value, Deferred):
+        return value.resolve()
+    return value
+
+
+def resolve_loaded_value(value: Any, key: str) -> Any:
+    """
+    Value of a key of the values loaded by a batch loader (loaded on first resolve).
+    """
+    if value.loader.is_async:
+
+        async def load():
+            return (await value.resolve()).get(key)
+
+        return load()
+    return value.resolve().get(key)
+
+
+def resolve_computed(root, info: GraphQLResolveInfo):
+    """
+    Resolver for computed fields.
+    Values not computed in the SELECT of the row are computed by a batch loader on first resolve.
+    """
+    value = root.get(info.field_name)
+
+    if isinstance(value, Deferred):
+        return resolve_loaded_value(value, info.field_name)
+    return value
+
+
+def resolve_json(root, info: GraphQLResolveInfo, path: str):
+    """
+    Resolver for JSON path fields (the value at a path of a JSON column).
+    Values at a path are loaded by a batch loader on first resolve (or extracted from the whole
+    document, when it is also selected).
+    """
+    field_def = info.parent_type.fields[info.field_name]
+    value = root.get(field_def.extensions["json"])
+
+    if isinstance(value, Deferred):
+        return resolve_loaded_value(value, path)
+
+    return extract_json_path(value, path)
+
+
+def resolve_deferred(root, info: GraphQLResolveInfo, **kwargs):
+    """
+    Resolver for fields with arguments deferred to a batch loader (relationship counts,
+    descendants & ancestors). The arguments were applied when the field was deferred.
+    """
+    return resolve_relationship(root, info)
+
+
+def shared_async_resolver(execute):
+    """
+    Wrap an async root field execution so identical root fields (e.g. aliases) share a single execution.
+    """
+
+    async def resolver(root, info, **kwargs):
+        shared_results = info.context["shared_results"]
+        key = shared_result_key(info, **kwargs)
+
+        if key not in shared_results:
+            shared_results[key] = asyncio.ensure_future(execute(info, **kwargs))
+
+        return await shared_results[key]
+
+    return resolver
 
-        res = await db_session.execute(query)
 
-        return serialize(res.unique().scalars().all(), fields)
+def shared_sync_resolver(execute):
+    """
+    Wrap a sync root field execution so identical root fields (e.g. aliases) share a single execution.
+    """
+
+    def resolver(root, info, **kwargs):
+        shared_results = info.context["shared_results"]
+        key = shared_result_key(info, **kwargs)
+
+        if key not in shared_results:
+            shared_results[key] = execute(info, **kwargs)
+
+        return shared_results[key]
 
     return resolver
 
 
+def build_async_resolver(table: Table):
+    """
+    Resolver function for Async queries.
+    Returns a function that can be called at query execution to resolve query.
+    """
+
+    async def execute(info, **kwargs):
+        stats = info.context["stats"]
+
+        with stats.measure_blocking():
+            fields, query = build_query(table, info, **kwargs)
+
+        if table.micro_batch and (lookup := table.micro_batch.lookup(info, **kwargs)):
+            rows = await table.micro_batch.load(info, fields, lookup, **kwargs)
+        else:
+            db_session = info.context["session"]
+            async with async_deadline_scope(
+                info.context["deadline"], cancel=info.context["partial_results"]
+            ):
+                res = await db_session.execute(query)
+
+            with stats.measure_blocking():
+                rows = result_rows(table, res, info.context["loaders"])
+
+        data = await serialize_async(
+            rows, fields, info.context["loaders"], info.context, core_class(table)
+        )
+        info.context["budget"].consume_size(data)
+
+        return data
+
+    return shared_async_resolver(execute)
+
+
 def build_sync_resolver(table: Table):
     """
     Resolver function for Sync queries.
     Returns a function that can be called at query execution to resolve query.
     """
 
-    def resolver(root, info, **kwargs):
-        validations(table, **kwargs)
+    def execute(info, **kwargs):
+        fields, query = build_query(table, info, **kwargs)
 
         db_session = info.context["session"]
-        max_query_depth = info.context["max_query_depth"]
+        with deadline_scope(info.context["deadline"]):
+            res = db_session.execute(query)
+
+        data = serialize_result(
+            table,
+            result_rows(table, res, info.context["loaders"]),
+            fields,
+            info.context,
+        )
+        info.context["budget"].consume_size(data)
 
-        selection = info.field_nodes[0].selection_set
-        fields = extract_selected_fields(selection, max_query_depth)
+        return data
 
-        query = build_sql_select_stmt(
-            table=table,
-            fields=fields,
-            filters=kwargs.get("filter", {}),
-            offset=kwargs.get("offset", 0),
-            limit=kwargs.get("limit", table.default_limit),
-            order=kwargs.get("order", table.default_order),
+    return shared_sync_resolver(execute)
+
+
+def build_async_lookup_resolver(table: Table, many: bool):
+    """
+    Resolver function for Async primary key lookups (single row, or list of rows if "many").
+    Returns a function that can be called at query execution to resolve query.
+    """
+
+    async def execute(info, **kwargs):
+        stats = info.context["stats"]
+
+        with stats.measure_blocking():
+            fields, identities, found, query = build_lookup(table, info, many, **kwargs)
+
+        if query is not None and (
+            lookup := micro_batch_lookup(table, info, found, identities)
+        ):
+            rows = await table.micro_batch.load(  # type: ignore
+                info, lookup_query_fields(table, fields), lookup, paginate=False
+            )
+            store_lookup(table, fields, found, rows, info.context["session"])
+        elif query is not None:
+            async with async_deadline_scope(
+                info.context["deadline"], cancel=info.context["partial_results"]
+            ):
+                res = await info.context["session"].execute(query)
+
+            with stats.measure_blocking():
+                store_lookup(
+                    table,
+                    fields,
+                    found,
+                    result_rows(table, res, info.context["loaders"]),
+                    info.context["session"],
+                )
+
+        data = await serialize_async(
+            [found.get(ident) for ident in identities],
+            fields,
+            info.context["loaders"],
+            info.context,
+            core_class(table),
         )
+        info.context["budget"].consume_size(data)
 
-        res = db_session.execute(query)
+        return data if many else data[0]
 
-        return serialize(res.unique().scalars().all(), fields)
+    return shared_async_resolver(execute)
 
-    return resolver
+
+def build_sync_lookup_resolver(table: Table, many: bool):
+    """
+    Resolver function for Sync primary key lookups (single row, or list of rows if "many").
+    Returns a function that can be called at query execution to resolve query.
+    """
+
+    def execute(info, **kwargs):
+        fields, identities, found, query = build_lookup(table, info, many, **kwargs)
+
+        if query is not None:
+            with deadline_scope(info.context["deadline"]):
+                res = info.context["session"].execute(query)
+            store_lookup(
+                table,
+                fields,
+                found,
+                result_rows(table, res, info.context["loaders"]),
+                info.context["session"],
+            )
+
+        data = serialize_result(
+            table, [found.get(ident) for ident in identities], fields, info.context
+        )
+        info.context["budget"].consume_size(data)
+
+        return data if many else data[0]
+
+    return shared_sync_resolver(execute)
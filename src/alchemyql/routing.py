@@ -0,0 +1,316 @@
+import itertools
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import AsyncExitStack, ExitStack, asynccontextmanager, contextmanager
+from typing import Callable
+
+from graphql import ExecutionResult
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, DisconnectionError
+
+log = logging.getLogger("alchemyql")
+
+# Statements making a transaction read only (run at its start) & restoring the connection (at its end)
+READ_ONLY_STATEMENTS: dict[str, tuple[str, str | None]] = {
+    "postgresql": ("SET TRANSACTION READ ONLY", None),
+    "sqlite": ("PRAGMA query_only = ON", "PRAGMA query_only = OFF"),
+}
+
+
+def ping(session) -> bool:
+    """
+    Default health check of a database (any error marks the database as unhealthy).
+    """
+    session.execute(text("SELECT 1"))
+    return True
+
+
+def is_disconnect(err: BaseException | None) -> bool:
+    """
+    Whether an error is a connection level failure (the connection to the database was lost).
+    """
+    return isinstance(err, DisconnectionError) or (
+        isinstance(err, DBAPIError) and err.connection_invalidated
+    )
+
+
+@contextmanager
+def read_only_transaction(session, enabled: bool):
+    """
+    Run the transaction of a (sync) session as read only, where supported by the database
+    (PostgreSQL READ ONLY transaction, SQLite query_only).
+    """
+    begin, end = READ_ONLY_STATEMENTS.get(session.get_bind().dialect.name, (None, None))
+
+    if enabled and begin is not None:
+        session.execute(text(begin))
+    try:
+        yield
+    finally:
+        if enabled and end is not None:
+            session.execute(text(end))
+
+
+@asynccontextmanager
+async def async_read_only_transaction(session, enabled: bool):
+    """
+    Run the transaction of an async session as read only, where supported by the database
+    (PostgreSQL READ ONLY transaction, SQLite query_only).
+    """
+    begin, end = READ_ONLY_STATEMENTS.get(session.get_bind().dialect.name, (None, None))
+
+    if enabled and begin is not None:
+        await session.execute(text(begin))
+    try:
+        yield
+    finally:
+        if enabled and end is not None:
+            await session.execute(text(end))
+
+
+class DatabaseNode:
+    """
+    A database (primary or replica) queries can be routed to.
+    """
+
+    def __init__(self, name: str, session_factory: Callable):
+        self.name = name
+        self.session_factory = session_factory
+        self.healthy = True
+        self.checked_at: float | None = None
+        self.outstanding = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def track(self):
+        """
+        Count a request as outstanding on this database while it executes.
+        """
+        with self.lock:
+            self.outstanding += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.outstanding -= 1
+
+
+class RoutingPolicy(ABC):
+    """
+    Policy choosing which (healthy) replica a request is routed to.
+    """
+
+    @abstractmethod
+    def choose(self, replicas: list[DatabaseNode]) -> DatabaseNode:
+        """
+        Choose a replica (the list is never empty).
+        """
+
+
+class RoundRobin(RoutingPolicy):
+    """
+    Route requests to each replica in turn.
+    """
+
+    def __init__(self):
+        self.counter = itertools.count()
+
+    def choose(self, replicas: list[DatabaseNode]) -> DatabaseNode:
+        return replicas[next(self.counter) % len(replicas)]
+
+
+class LeastOutstanding(RoutingPolicy):
+    """
+    Route requests to the replica with the fewest requests currently executing.
+    """
+
+    def choose(self, replicas: list[DatabaseNode]) -> DatabaseNode:
+        return min(replicas, key=lambda replica: replica.outstanding)
+
+
+class Router:
+    """
+    Routes read requests to healthy replicas (falling back to the primary).
+
+    Replicas are health checked when first used and then at most once per interval, unhealthy
+    replicas are taken out of rotation until a later health check succeeds.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable | None,
+        replica_session_factories: list[Callable],
+        policy: RoutingPolicy,
+        health_check: Callable,
+        health_check_interval: float,
+        read_only: bool = False,
+    ):
+        self.primary = (
+            DatabaseNode("primary", session_factory) if session_factory else None
+        )
+        self.replicas = [
+            DatabaseNode(f"replica_{i}", factory)
+            for i, factory in enumerate(replica_session_factories)
+        ]
+        self.policy = policy
+        self.health_check = health_check
+        self.health_check_interval = health_check_interval
+        self.read_only = read_only
+
+    @property
+    def nodes(self) -> list[DatabaseNode]:
+        """
+        All databases (primary first).
+        """
+        return ([self.primary] if self.primary else []) + self.replicas
+
+    def due_for_check(self) -> list[DatabaseNode]:
+        """
+        Replicas whose last health check is older than the health check interval.
+        """
+        now = time.monotonic()
+        due = []
+        for replica in self.replicas:
+            with replica.lock:
+                checked_at = replica.checked_at
+                if checked_at is None or now - checked_at >= self.health_check_interval:
+                    # Claim the check so concurrent requests do not repeat it
+                    replica.checked_at = now
+                    due.append(replica)
+        return due
+
+    def set_health(self, replica: DatabaseNode, healthy: bool):
+        if replica.healthy != healthy:
+            log.debug(
+                "Replica %s is %s", replica.name, "healthy" if healthy else "unhealthy"
+            )
+        replica.healthy = healthy
+
+    def choose(self, read_your_writes: bool) -> DatabaseNode:
+        """
+        Choose the database a request is routed to.
+        """
+        healthy = [replica for replica in self.replicas if replica.healthy]
+
+        if self.primary and (read_your_writes or not healthy):
+            return self.primary
+        if not healthy:
+            # Without a primary, unhealthy replicas are still preferable to failing
+            healthy = self.replicas
+        return self.policy.choose(healthy)
+
+    def report(self, node: DatabaseNode, result: ExecutionResult):
+        """
+        Take a replica out of rotation when a request on it lost its connection to the database.
+
+        Errors of the query itself (e.g. statement timeouts or invalid casts) leave the replica in
+        rotation, so requests cannot take replicas out of rotation.
+        """
+        if node is self.primary:
+            return
+
+        if any(is_disconnect(err.original_error) for err in result.errors or []):
+            self.set_health(node, False)
+
+    def check_sync(self, replica: DatabaseNode):
+        try:
+            with replica.session_factory() as session:
+                healthy = bool(self.health_check(session))
+        except Exception as err:
+            log.debug("Health check of replica %s failed: %s", replica.name, err)
+            healthy = False
+        self.set_health(replica, healthy)
+
+    async def check_async(self, replica: DatabaseNode):
+        try:
+            async with replica.session_factory() as session:
+                healthy = bool(await session.run_sync(self.health_check))
+        except Exception as err:
+            log.debug("Health check of replica %s failed: %s", replica.name, err)
+            healthy = False
+        self.set_health(replica, healthy)
+
+    @contextmanager
+    def session(self, read_your_writes: bool):
+        """
+        Open a session on the database chosen for a request (sync).
+        """
+        for replica in self.due_for_check():
+            self.check_sync(replica)
+
+        node = self.choose(read_your_writes)
+        log.debug("Routing query to %s", node.name)
+
+        with self.open_sync(node) as session:
+            yield node, session
+
+    @asynccontextmanager
+    async def session_async(self, read_your_writes: bool):
+        """
+        Open a session on the database chosen for a request (async).
+        """
+        for replica in self.due_for_check():
+            await self.check_async(replica)
+
+        node = self.choose(read_your_writes)
+        log.debug("Routing query to %s", node.name)
+
+        async with self.open_async(node) as session:
+            yield node, session
+
+    @contextmanager
+    def open_sync(self, node: DatabaseNode):
+        """
+        Open a session on a database for a request (sync).
+        """
+        with node.track(), node.session_factory() as session:
+            with read_only_transaction(session, self.read_only):
+                yield session
+
+    @asynccontextmanager
+    async def open_async(self, node: DatabaseNode):
+        """
+        Open a session on a database for a request (async).
+        """
+        with node.track():
+            async with node.session_factory() as session:
+                async with async_read_only_transaction(session, self.read_only):
+                    yield session
+
+    def warm_sync(self, node: DatabaseNode, connections: int) -> bool:
+        """
+        Open (& return to the pool) connections to a database, returns whether it is healthy.
+        Failures on the primary are raised, failing replicas are taken out of rotation.
+        """
+        try:
+            with ExitStack() as stack:
+                for _ in range(connections):
+                    session = stack.enter_context(node.session_factory())
+                    session.connection()
+        except Exception as err:
+            if node is self.primary:
+                raise
+            log.debug("Warm up of replica %s failed: %s", node.name, err)
+            self.set_health(node, False)
+            return False
+        return True
+
+    async def warm_async(self, node: DatabaseNode, connections: int) -> bool:
+        """
+        Open (& return to the pool) connections to a database, returns whether it is healthy.
+        Failures on the primary are raised, failing replicas are taken out of rotation.
+        """
+        try:
+            async with AsyncExitStack() as stack:
+                for _ in range(connections):
+                    session = await stack.enter_async_context(node.session_factory())
+                    await session.connection()
+        except Exception as err:
+            if node is self.primary:
+                raise
+            log.debug("Warm up of replica %s failed: %s", node.name, err)
+            self.set_health(node, False)
+            return False
+        return True
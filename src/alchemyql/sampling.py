@@ -0,0 +1,56 @@
+import random
+
+from sqlalchemy import and_, func, literal, literal_column, select, tablesample
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import ColumnElement
+
+from .errors import QueryExecutionError
+
+
+class SampleRows(ColumnElement):
+    """
+    Condition selecting a sample of roughly "percent" % of the rows of a table, compiled for the
+    database:
+     - PostgreSQL - primary keys of a "TABLESAMPLE SYSTEM" of the table (random pages)
+     - Other databases - a random range of primary keys, spanning "percent" % of the primary
+       key range (read from the primary key index)
+    """
+
+    inherit_cache = False
+    _is_implicitly_boolean = True
+
+    def __init__(self, attribute, percent: float):
+        if not 0 < percent <= 100:
+            raise QueryExecutionError(
+                f"Provided Sample is out of bounds (Value: {percent}, Min: 0, Max: 100)"
+            )
+
+        self.column = attribute.expression
+        self.type = self.column.type
+        self.percent = percent
+        self.position = random.random()
+
+
+@compiles(SampleRows)
+def compile_key_range(element: SampleRows, compiler, **kw):
+    # Aliased, so the bounds are not correlated to the sampled query
+    keys = element.column.table.alias()
+    key = keys.c[element.column.name]
+    low = select(func.min(key)).scalar_subquery()
+    span = select(func.max(key) - func.min(key)).scalar_subquery()
+
+    fraction = element.percent / 100
+    start = low + span * literal(element.position * (1 - fraction))
+    end = start + span * literal(fraction)
+    return compiler.process(and_(element.column >= start, element.column <= end), **kw)
+
+
+@compiles(SampleRows, "postgresql")
+def compile_tablesample(element: SampleRows, compiler, **kw):
+    sampled = tablesample(
+        element.column.table,
+        func.system(literal_column(repr(float(element.percent)))),
+        name="sample",
+    )
+    keys = select(sampled.c[element.column.name])
+    return compiler.process(element.column.in_(keys), **kw)
@@ -86,6 +86,18 @@ class Order(Enum):
 OrderingEnumScalar = build_enum_scalar(Order)
 
 
+class Interval(Enum):
+    MINUTE = "MINUTE"
+    HOUR = "HOUR"
+    DAY = "DAY"
+    WEEK = "WEEK"
+    MONTH = "MONTH"
+    YEAR = "YEAR"
+
+
+IntervalEnumScalar = build_enum_scalar(Interval)
+
+
 def convert_to_scalar(column) -> GraphQLInputType:
     py_type = column.type.python_type
 
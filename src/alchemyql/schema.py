@@ -1,19 +1,45 @@
 from graphql import (
     GraphQLArgument,
+    GraphQLEnumType,
+    GraphQLEnumValue,
     GraphQLField,
     GraphQLInputField,
     GraphQLInputObjectType,
+    GraphQLInterfaceType,
     GraphQLList,
     GraphQLNonNull,
     GraphQLObjectType,
     GraphQLSchema,
 )
 
+from .approximate import build_async_count_resolver, build_sync_count_resolver
+from .buckets import build_async_bucket_resolver, build_sync_bucket_resolver
 from .errors import ConfigurationError
-from .filters import FILTERS
+from .filters import FILTERS, SearchFilter
 from .models import Table
-from .resolver import build_async_resolver, build_sync_resolver
-from .scalars import IntScalar, OrderingEnumScalar, convert_to_scalar
+from .loader import primary_key_fields
+from .register import discriminator_field
+from .resolver import (
+    build_async_lookup_resolver,
+    build_async_resolver,
+    build_sync_lookup_resolver,
+    build_sync_resolver,
+    resolve_relationship,
+    resolve_deferred,
+    resolve_computed,
+    resolve_json,
+)
+from .scalars import (
+    BoolScalar,
+    FloatScalar,
+    IntScalar,
+    IntervalEnumScalar,
+    JSONScalar,
+    OrderingEnumScalar,
+    StringScalar,
+    convert_to_scalar,
+)
+from .shard import build_async_sharded_resolver, build_sync_sharded_resolver
 
 
 def _validate_relationships(tables: list[Table], class_to_gql: dict):
@@ -30,10 +56,109 @@ def _validate_relationships(tables: list[Table], class_to_gql: dict):
                     f"Relationship target table has not been registered (relationship={rel})"
                 )
 
+        for stitched in table.stitched.values():
+            if stitched.target_cls not in class_to_gql:
+                raise ConfigurationError(
+                    f"Relationship target table has not been registered (relationship={stitched.name})"
+                )
+
+
+def _validate_sharded_relationships(tables: list[Table]):
+    """
+    Validate the (joined) relationships of sharded tables only reach tables whose fields are
+    all loaded by the shard query (computed fields, relationship counts, recursive & stitched
+    relationships are loaded by batch loaders, which sharded queries do not use).
+    """
+    registered = {t.sqlalchemy_cls: t for t in tables}
+
+    for table in tables:
+        if not table.shards:
+            continue
+
+        seen = {table.sqlalchemy_cls}
+        pending = [table]
+        while pending:
+            current = pending.pop()
+            for rel in current.inspected.relationships:
+                target_cls = rel.mapper.class_
+                if rel.key not in current.relationships or target_cls in seen:
+                    continue
+
+                seen.add(target_cls)
+                for target in [registered[target_cls]] + [
+                    registered[cls] for cls in registered[target_cls].subclasses
+                ]:
+                    if (
+                        target.computed
+                        or target.counts
+                        or target.recursive
+                        or target.stitched
+                    ):
+                        raise ConfigurationError(
+                            f"Relationship {rel.key} of sharded table {table.graphql_name} cannot target {target.graphql_name}, it has fields loaded by batch loaders"
+                        )
+                    pending.append(target)
+
+
+def _get_scalar(col, scalar_map: dict):
+    """
+    Get the graphql scalar for a column (reusing the scalar if already built).
+    """
+    py_type = col.type.python_type
+    if py_type not in scalar_map:
+        scalar_map[py_type] = convert_to_scalar(col)
+    return scalar_map[py_type]
+
 
-def _build_fields(table: Table, class_to_gql: dict, scalar_map: dict):
+def _build_lookup_fields(table: Table, base_object, scalar_map: dict, is_async: bool):
     """
-    Build the fields for a specified table. This includes columns and relationships.
+    Build the primary key lookup query fields for a table (single row & batch by ids).
+    """
+    pk_args = {
+        key: GraphQLArgument(
+            GraphQLNonNull(_get_scalar(table.inspected.columns[key], scalar_map))
+        )
+        for key in primary_key_fields(table.inspected)
+    }
+
+    # Single column keys are passed directly, composite keys as input objects
+    if len(pk_args) == 1:
+        id_type = next(iter(pk_args.values())).type
+    else:
+        id_type = GraphQLNonNull(
+            GraphQLInputObjectType(
+                name=f"{table.graphql_name}_pk",
+                fields={
+                    key: GraphQLInputField(arg.type) for key, arg in pk_args.items()
+                },
+            )
+        )
+
+    build_resolver = (
+        build_async_lookup_resolver if is_async else build_sync_lookup_resolver
+    )
+
+    return {
+        table.graphql_name: GraphQLField(
+            base_object, args=pk_args, resolve=build_resolver(table, False)
+        ),
+        table.graphql_name + "s_by_pk": GraphQLField(
+            GraphQLList(base_object),
+            args={"ids": GraphQLArgument(GraphQLNonNull(GraphQLList(id_type)))},
+            resolve=build_resolver(table, True),
+        ),
+    }
+
+
+def _build_fields(
+    table: Table, class_to_gql: dict, scalar_map: dict, filter_inputs: dict
+):
+    """
+    Build the fields for a specified table. This includes columns, (stitched) relationships,
+    relationship counts (filtered by the target table's filter) and descendants / ancestors.
+    JSON columns have a "<name>_path" field selecting the value at a path of the document (loaded
+    in SQL, nullable since the path may be missing).
+    Computed fields are loaded by their SQL expression (so are always nullable).
     """
     fields = {}
 
@@ -42,19 +167,30 @@ def _build_fields(table: Table, class_to_gql: dict, scalar_map: dict):
         if col.key not in table.fields:
             continue
 
-        # reuse scalar if already built
-        py_type = col.type.python_type
-        if py_type in scalar_map:
-            gql_type = scalar_map[py_type]
-        else:
-            gql_type = convert_to_scalar(col)
-            scalar_map[py_type] = gql_type
+        gql_type = _get_scalar(col, scalar_map)
 
-        if col.nullable:
+        if getattr(col, "nullable", True):
             fields[col.key] = GraphQLField(gql_type)  # type: ignore
         else:
             fields[col.key] = GraphQLField(GraphQLNonNull(gql_type))  # type: ignore
 
+        if gql_type is JSONScalar:
+            # Values at a path may be missing (so are always nullable)
+            fields[f"{col.key}_path"] = GraphQLField(
+                gql_type,  # type: ignore
+                args={"path": GraphQLArgument(GraphQLNonNull(StringScalar))},
+                resolve=resolve_json,
+                extensions={"json": col.key},
+            )
+
+    # Computed fields (hybrid properties)
+    for name, expression in table.computed.items():
+        fields[name] = GraphQLField(
+            _get_scalar(expression, scalar_map),  # type: ignore
+            resolve=resolve_computed,
+            extensions={"computed": True},
+        )
+
     # Table relationships
     for rel in table.inspected.relationships:
         if rel.key not in table.relationships:
@@ -62,17 +198,238 @@ def _build_fields(table: Table, class_to_gql: dict, scalar_map: dict):
 
         target_gql = class_to_gql[rel.mapper.class_]
         gql_rel_type = GraphQLList(target_gql) if rel.uselist else target_gql
-        fields[rel.key] = GraphQLField(gql_rel_type)
+        fields[rel.key] = GraphQLField(gql_rel_type, resolve=resolve_relationship)
+
+    # Relationship counts
+    for name in table.counts:
+        target_cls = table.inspected.relationships[name].mapper.class_
+        args = {}
+        if target_cls in filter_inputs:
+            args["filter"] = GraphQLArgument(filter_inputs[target_cls])
+
+        fields[f"{name}_count"] = GraphQLField(
+            GraphQLNonNull(IntScalar),
+            args=args,
+            resolve=resolve_deferred,
+            extensions={"relationship_count": True},
+        )
+
+    # Recursive relationship (descendants & ancestors, up to a maximum depth)
+    if table.recursive:
+        base_object = class_to_gql[table.sqlalchemy_cls]
+        for name, ancestors in [("descendants", False), ("ancestors", True)]:
+            fields[name] = GraphQLField(
+                GraphQLList(base_object),
+                args={"max_depth": GraphQLArgument(IntScalar)},
+                resolve=resolve_deferred,
+                extensions={"recursive": (table.recursive, ancestors)},
+            )
+
+    # Stitched relationships
+    for stitched in table.stitched.values():
+        target_gql = class_to_gql[stitched.target_cls]
+        gql_rel_type = GraphQLList(target_gql) if stitched.uselist else target_gql
+        fields[stitched.name] = GraphQLField(gql_rel_type, resolve=resolve_relationship)
 
     return fields
 
 
+def _build_column_filters(table: Table, scalar_map: dict, filter_map: dict) -> dict:
+    """
+    Build the filter input fields for the filterable columns (and computed fields) of a table.
+    """
+    columns = [(col.key, col) for col in table.inspected.columns] + list(
+        table.computed.items()
+    )
+
+    filter_fields = {}
+    for name, col in columns:
+        if name not in table.filter_fields:
+            continue
+
+        py_type = col.type.python_type
+
+        # full text searchable columns
+        if name in table.search_fields:
+            filter_fields[name] = SearchFilter
+            continue
+
+        # reuse filter input if already built
+        if py_type in filter_map:
+            gql_filter = filter_map[py_type]
+        else:
+            # pick FILTERS builder
+            if py_type in FILTERS:
+                key = py_type
+            else:
+                key = next(it for it in FILTERS.keys() if issubclass(py_type, it))
+
+            gql_filter = FILTERS[key](_get_scalar(col, scalar_map))  # type: ignore
+            filter_map[py_type] = gql_filter
+
+        filter_fields[name] = gql_filter
+
+    return filter_fields
+
+
+def _build_relationship_filters(table: Table, filter_inputs: dict) -> dict:
+    """
+    Build the filter input fields for the filterable relationships of a table.
+    Each relationship accepts the filter of its target table with some / every / none semantics.
+    """
+    filter_fields = {}
+    for rel in table.inspected.relationships:
+        if rel.key not in table.filter_fields:
+            continue
+
+        target_filter = filter_inputs[rel.mapper.class_]
+        filter_fields[rel.key] = GraphQLInputObjectType(
+            name=f"{table.graphql_name}_{rel.key}_filter",
+            fields={
+                "some": GraphQLInputField(target_filter),
+                "every": GraphQLInputField(target_filter),
+                "none": GraphQLInputField(target_filter),
+            },
+        )
+
+    return filter_fields
+
+
+def _build_filter_inputs(tables: list[Table], scalar_map: dict) -> dict:
+    """
+    Build the filter input of every table with filter fields (columns & relationships).
+    """
+    filter_map: dict[type, object] = {}
+    filter_inputs = {}
+
+    for table in tables:
+        if not table.filter_fields:
+            continue
+
+        column_filters = _build_column_filters(table, scalar_map, filter_map)
+        filter_inputs[table.sqlalchemy_cls] = GraphQLInputObjectType(
+            name=f"{table.graphql_name}_filter",
+            fields=lambda t=table, f=column_filters: {
+                **f,
+                **_build_relationship_filters(t, filter_inputs),
+            },
+        )
+
+    # Relationships can only be filtered on when their target table can be filtered
+    for table in tables:
+        for rel in table.inspected.relationships:
+            if (
+                rel.key in table.filter_fields
+                and rel.mapper.class_ not in filter_inputs
+            ):
+                raise ConfigurationError(
+                    f"Relationship target table has no filter fields (relationship={rel})"
+                )
+
+    return filter_inputs
+
+
+def _build_bucket_field(
+    table: Table, args: dict, scalar_map: dict, is_async: bool
+) -> GraphQLField:
+    """
+    Build the time bucket query field of a table: 1 row per time bucket of a bucket field (the
+    start of the bucket, the number of rows & the aggregates of the aggregate fields).
+    """
+
+    def scalar(name: str):
+        if name in table.computed:
+            return _get_scalar(table.computed[name], scalar_map)
+        return _get_scalar(table.inspected.columns[name], scalar_map)
+
+    fields = {
+        "bucket": GraphQLField(scalar(table.bucket_fields[0])),  # type: ignore
+        "count": GraphQLField(GraphQLNonNull(IntScalar)),
+    }
+    for name in table.aggregate_fields:
+        fields[f"{name}_sum"] = GraphQLField(scalar(name))  # type: ignore
+        fields[f"{name}_avg"] = GraphQLField(FloatScalar)  # type: ignore
+        fields[f"{name}_min"] = GraphQLField(scalar(name))  # type: ignore
+        fields[f"{name}_max"] = GraphQLField(scalar(name))  # type: ignore
+
+    bucket_object = GraphQLObjectType(
+        name=f"{table.graphql_name}_bucket", fields=lambda f=fields: f
+    )
+    bucket_field_enum = GraphQLEnumType(
+        name=f"{table.graphql_name}_bucket_field",
+        values={name: GraphQLEnumValue(name) for name in table.bucket_fields},
+    )
+
+    return GraphQLField(
+        GraphQLList(bucket_object),
+        args={
+            "by": GraphQLArgument(GraphQLNonNull(bucket_field_enum)),
+            "interval": GraphQLArgument(GraphQLNonNull(IntervalEnumScalar)),
+            **args,
+        },
+        resolve=build_async_bucket_resolver(table)
+        if is_async
+        else build_sync_bucket_resolver(table),
+    )
+
+
+def _build_interface_fields(objects: list[GraphQLObjectType]) -> dict:
+    """
+    Build the fields of the interface of a table hierarchy: the fields of the root table that
+    every implementation has (with the same type & arguments).
+    """
+
+    def signature(field: GraphQLField) -> tuple:
+        args = {name: str(arg.type) for name, arg in field.args.items()}
+        return str(field.type), args
+
+    root, *others = objects
+    return {
+        name: GraphQLField(field.type, args=field.args, extensions=field.extensions)
+        for name, field in root.fields.items()
+        if all(
+            name in other.fields and signature(other.fields[name]) == signature(field)
+            for other in others
+        )
+    }
+
+
+def _build_interface(table: Table, class_to_gql: dict) -> GraphQLInterfaceType:
+    """
+    Build the interface of a table with registered subclasses (implemented by the table & its
+    subclasses). Rows are resolved to the type of the closest registered class of their
+    polymorphic identity (the value of the discriminator column).
+    """
+    discriminator = discriminator_field(table.inspected)
+    objects = [class_to_gql[table.sqlalchemy_cls]] + [
+        class_to_gql[cls] for cls in table.subclasses
+    ]
+
+    def resolve_type(value, info, abstract_type):
+        mapper = table.inspected.polymorphic_map[value[discriminator]]
+        return next(
+            class_to_gql[m.class_].name
+            for m in mapper.iterate_to_root()
+            if m.class_ in class_to_gql
+        )
+
+    interface = GraphQLInterfaceType(
+        name=f"{table.graphql_name}_interface",
+        fields=lambda: _build_interface_fields(objects),
+        resolve_type=resolve_type,
+        description=table.description,
+        extensions={"discriminator": discriminator},
+    )
+    for obj in objects:
+        obj._interfaces = lambda: [interface]  # type: ignore
+    return interface
+
+
 def build_gql_schema(tables: list[Table], is_async: bool) -> GraphQLSchema:
     """
     Construct the graphql schema using the registered tables.
     """
     scalar_map: dict[type, object] = {}
-    filter_map: dict[type, object] = {}
 
     # Step 1 — create empty GraphQLObjectType shells
     gql_objects = {
@@ -87,55 +444,37 @@ def build_gql_schema(tables: list[Table], is_async: bool) -> GraphQLSchema:
         table.sqlalchemy_cls: gql_objects[table.graphql_name] for table in tables
     }
     _validate_relationships(tables, class_to_gql)
+    _validate_sharded_relationships(tables)
+
+    # Step 2 — build the interfaces of tables with registered subclasses (returned by their
+    # query fields, so rows of any subclass can be queried)
+    interfaces = {
+        table.graphql_name: _build_interface(table, class_to_gql)
+        for table in tables
+        if table.subclasses
+    }
+
+    # Step 3 — build filter inputs (relationship filters reference their target's input)
+    filter_inputs = _build_filter_inputs(tables, scalar_map)
 
-    # Step 2 — populate fields (columns + relationships)
+    # Step 4 — populate fields (columns + relationships)
     for table in tables:
         gql_objects[table.graphql_name]._fields = lambda t=table: _build_fields(  # type: ignore
-            t, class_to_gql, scalar_map
+            t, class_to_gql, scalar_map, filter_inputs
         )
 
-    # Step 3 — build query arguments with filters, pagination, ordering
+    # Step 5 — build query arguments with filters, pagination, ordering
     query_fields = {}
 
     for table in tables:
-        base_object = gql_objects[table.graphql_name]
-
-        filter_fields = {}
-        for col in table.inspected.columns:
-            if col.key not in table.filter_fields:
-                continue
-
-            py_type = col.type.python_type
-
-            # reuse filter input if already built
-            if py_type in filter_map:
-                gql_filter = filter_map[py_type]
-            else:
-                # pick FILTERS builder
-                if py_type in FILTERS:
-                    key = py_type
-                else:
-                    key = next(it for it in FILTERS.keys() if issubclass(py_type, it))
-
-                gql_type = scalar_map.get(py_type)
-                if gql_type is None:
-                    gql_type = convert_to_scalar(col)
-                    scalar_map[py_type] = gql_type
-
-                gql_filter = FILTERS[key](gql_type)  # type: ignore
-                filter_map[py_type] = gql_filter
-
-            filter_fields[col.key] = gql_filter
+        base_object = (
+            interfaces.get(table.graphql_name) or gql_objects[table.graphql_name]
+        )
 
         # Build query arguments
         args = {}
-        if filter_fields:
-            args["filter"] = GraphQLArgument(
-                GraphQLInputObjectType(
-                    name=f"{table.graphql_name}_filter",
-                    fields=lambda f=filter_fields: f,
-                )  # type: ignore
-            )
+        if table.sqlalchemy_cls in filter_inputs:
+            args["filter"] = GraphQLArgument(filter_inputs[table.sqlalchemy_cls])
 
         if table.pagination:
             args["limit"] = GraphQLArgument(
@@ -143,9 +482,11 @@ def build_gql_schema(tables: list[Table], is_async: bool) -> GraphQLSchema:
             )
             args["offset"] = GraphQLArgument(IntScalar, default_value=0)
 
-        if table.order_fields:
+        if table.order_fields or table.search_fields:
+            # Search fields are ordered by relevance to their search filter
             order_fields = {
-                f: GraphQLInputField(OrderingEnumScalar) for f in table.order_fields
+                f: GraphQLInputField(OrderingEnumScalar)
+                for f in table.order_fields + [f"{f}_rank" for f in table.search_fields]
             }
             args["order"] = GraphQLArgument(
                 GraphQLInputObjectType(
@@ -154,17 +495,78 @@ def build_gql_schema(tables: list[Table], is_async: bool) -> GraphQLSchema:
             )
 
         # Resolver
-        resolver = (
-            build_async_resolver(table) if is_async else build_sync_resolver(table)
-        )
+        if table.shards:
+            resolver = (
+                build_async_sharded_resolver(table)
+                if is_async
+                else build_sync_sharded_resolver(table)
+            )
+        else:
+            resolver = (
+                build_async_resolver(table) if is_async else build_sync_resolver(table)
+            )
 
-        # Final query field
+        # Final query field (sampled tables accept a percentage of rows to sample)
         if table.query:
+            list_args = {**args, "sample": GraphQLArgument(FloatScalar)}
             query_fields[table.graphql_name + "s"] = GraphQLField(
-                GraphQLList(base_object), args=args, resolve=resolver
+                GraphQLList(base_object),
+                args=list_args if table.sample else args,
+                resolve=resolver,
             )
 
-    # Step 4 — Build root query
+        # Row count query field
+        if table.row_count is not None:
+            name = table.graphql_name + "s_count"
+            if name in query_fields:
+                raise ConfigurationError(
+                    f"Query field {name} is already in use (table={table.graphql_name})"
+                )
+            count_args = {"filter": args["filter"]} if "filter" in args else {}
+            query_fields[name] = GraphQLField(
+                GraphQLNonNull(IntScalar),
+                args={
+                    **count_args,
+                    "approximate": GraphQLArgument(BoolScalar, default_value=False),
+                },
+                resolve=build_async_count_resolver(table)
+                if is_async
+                else build_sync_count_resolver(table),
+            )
+
+        # Time bucket query field
+        if table.bucket_fields:
+            name = table.graphql_name + "_buckets"
+            if name in query_fields:
+                raise ConfigurationError(
+                    f"Query field {name} is already in use (table={table.graphql_name})"
+                )
+            query_fields[name] = _build_bucket_field(
+                table,
+                {key: arg for key, arg in args.items() if key != "order"},
+                scalar_map,
+                is_async,
+            )
+
+        # Primary key lookup query fields
+        if table.pk_lookup:
+            for name, field in _build_lookup_fields(
+                table, base_object, scalar_map, is_async
+            ).items():
+                if name in query_fields:
+                    raise ConfigurationError(
+                        f"Query field {name} is already in use (table={table.graphql_name})"
+                    )
+                query_fields[name] = field
+
+    # Step 6 — Build root query
     query = GraphQLObjectType(name="Query", fields=lambda q=query_fields: q)
 
-    return GraphQLSchema(query=query)  # type: ignore
+    # Implementations of interfaces are only referenced by the interface
+    implementations = [
+        class_to_gql[cls]
+        for table in tables
+        for cls in [table.sqlalchemy_cls, *table.subclasses]
+        if table.subclasses
+    ]
+    return GraphQLSchema(query=query, types=implementations)  # type: ignore
@@ -0,0 +1,224 @@
+import re
+
+from sqlalchemy import (
+    Boolean,
+    Float,
+    bindparam,
+    column,
+    false,
+    func,
+    inspect,
+    literal,
+    literal_column,
+    select,
+    table,
+)
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import ColumnClause, ColumnElement
+
+from .errors import ConfigurationError
+
+# Text search configuration of PostgreSQL (unless set as "search_config" in the column's info)
+DEFAULT_SEARCH_CONFIG = "english"
+
+
+class FullTextSearch(ColumnElement):
+    """
+    Full text search of a column, compiled for the database:
+     - SQLite matches the column of the table's FTS5 index ("<table>_fts", an external content
+       table on the table's rowid, see "create_search_index")
+     - PostgreSQL matches "to_tsvector(column)" with "websearch_to_tsquery(:query)" (using its
+       GIN index, see "create_search_index")
+     - Other databases fall back to a LIKE filter ("column LIKE '%query%'")
+    """
+
+    inherit_cache = False
+
+    def __init__(self, attribute, query: str):
+        col = attribute.property.columns[0]
+        self.column = attribute.expression
+        self.name = col.name
+        self.fts_name = f"{col.table.name}_fts"
+        self.config = col.info.get("search_config", DEFAULT_SEARCH_CONFIG)
+        self.query = query
+
+    def rowid(self) -> ColumnClause:
+        """
+        Rowid of the (possibly aliased) table of the searched column (SQLite).
+        """
+        return ColumnClause("rowid", _selectable=self.column.table)
+
+    def fts5_matches(self, query: str):
+        """
+        Select the rowids of the rows matching a FTS5 query in the column's FTS5 index (SQLite).
+        """
+        fts = table(self.fts_name, column("rowid"), column(self.name))
+        return fts, select(fts.c.rowid).where(fts.c[self.name].match(query))
+
+    def ts_config(self):
+        """
+        Text search configuration, inlined so PostgreSQL can use the GIN index of the column.
+        """
+        return literal_column("'%s'::regconfig" % self.config.replace("'", "''"))
+
+
+class SearchMatch(FullTextSearch):
+    """
+    Whether a row matches a full text search (see "FullTextSearch").
+    """
+
+    inherit_cache = False
+    _is_implicitly_boolean = True
+    type = Boolean()
+
+
+class SearchRank(FullTextSearch):
+    """
+    Relevance of a row to a full text search (see "FullTextSearch"), higher is more relevant.
+    """
+
+    inherit_cache = False
+    type = Float()
+
+
+def fts5_query(text: str) -> str:
+    """
+    Convert a web search style query ("quoted phrases", or & -excluded terms) to a FTS5 query.
+    Every term is quoted, so any text is a valid query.
+    """
+    parts: list[str] = []
+    for token in re.findall(r'-?"[^"]*"?|\S+', text):
+        negate = token.startswith("-")
+        term = token.removeprefix("-").strip('"')
+
+        if not term.strip():
+            continue
+
+        if token.lower() == "or":
+            if parts and parts[-1] != "OR":
+                parts.append("OR")
+            continue
+
+        quoted = '"%s"' % term.replace('"', '""')
+        if not negate:
+            parts.append(quoted)
+        elif parts and parts[-1] != "OR":
+            # FTS5 only excludes terms from a preceding query
+            parts += ["NOT", quoted]
+
+    if parts and parts[-1] == "OR":
+        parts.pop()
+    return " ".join(parts)
+
+
+@compiles(SearchMatch)
+def compile_like(element: SearchMatch, compiler, **kw):
+    return compiler.process(element.column.contains(element.query), **kw)
+
+
+@compiles(SearchRank)
+def compile_no_rank(element: SearchRank, compiler, **kw):
+    return compiler.process(literal(0.0), **kw)
+
+
+@compiles(SearchMatch, "sqlite")
+def compile_fts5_match(element: SearchMatch, compiler, **kw):
+    if not (query := fts5_query(element.query)):
+        return compiler.process(false(), **kw)
+
+    _, matches = element.fts5_matches(query)
+    return compiler.process(element.rowid().in_(matches), **kw)
+
+
+@compiles(SearchRank, "sqlite")
+def compile_fts5_rank(element: SearchRank, compiler, **kw):
+    if not (query := fts5_query(element.query)):
+        return compiler.process(literal(0.0), **kw)
+
+    # bm25 is lower for more relevant rows
+    fts, matches = element.fts5_matches(query)
+    bm25 = func.bm25(literal_column(compiler.preparer.quote(element.fts_name)))
+    rank = (
+        matches.with_only_columns(-bm25)
+        .where(fts.c.rowid == element.rowid())
+        .scalar_subquery()
+    )
+    return compiler.process(rank, **kw)
+
+
+def ts_match(element: FullTextSearch) -> tuple:
+    vector = func.to_tsvector(element.ts_config(), element.column)
+    query = func.websearch_to_tsquery(
+        element.ts_config(), bindparam(None, element.query)
+    )
+    return vector, query
+
+
+@compiles(SearchMatch, "postgresql")
+def compile_tsvector_match(element: SearchMatch, compiler, **kw):
+    vector, query = ts_match(element)
+    return compiler.process(vector.bool_op("@@")(query), **kw)
+
+
+@compiles(SearchRank, "postgresql")
+def compile_tsvector_rank(element: SearchRank, compiler, **kw):
+    return compiler.process(func.ts_rank(*ts_match(element)), **kw)
+
+
+def search_index_statements(dialect, sqlalchemy_cls, fields: list[str]) -> list[str]:
+    """
+    SQL statements creating the full text search index of columns of a table.
+    """
+    quote = dialect.identifier_preparer.quote
+    columns = [inspect(sqlalchemy_cls).columns[field] for field in fields]
+    table_name = columns[0].table.name
+    names = [quote(col.name) for col in columns]
+
+    if dialect.name == "postgresql":
+        statements = []
+        for col, name in zip(columns, names):
+            index = quote(f"{table_name}_{col.name}_search")
+            config = col.info.get("search_config", DEFAULT_SEARCH_CONFIG)
+            statements.append(
+                f"CREATE INDEX IF NOT EXISTS {index} ON {quote(table_name)} "
+                f"USING gin (to_tsvector('{config}'::regconfig, {name}))"
+            )
+        return statements
+
+    if dialect.name != "sqlite":
+        raise ConfigurationError(
+            f"Search indexes are not supported for {dialect.name} databases"
+        )
+
+    fts = quote(f"{table_name}_fts")
+    cols = ", ".join(names)
+    new = ", ".join(f"new.{name}" for name in names)
+    old = ", ".join(f"old.{name}" for name in names)
+    delete = (
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old});"
+    )
+    insert = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, "
+        f"content='{table_name}', content_rowid='rowid')",
+        f"CREATE TRIGGER IF NOT EXISTS {quote(f'{table_name}_fts_insert')} "
+        f"AFTER INSERT ON {quote(table_name)} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {quote(f'{table_name}_fts_delete')} "
+        f"AFTER DELETE ON {quote(table_name)} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {quote(f'{table_name}_fts_update')} "
+        f"AFTER UPDATE ON {quote(table_name)} BEGIN {delete} {insert} END",
+        # Index the rows the table already contains
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_index(connection, sqlalchemy_cls, fields: list[str]):
+    """
+    Create the full text search index of columns of a table (if it does not exist):
+     - SQLite - FTS5 external content table, kept up to date by triggers on the table
+     - PostgreSQL - GIN index on "to_tsvector" of every column
+    """
+    for statement in search_index_statements(
+        connection.dialect, sqlalchemy_cls, fields
+    ):
+        connection.exec_driver_sql(statement)
@@ -0,0 +1,145 @@
+import asyncio
+from enum import Enum
+from functools import partial
+from typing import Any
+
+from .budget import Budget
+from .models import (
+    ComputedSelection,
+    CountSelection,
+    JSONPathSelection,
+    RecursiveSelection,
+)
+
+
+def polymorphic_field(mapper, name: str) -> bool:
+    """
+    Whether a field is an attribute of another class of the mapper's inheritance hierarchy
+    (i.e. of a subclass, selected through the interface of the hierarchy), not of the mapper.
+    """
+    return name not in mapper.attrs and any(
+        name in other.attrs for other in mapper.base_mapper.self_and_descendants
+    )
+
+
+def serialize(obj, selected_fields, loaders=None, budget: Budget | None = None):
+    """
+    Serialize ORM objects to graphql response format.
+
+    When loaders are provided, stitched relationships, relationship counts, recursive fields,
+    values at JSON paths & computed fields (and relationships, when batched) are not read from the ORM object but
+    deferred to request scoped batch loaders (see "loader.Loaders").
+    When a budget is provided, every serialized row is counted towards its row budget.
+    """
+    # Handle lists / tuples
+    if isinstance(obj, (list, tuple)):
+        if budget:
+            budget.consume_rows(len(obj))
+        return [serialize(o, selected_fields, loaders, budget) for o in obj]
+
+    # Cached row (column values from an entity cache)
+    if isinstance(obj, dict):
+        return {field: obj[field] for field in selected_fields}
+
+    # ORM object
+    if hasattr(obj, "__mapper__"):
+        data = {}
+        mapper = obj.__mapper__
+        for field, subfields in selected_fields.items():
+            if polymorphic_field(mapper, field):
+                # Field of another class of the hierarchy (not selected for this row)
+                continue
+
+            if loaders is not None and isinstance(subfields, JSONPathSelection):
+                # Values at JSON paths
+                data[field] = loaders.defer_json(obj, field, subfields)
+            elif loaders is not None and isinstance(subfields, ComputedSelection):
+                # Computed field (SQL expression of a hybrid property)
+                data[field] = loaders.defer_computed(obj, field, selected_fields)
+            elif field in mapper.columns:
+                val = getattr(obj, field)
+                # Convert enum if column value is enum
+                data[field] = val.name if isinstance(val, Enum) else val
+            elif field in mapper.relationships:
+                if loaders is not None and loaders.batch_relationships:
+                    data[field] = loaders.defer_relationship(
+                        obj, mapper.relationships[field], subfields
+                    )
+                    continue
+
+                rel_obj = getattr(obj, field)
+                if isinstance(rel_obj, list):
+                    data[field] = serialize(rel_obj, subfields, loaders, budget)
+                else:
+                    if budget and rel_obj is not None:
+                        budget.consume_rows(1)
+                    data[field] = serialize(rel_obj, subfields, loaders, budget)
+            elif loaders is not None and isinstance(subfields, CountSelection):
+                # Relationship count
+                data[field] = loaders.defer_count(obj, field, subfields)
+            elif loaders is not None and isinstance(subfields, RecursiveSelection):
+                # Descendants / ancestors of a recursive relationship
+                data[field] = loaders.defer_recursive(obj, subfields)
+            elif loaders is not None:
+                # Stitched relationship
+                data[field] = loaders.defer_stitched(obj, field, subfields)
+        return data
+
+
+def serialize_rows(
+    sqlalchemy_cls, rows: list, selected_fields, loaders, budget: Budget | None = None
+) -> list:
+    """
+    Serialize the rows of a Core table (row mappings, None if missing) to graphql response format.
+
+    Relationships (derived from foreign keys) are deferred to the batch loaders of the stitched
+    relationships of the table.
+    """
+    if budget:
+        budget.consume_rows(len(rows))
+
+    stitched = loaders.context["stitched"].get(sqlalchemy_cls, {})
+
+    data: list = []
+    for row in rows:
+        if row is None:
+            data.append(None)
+            continue
+
+        values = {}
+        for field, subfields in selected_fields.items():
+            if field in stitched:
+                rel = stitched[field]
+                values[field] = loaders.defer_key(rel, row[rel.local_key], subfields)
+            else:
+                val = row[field]
+                values[field] = val.name if isinstance(val, Enum) else val
+        data.append(values)
+    return data
+
+
+async def serialize_async(
+    objs: list,
+    selected_fields,
+    loaders,
+    context: dict[str, Any],
+    core_cls: type | None = None,
+) -> list:
+    """
+    Serialize ORM objects (or the rows of a Core table, given its class) without blocking the
+    event loop on large results.
+
+    Results with more rows than the offload threshold are serialized in a worker thread, smaller
+    results are serialized on the event loop (and counted towards the request's blocking time).
+    """
+    offload_threshold = context["offload_threshold"]
+    budget = context["budget"]
+    serializer = serialize if core_cls is None else partial(serialize_rows, core_cls)
+
+    if offload_threshold is not None and len(objs) > offload_threshold:
+        return await asyncio.to_thread(
+            serializer, objs, selected_fields, loaders, budget
+        )
+
+    with context["stats"].measure_blocking():
+        return serializer(objs, selected_fields, loaders, budget)
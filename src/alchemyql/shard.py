@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+import itertools
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from graphql import GraphQLResolveInfo
+
+from .models import Table
+from .loader import whole_json_documents
+from .resolver import (
+    build_limit,
+    build_sql_select_stmt,
+    extract_root_selected_fields,
+    is_desc,
+    shared_async_resolver,
+    shared_sync_resolver,
+    validations,
+)
+from .serializer import serialize, serialize_async
+from .timeout import (
+    async_deadline_scope,
+    async_statement_timeout,
+    deadline_scope,
+    statement_timeout,
+)
+
+
+def hash_shard_for(shards: list[str]) -> Callable[[Any], str]:
+    """
+    Default shard function, assigning shard key values to shards by a stable hash.
+    """
+
+    def shard_for(value) -> str:
+        return shards[zlib.crc32(str(value).encode()) % len(shards)]
+
+    return shard_for
+
+
+def target_shards(table: Table, filters: dict) -> list[str]:
+    """
+    Shards a query has to run on (only the matching shards when filtering on the shard key).
+    """
+    shards = list(table.shards)  # type: ignore
+    operations = filters.get(table.shard_key, {}) if table.shard_key else {}
+
+    if "eq" in operations:
+        targets = {table.shard_for(operations["eq"])}  # type: ignore
+    elif "in" in operations:
+        targets = {table.shard_for(val) for val in operations["in"]}  # type: ignore
+    else:
+        return shards
+
+    return [shard for shard in shards if shard in targets]
+
+
+class OrderKey:
+    """
+    Sort key of a row, comparing its ordered column values like the shards order them (NULLs
+    first in both directions, as sharded queries order them explicitly).
+    """
+
+    def __init__(self, values: tuple, descending: tuple):
+        self.values = values
+        self.descending = descending
+
+    def __lt__(self, other: "OrderKey") -> bool:
+        for left, right, desc in zip(self.values, other.values, self.descending):
+            if left == right:
+                continue
+            if left is None or right is None:
+                return left is None
+            return left > right if desc else left < right
+        return False
+
+
+def merge_shards(
+    results: list[list], order: dict | None, offset: int, limit: int | None
+) -> list:
+    """
+    Merge the (ordered) rows of every shard, then apply the offset & limit to the merged rows.
+    """
+    if order:
+        descending = tuple(is_desc(direction) for direction in order.values())
+        rows = heapq.merge(
+            *results,
+            key=lambda obj: OrderKey(
+                tuple(getattr(obj, col) for col in order), descending
+            ),
+        )
+    else:
+        rows = itertools.chain(*results)
+
+    stop = None if limit is None else offset + limit
+    return list(itertools.islice(rows, offset, stop))
+
+
+def build_sharded_query(table: Table, info: GraphQLResolveInfo, **kwargs):
+    """
+    Build the selected fields, shards & SQL query (run on every shard) for a root query field.
+
+    Each shard returns its first "offset + limit" rows, which is enough to apply the offset &
+    limit to the merged rows. NULLs are ordered first explicitly, so every database orders them
+    like the merge. Relationships are joined, so they are loaded within the shard
+    (as are whole JSON documents).
+    """
+    validations(table, **kwargs)
+
+    max_query_depth = info.context["max_query_depth"]
+    fields = whole_json_documents(
+        extract_root_selected_fields(info, max_query_depth, **kwargs)
+    )
+
+    filters = kwargs.get("filter", {})
+    offset = kwargs.get("offset", 0)
+    limit = build_limit(table, info, **kwargs)
+    order = kwargs.get("order", table.default_order)
+
+    # Ordered columns are needed to merge the rows of the shards
+    query_fields = {**dict.fromkeys(order or {}, True), **fields}
+
+    query = build_sql_select_stmt(
+        table=table,
+        fields=query_fields,
+        filters=filters,
+        limit=None if limit is None else offset + limit,
+        order=order,
+        in_list=info.context["in_list"],
+        sample=kwargs.get("sample"),
+        nulls_first=True,
+    )
+
+    return fields, target_shards(table, filters), query, (order, offset, limit)
+
+
+def build_async_sharded_resolver(table: Table):
+    """
+    Resolver function for Async queries of sharded tables (run concurrently on every shard).
+    Returns a function that can be called at query execution to resolve query.
+    """
+
+    async def query_shard(info, shard: str, query) -> list:
+        deadline = info.context["deadline"]
+
+        async with table.shards[shard]() as session:  # type: ignore
+            async with async_statement_timeout(session, deadline):
+                async with async_deadline_scope(
+                    deadline, cancel=info.context["partial_results"]
+                ):
+                    res = await session.execute(query)
+
+                with info.context["stats"].measure_blocking():
+                    return res.unique().scalars().all()
+
+    async def execute(info, **kwargs):
+        stats = info.context["stats"]
+
+        with stats.measure_blocking():
+            fields, shards, query, pagination = build_sharded_query(
+                table, info, **kwargs
+            )
+
+        results = await asyncio.gather(
+            *[query_shard(info, shard, query) for shard in shards]
+        )
+
+        with stats.measure_blocking():
+            rows = merge_shards(results, *pagination)
+
+        data = await serialize_async(rows, fields, None, info.context)
+        info.context["budget"].consume_size(data)
+
+        return data
+
+    return shared_async_resolver(execute)
+
+
+def build_sync_sharded_resolver(table: Table):
+    """
+    Resolver function for Sync queries of sharded tables (run concurrently on every shard).
+    Returns a function that can be called at query execution to resolve query.
+    """
+
+    def query_shard(info, shard: str, query) -> list:
+        deadline = info.context["deadline"]
+
+        with table.shards[shard]() as session:  # type: ignore
+            with statement_timeout(session, deadline), deadline_scope(deadline):
+                return session.execute(query).unique().scalars().all()
+
+    def execute(info, **kwargs):
+        fields, shards, query, pagination = build_sharded_query(table, info, **kwargs)
+
+        if len(shards) <= 1:
+            results = [query_shard(info, shard, query) for shard in shards]
+        else:
+            with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+                results = list(
+                    pool.map(lambda shard: query_shard(info, shard, query), shards)
+                )
+
+        data = serialize(
+            merge_shards(results, *pagination), fields, None, info.context["budget"]
+        )
+        info.context["budget"].consume_size(data)
+
+        return data
+
+    return shared_sync_resolver(execute)
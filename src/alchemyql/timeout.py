@@ -0,0 +1,166 @@
+import asyncio
+import time
+from collections.abc import Callable
+from contextlib import asynccontextmanager, contextmanager
+
+from sqlalchemy import Executable, text
+from sqlalchemy.exc import DBAPIError
+
+from .errors import QueryTimeoutError
+
+# Number of SQLite virtual machine instructions between deadline checks
+SQLITE_PROGRESS_STEPS = 1000
+
+# Statements reading the statement timeout & setting it for the rest of the current transaction
+STATEMENT_TIMEOUTS: dict[str, tuple[Executable, Callable[[str], Executable]]] = {
+    "postgresql": (
+        text("SELECT current_setting('statement_timeout')"),
+        lambda value: text(
+            "SELECT set_config('statement_timeout', :value, true)"
+        ).bindparams(value=value),
+    ),
+}
+
+
+def get_deadline(timeout: float | None) -> float | None:
+    """
+    Convert a timeout (in seconds) to a deadline on the monotonic clock (also used by asyncio).
+    """
+    if timeout is None:
+        return None
+    return time.monotonic() + timeout
+
+
+def check_deadline(deadline: float | None):
+    """
+    Raises a QueryTimeoutError if the deadline has passed.
+    """
+    if deadline is not None and time.monotonic() >= deadline:
+        raise QueryTimeoutError("Query execution timed out")
+
+
+def remaining_ms(deadline: float) -> int:
+    return max(1, int((deadline - time.monotonic()) * 1000))
+
+
+def progress_handler(deadline: float) -> Callable[[], int]:
+    """
+    SQLite progress handler which interrupts the running statement once the deadline has passed.
+    """
+    return lambda: int(time.monotonic() >= deadline)
+
+
+@contextmanager
+def statement_timeout(session, deadline: float | None):
+    """
+    Enforce the deadline at the database for all statements run by a (sync) session.
+
+    PostgreSQL uses a transaction scoped statement_timeout (restored afterwards, as the
+    transaction may go on), SQLite interrupts running statements with a progress handler.
+    """
+    if deadline is None:
+        yield
+        return
+
+    conn = session.connection()
+    dialect = conn.dialect.name
+
+    previous = None
+    if statements := STATEMENT_TIMEOUTS.get(dialect):
+        get_stmt, build_stmt = statements
+        previous = session.execute(get_stmt).scalar()
+        session.execute(build_stmt(str(remaining_ms(deadline))))
+
+    driver_conn = conn.connection.driver_connection
+    if dialect == "sqlite":
+        driver_conn.set_progress_handler(
+            progress_handler(deadline), SQLITE_PROGRESS_STEPS
+        )
+
+    try:
+        yield
+    finally:
+        if dialect == "sqlite":
+            driver_conn.set_progress_handler(None, 0)
+        if statements:
+            try:
+                session.execute(build_stmt(previous))
+            except DBAPIError:
+                # Aborted transaction (its settings end with it)
+                pass
+
+
+@asynccontextmanager
+async def async_statement_timeout(session, deadline: float | None):
+    """
+    Enforce the deadline at the database for all statements run by an async session.
+
+    PostgreSQL uses a transaction scoped statement_timeout (restored afterwards, as the
+    transaction may go on), SQLite interrupts running statements with a progress handler.
+    """
+    if deadline is None:
+        yield
+        return
+
+    conn = await session.connection()
+    dialect = conn.dialect.name
+
+    previous = None
+    if statements := STATEMENT_TIMEOUTS.get(dialect):
+        get_stmt, build_stmt = statements
+        previous = (await session.execute(get_stmt)).scalar()
+        await session.execute(build_stmt(str(remaining_ms(deadline))))
+
+    driver_conn = (await conn.get_raw_connection()).driver_connection
+    if dialect == "sqlite":
+        await driver_conn.set_progress_handler(
+            progress_handler(deadline), SQLITE_PROGRESS_STEPS
+        )
+
+    try:
+        yield
+    finally:
+        if dialect == "sqlite":
+            await driver_conn.set_progress_handler(None, 0)
+        if statements:
+            try:
+                await session.execute(build_stmt(previous))
+            except DBAPIError:
+                # Aborted transaction (its settings end with it)
+                pass
+
+
+@contextmanager
+def deadline_scope(deadline: float | None):
+    """
+    Run sync query work under a deadline.
+
+    No new work is started once the deadline has passed, and database errors raised after
+    it (e.g. interrupted statements) are reported as a QueryTimeoutError.
+    """
+    check_deadline(deadline)
+    try:
+        yield
+    except DBAPIError:
+        check_deadline(deadline)
+        raise
+
+
+@asynccontextmanager
+async def async_deadline_scope(deadline: float | None, cancel: bool = True):
+    """
+    Run async query work under a deadline (cancelling it once the deadline has passed,
+    unless cancellation is handled by the caller).
+
+    Database errors raised after the deadline (e.g. interrupted statements) are reported
+    as a QueryTimeoutError.
+    """
+    check_deadline(deadline)
+    try:
+        async with asyncio.timeout_at(deadline if cancel else None):
+            yield
+    except TimeoutError:
+        raise QueryTimeoutError("Query execution timed out") from None
+    except DBAPIError:
+        check_deadline(deadline)
+        raise
@@ -0,0 +1,283 @@
+import logging
+import threading
+import time
+
+from sqlalchemy import (
+    Column,
+    MetaData,
+    Select,
+    Table,
+    delete,
+    event,
+    inspect,
+    insert,
+    text,
+)
+from sqlalchemy.orm import Session, registry
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.sql.util import find_tables
+
+from .errors import ConfigurationError
+
+log = logging.getLogger("alchemyql")
+
+# Session info key of the materialized views made stale by the session's changes
+STALE_VIEWS = "alchemyql_stale_views"
+
+
+class MaterializedView:
+    """
+    Precomputed result of a query, stored by the database:
+     - PostgreSQL - a materialized view ("REFRESH MATERIALIZED VIEW" recomputes it)
+     - Other databases - a cache table with the view's name (rebuilt by deleting its rows &
+       inserting the query's result)
+
+    Options:
+     - name - name of the view (and of its GraphQL type, unless graphql_name is registered)
+     - query - select statement computing the view's rows
+     - primary_key - names of the query's columns uniquely identifying a row
+     - metadata - metadata to add the view's table to (defaults to a new metadata)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        query: Select,
+        primary_key: list[str],
+        metadata: MetaData | None = None,
+    ):
+        names = [col.name for col in query.selected_columns]
+        if not primary_key or any(key not in names for key in primary_key):
+            raise ConfigurationError(
+                f"Primary key of view {name} must be columns of its query"
+            )
+
+        self.name = name
+        self.query = query
+        self.table = Table(
+            name,
+            metadata or MetaData(),
+            *[
+                Column(col.name, col.type, primary_key=col.name in primary_key)
+                for col in query.selected_columns
+            ],
+        )
+        self.sources = {it for it in find_tables(query) if isinstance(it, Table)}
+
+    def create_statements(self, dialect) -> list:
+        """
+        Statements creating the view (if it does not exist) & computing its rows.
+        """
+        if dialect.name == "postgresql":
+            query = self.query.compile(
+                dialect=dialect, compile_kwargs={"literal_binds": True}
+            )
+            name = dialect.identifier_preparer.quote(self.name)
+            return [text(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {name} AS {query}")]
+
+        return [CreateTable(self.table, if_not_exists=True)] + self.refresh_statements(
+            dialect
+        )
+
+    def refresh_statements(self, dialect) -> list:
+        """
+        Statements recomputing the rows of the view.
+        """
+        if dialect.name == "postgresql":
+            name = dialect.identifier_preparer.quote(self.name)
+            return [text(f"REFRESH MATERIALIZED VIEW {name}")]
+
+        columns = [col.name for col in self.table.columns]
+        return [delete(self.table), insert(self.table).from_select(columns, self.query)]
+
+    def create(self, connection):
+        """
+        Create the view (if it does not exist), given a sync connection.
+        """
+        for statement in self.create_statements(connection.dialect):
+            connection.execute(statement)
+
+    def refresh(self, connection):
+        """
+        Recompute the rows of the view, given a sync connection.
+        """
+        for statement in self.refresh_statements(connection.dialect):
+            connection.execute(statement)
+
+
+def map_view(selectable, primary_key: list[str] | None) -> type:
+    """
+    Map a table, view, named select (e.g. "select(...).subquery(name)") or materialized view to a
+    (read only) SQL Alchemy class, so it can be registered like any other table.
+    """
+    if isinstance(selectable, MaterializedView):
+        selectable = selectable.table
+
+    if isinstance(selectable, Select):
+        raise ConfigurationError(
+            "Select statements must be named to be registered (e.g. select(...).subquery(name))"
+        )
+
+    name = selectable.name
+    if primary_key:
+        missing = next((key for key in primary_key if key not in selectable.c), None)
+        if missing is not None:
+            raise ConfigurationError(f"Column {missing} does not exist for view {name}")
+        keys = [selectable.c[key] for key in primary_key]
+    else:
+        keys = list(selectable.primary_key)
+
+    if not keys:
+        raise ConfigurationError(
+            f"View {name} has no primary key (it must be provided as primary_key)"
+        )
+
+    view_cls = type(name, (), {"__tablename__": name})
+    registry().map_imperatively(view_cls, selectable, primary_key=keys)
+    return view_cls
+
+
+class ViewRefresher:
+    """
+    Keeps materialized views up to date, refreshing them in their own transaction:
+     - every "interval" seconds (in a background thread, once started)
+     - after a session commits changes to the tables a view is computed from (when "on_commit"):
+       the commit only marks the views stale, they are refreshed by the background thread (once
+       started) or by calling "refresh_stale()", never within the committing session's commit
+
+    NOTE: This takes a sync engine (e.g. "async_engine.sync_engine" is not supported, as its
+    connections require the event loop)
+    """
+
+    def __init__(
+        self,
+        bind,
+        views: list[MaterializedView],
+        interval: float | None = None,
+        on_commit: bool = False,
+    ):
+        if interval is not None and interval <= 0:
+            raise ConfigurationError(
+                f"Refresh interval must be a positive number (value={interval})"
+            )
+
+        self.bind = bind
+        self.views = views
+        self.interval = interval
+        self.on_commit = on_commit
+        self.refreshes = 0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread: threading.Thread | None = None
+
+        # Views made stale by committed changes (& whether any are waiting for a refresh)
+        self.stale: set[MaterializedView] = set()
+        self.stale_lock = threading.Lock()
+        self.pending = threading.Event()
+
+        if on_commit:
+            event.listen(Session, "after_flush", self.track_flush)
+            event.listen(Session, "do_orm_execute", self.track_execute)
+            event.listen(Session, "after_commit", self.track_commit)
+            event.listen(Session, "after_soft_rollback", self.discard_stale)
+
+    def refresh(self, views: list[MaterializedView] | None = None):
+        """
+        Refresh views (defaults to all views), in 1 transaction.
+        """
+        with self.lock, self.bind.begin() as connection:
+            for view in self.views if views is None else views:
+                view.refresh(connection)
+            self.refreshes += 1
+
+    def refresh_stale(self):
+        """
+        Refresh the views marked stale by committed changes (if any), in 1 transaction.
+        """
+        with self.stale_lock:
+            stale, self.stale = self.stale, set()
+            self.pending.clear()
+
+        if stale:
+            self.refresh([view for view in self.views if view in stale])
+
+    def start(self):
+        """
+        Start refreshing the views every "interval" seconds and / or after commits (in a daemon
+        thread).
+        """
+        if (self.interval is None and not self.on_commit) or self.thread is not None:
+            return
+
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        deadline = None if self.interval is None else time.monotonic() + self.interval
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            self.pending.wait(timeout)
+            if self.stopped.is_set():
+                return
+
+            # A failed refresh is retried on the next interval / commit (the thread keeps running)
+            try:
+                if deadline is not None and time.monotonic() >= deadline:
+                    deadline = time.monotonic() + self.interval
+                    with self.stale_lock:
+                        self.stale.clear()
+                        self.pending.clear()
+                    self.refresh()
+                else:
+                    self.refresh_stale()
+            except Exception:
+                log.exception("Refresh of materialized views failed")
+
+    def stop(self):
+        """
+        Stop refreshing the views (on an interval & on commit).
+        """
+        self.stopped.set()
+        self.pending.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+        if self.on_commit:
+            event.remove(Session, "after_flush", self.track_flush)
+            event.remove(Session, "do_orm_execute", self.track_execute)
+            event.remove(Session, "after_commit", self.track_commit)
+            event.remove(Session, "after_soft_rollback", self.discard_stale)
+            self.on_commit = False
+
+    def mark_stale(self, session, tables: set):
+        stale = [view for view in self.views if view.sources & tables]
+        if stale:
+            session.info.setdefault(STALE_VIEWS, set()).update(stale)
+
+    def track_flush(self, session, flush_context):
+        # The session still lists the flushed objects (until the flush completes)
+        tables = {
+            table
+            for obj in [*session.new, *session.dirty, *session.deleted]
+            for table in inspect(obj).mapper.tables
+        }
+        self.mark_stale(session, tables)
+
+    def track_execute(self, orm_execute_state):
+        # Bulk INSERT / UPDATE / DELETE statements
+        if not orm_execute_state.is_select:
+            table = getattr(orm_execute_state.statement, "table", None)
+            self.mark_stale(orm_execute_state.session, {table})
+
+    def track_commit(self, session):
+        # Refreshed outside of the commit (by the background thread or "refresh_stale")
+        if stale := session.info.pop(STALE_VIEWS, None):
+            with self.stale_lock:
+                self.stale.update(stale)
+                self.pending.set()
+
+    def discard_stale(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop(STALE_VIEWS, None)
@@ -9,7 +9,7 @@ from alchemyql.errors import ConfigurationError
 from ..databases.a import A_Table
 from ..databases.b import B_Table_1, B_Table_2, B_Table_3
 from ..databases.c import C_Table
-from ..databases.d import D_Table_1, D_Table_2, D_Table_3
+from ..databases.d import D_Table_1, D_Table_2, D_Table_3, T2_T3_Link
 
 data_folder = os.path.join(os.path.dirname(__file__), "data")
 
@@ -69,6 +69,8 @@ def read_data_file(name: str) -> str:
             "A_test_case_pagination_default.txt",
             {"pagination": True, "default_limit": 1000},
         ),
+        # Primary key lookup customisation
+        ("A_test_case_pk_lookup.txt", {"pk_lookup": True}),
         # Combination of everything
         (
             "A_test_case_combination.txt",
@@ -288,3 +290,27 @@ async def test_execute_query_before_schema_built_async():
 
     with pytest.raises(ConfigurationError):
         await engine.execute_query("", None)  # type: ignore
+
+
+@pytest.mark.parametrize("cls", [AlchemyQLSync, AlchemyQLAsync])
+def test_build_schema_d_composite_pk_lookup(cls: type[AlchemyQL]):
+    engine = cls()
+
+    engine.register(T2_T3_Link, pk_lookup=True)
+    engine.build_schema()
+
+    expected = read_data_file("D_test_case_composite_pk_lookup.txt")
+
+    assert engine.get_schema() == expected
+
+
+@pytest.mark.parametrize("cls", [AlchemyQLSync, AlchemyQLAsync])
+def test_build_schema_pk_lookup_name_in_use(cls: type[AlchemyQL]):
+    engine = cls()
+
+    # Lookup field "items" clashes with the list query field of table "item"
+    engine.register(D_Table_2, graphql_name="item")
+    engine.register(D_Table_1, graphql_name="items", pk_lookup=True)
+
+    with pytest.raises(ConfigurationError):
+        engine.build_schema()
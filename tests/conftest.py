@@ -5,15 +5,29 @@ from datetime import date, datetime, time
 from pathlib import Path
 
 import pytest
-from sqlalchemy import StaticPool, create_engine, insert
+from sqlalchemy import StaticPool, create_engine, event, insert
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from .databases.a import Base as A_Base
 from .databases.b import Base as B_Base
 from .databases.d import Base as D_Base
-
-TEST_DATABASES = {"A": A_Base, "B": B_Base, "D": D_Base}
+from .databases.e import Base as E_Base
+from .databases.f import Base as F_Base
+from .databases.g import Base as G_Base
+from .databases.h import Base as H_Base
+from .databases.i import Base as I_Base
+
+TEST_DATABASES = {
+    "A": A_Base,
+    "B": B_Base,
+    "D": D_Base,
+    "E": E_Base,
+    "F": F_Base,
+    "G": G_Base,
+    "H": H_Base,
+    "I": I_Base,
+}
 
 
 def convert_values(row, model_cls):
@@ -52,8 +66,11 @@ def populate_db_stmts(base, test_db: str):
         ).read_text()
     )
 
+    # Single table inheritance subclasses share the table of their parent class
     table_name_to_class = {
-        mapper.local_table.name: mapper.class_ for mapper in base.registry.mappers
+        mapper.local_table.name: mapper.class_
+        for mapper in base.registry.mappers
+        if not mapper.single
     }
 
     for table_name, rows in data.items():
@@ -140,3 +157,44 @@ def db_async():
         await engine.dispose()
 
     return _factory
+
+
+def sync_bind(target):
+    """
+    Sync engine of a session, session factory or (async) engine.
+    """
+    if hasattr(target, "get_bind"):
+        target = target.get_bind()
+    elif hasattr(target, "kw"):
+        target = target.kw["bind"]
+    return getattr(target, "sync_engine", target)
+
+
+@pytest.fixture
+def record_statements():
+    def _factory(target, parameters: bool = False) -> list:
+        """
+        Record the SQL statements executed on the database of a session, session factory or engine
+        (with "parameters", as (statement, parameters) tuples).
+        """
+        statements = []
+
+        @event.listens_for(sync_bind(target), "before_cursor_execute")
+        def _record(conn, cursor, statement, params, *args):
+            statements.append((statement, params) if parameters else statement)
+
+        return statements
+
+    return _factory
+
+
+@pytest.fixture
+def int_fields():
+    def _factory(res, name: str = "sample_tables") -> list[int]:
+        """
+        Int field values of the rows returned by a root query field (which must not error).
+        """
+        assert res.errors is None
+        return [row["int_field"] for row in res.data[name]]
+
+    return _factory
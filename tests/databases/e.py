@@ -0,0 +1,39 @@
+"""
+Test Database E.
+
+Database with 1 self-referential table in it. Its rows form a tree (categories):
+    - One
+        - Two
+            - Four
+                - Six
+            - Five
+        - Three
+    - Seven
+
+Database style: SQL Alchemy declarative ORM (mapped).
+"""
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+
+
+class Base(DeclarativeBase): ...
+
+
+class E_Table(Base):
+    __tablename__ = "SAMPLE_TABLE"
+
+    int_field: Mapped[int] = mapped_column(primary_key=True)
+    string_field: Mapped[str]
+
+    # FK to the parent row (null for root rows)
+    parent_int_field: Mapped[int | None] = mapped_column(
+        ForeignKey("SAMPLE_TABLE.int_field"),
+        nullable=True,
+    )
+
+    # Self-referential relationships (one-to-many & many-to-one)
+    children: Mapped[list["E_Table"]] = relationship(back_populates="parent")
+    parent: Mapped["E_Table | None"] = relationship(
+        back_populates="children", remote_side=[int_field]
+    )
@@ -0,0 +1,20 @@
+"""
+Test Database F.
+
+Database with 1 table in it, storing JSON documents (of varying shapes).
+
+Database style: SQL Alchemy declarative ORM (mapped).
+"""
+
+from sqlalchemy import JSON
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+
+class Base(DeclarativeBase): ...
+
+
+class F_Table(Base):
+    __tablename__ = "SAMPLE_TABLE"
+
+    int_field: Mapped[int] = mapped_column(primary_key=True)
+    json_field: Mapped[dict] = mapped_column(JSON)
@@ -0,0 +1,20 @@
+"""
+Test Database G.
+
+Database with 1 table in it, storing articles (full text searchable).
+
+Database style: SQL Alchemy declarative ORM (mapped).
+"""
+
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+
+class Base(DeclarativeBase): ...
+
+
+class G_Table(Base):
+    __tablename__ = "SAMPLE_TABLE"
+
+    int_field: Mapped[int] = mapped_column(primary_key=True)
+    title: Mapped[str]
+    body: Mapped[str]
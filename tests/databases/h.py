@@ -0,0 +1,48 @@
+"""
+Test Database H.
+
+Database with 1 table in it, storing people (with SQL computed attributes).
+
+Database style: SQL Alchemy declarative ORM (mapped).
+"""
+
+from datetime import date
+
+from sqlalchemy import Integer, func, type_coerce
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import DeclarativeBase, Mapped, column_property, mapped_column
+
+
+class Base(DeclarativeBase): ...
+
+
+class H_Table(Base):
+    __tablename__ = "SAMPLE_TABLE"
+
+    int_field: Mapped[int] = mapped_column(primary_key=True)
+    first_name: Mapped[str] = mapped_column()
+    last_name: Mapped[str] = mapped_column()
+    score: Mapped[int]
+    bonus: Mapped[int | None]
+    joined: Mapped[date]
+
+    full_name = column_property(first_name + " " + last_name)
+
+    @hybrid_property
+    def total(self) -> int:
+        return self.score + (self.bonus or 0)
+
+    @total.inplace.expression
+    @classmethod
+    def _total_expression(cls):
+        return type_coerce(cls.score + func.coalesce(cls.bonus, 0), Integer)
+
+    @hybrid_property
+    def name_length(self) -> int:
+        return len(self.first_name)
+
+    @name_length.inplace.expression
+    @classmethod
+    def _name_length_expression(cls):
+        # Untyped SQL expression
+        return func.length(cls.first_name)
@@ -0,0 +1,65 @@
+"""
+Test Database I.
+
+Database with tables mapped with inheritance (employees), and 1 table referenced by a subclass:
+    - Employee (base class, joined table inheritance)
+        - Engineer (with a team)
+            - Intern (single table inheritance)
+        - Manager
+
+Database style: SQL Alchemy declarative ORM (mapped).
+"""
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+
+
+class Base(DeclarativeBase): ...
+
+
+class I_Team(Base):
+    __tablename__ = "TEAM"
+
+    int_field: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str]
+
+    engineers: Mapped[list["I_Engineer"]] = relationship(back_populates="team")
+
+
+class I_Employee(Base):
+    __tablename__ = "EMPLOYEE"
+
+    int_field: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str]
+    type: Mapped[str]
+
+    __mapper_args__ = {"polymorphic_on": "type", "polymorphic_identity": "employee"}
+
+
+class I_Engineer(I_Employee):
+    __tablename__ = "ENGINEER"
+
+    int_field: Mapped[int] = mapped_column(
+        ForeignKey("EMPLOYEE.int_field"), primary_key=True
+    )
+    language: Mapped[str]
+    team_int_field: Mapped[int] = mapped_column(ForeignKey("TEAM.int_field"))
+
+    team: Mapped[I_Team] = relationship(back_populates="engineers")
+
+    __mapper_args__ = {"polymorphic_identity": "engineer"}
+
+
+class I_Intern(I_Engineer):
+    __mapper_args__ = {"polymorphic_identity": "intern"}
+
+
+class I_Manager(I_Employee):
+    __tablename__ = "MANAGER"
+
+    int_field: Mapped[int] = mapped_column(
+        ForeignKey("EMPLOYEE.int_field"), primary_key=True
+    )
+    reports: Mapped[int]
+
+    __mapper_args__ = {"polymorphic_identity": "manager"}
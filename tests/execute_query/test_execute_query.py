@@ -28,8 +28,8 @@ def load_test_cases():
 T = TypeVar("T", bound=AlchemyQL)
 
 
-def build_ql_engine(engine_cls: type[T], db: str) -> T:
-    engine = engine_cls()
+def build_ql_engine(engine_cls: type[T], db: str, **engine_kwargs) -> T:
+    engine = engine_cls(**engine_kwargs)
 
     match db:
         case "A":
@@ -50,6 +50,7 @@ def build_ql_engine(engine_cls: type[T], db: str) -> T:
                 default_order={"int_field": Order.ASC},
                 pagination=True,
                 max_limit=100,
+                pk_lookup=True,
             )
         case "B":
             fields = [
@@ -78,6 +79,7 @@ def build_ql_engine(engine_cls: type[T], db: str) -> T:
                 relationships=["t2_rel", "t3_rel"],
                 order_fields=["int_field"],
                 pagination=True,
+                pk_lookup=True,
             )
             engine.register(
                 D_Table_2,
@@ -85,6 +87,7 @@ def build_ql_engine(engine_cls: type[T], db: str) -> T:
                 relationships=["t1_rel", "t3_rel"],
                 order_fields=["int_field"],
                 pagination=True,
+                pk_lookup=True,
             )
             engine.register(
                 D_Table_3,
@@ -92,15 +95,24 @@ def build_ql_engine(engine_cls: type[T], db: str) -> T:
                 relationships=["t1_rel", "t2_rel"],
                 order_fields=["int_field"],
                 pagination=True,
+                pk_lookup=True,
             )
 
     engine.build_schema()
     return engine
 
 
+engine_modes = pytest.mark.parametrize(
+    "engine_kwargs", [{}, {"batch_relationships": True}], ids=["joined", "batched"]
+)
+
+
+@engine_modes
 @pytest.mark.parametrize("test_case", load_test_cases(), ids=lambda x: x["id"])
-def test_sync_queries(db_sync, test_case):
-    engine: AlchemyQLSync = build_ql_engine(AlchemyQLSync, test_case["db"])
+def test_sync_queries(db_sync, test_case, engine_kwargs):
+    engine: AlchemyQLSync = build_ql_engine(
+        AlchemyQLSync, test_case["db"], **engine_kwargs
+    )
     with db_sync(test_case["db"]) as db:
         res = engine.execute_query(
             query=test_case["query"], variables=test_case["variables"], db_session=db
@@ -110,9 +122,24 @@ def test_sync_queries(db_sync, test_case):
         assert res.data == test_case["expected"]
 
 
+async_engine_modes = pytest.mark.parametrize(
+    "engine_kwargs",
+    [
+        {},
+        {"batch_relationships": True},
+        {"offload_threshold": 1},
+        {"batch_relationships": True, "offload_threshold": 1},
+    ],
+    ids=["joined", "batched", "offloaded", "batched_offloaded"],
+)
+
+
+@async_engine_modes
 @pytest.mark.parametrize("test_case", load_test_cases(), ids=lambda x: x["id"])
-async def test_async_queries(db_async, test_case):
-    engine: AlchemyQLAsync = build_ql_engine(AlchemyQLAsync, test_case["db"])
+async def test_async_queries(db_async, test_case, engine_kwargs):
+    engine: AlchemyQLAsync = build_ql_engine(
+        AlchemyQLAsync, test_case["db"], **engine_kwargs
+    )
     async with db_async(test_case["db"]) as db:
         res = await engine.execute_query(
             query=test_case["query"], variables=test_case["variables"], db_session=db
@@ -191,3 +218,103 @@ async def test_query_depth_exceeded_async(db_async):
         res = await engine.execute_query(query=query, variables=None, db_session=db)
 
         assert res.errors is not None
+
+
+shared_query = "query { a: sample_tables (limit: 2) { int_field } b: sample_tables (limit: 2) { string_field } }"
+
+
+def test_aliased_root_fields_share_query_sync(db_sync, record_statements):
+    engine = build_ql_engine(AlchemyQLSync, "A")
+
+    with db_sync("A") as db:
+        statements = record_statements(db.get_bind())
+        res = engine.execute_query(query=shared_query, db_session=db)
+
+        assert res.errors is None
+        assert res.data == {
+            "a": [{"int_field": 1}, {"int_field": 2}],
+            "b": [{"string_field": "One"}, {"string_field": "Two"}],
+        }
+        assert len(statements) == 1
+
+
+async def test_aliased_root_fields_share_query_async(db_async, record_statements):
+    engine = build_ql_engine(AlchemyQLAsync, "A")
+
+    async with db_async("A") as db:
+        statements = record_statements(db.bind.sync_engine)
+        res = await engine.execute_query(query=shared_query, db_session=db)
+
+        assert res.errors is None
+        assert res.data == {
+            "a": [{"int_field": 1}, {"int_field": 2}],
+            "b": [{"string_field": "One"}, {"string_field": "Two"}],
+        }
+        assert len(statements) == 1
+
+
+batched_query = (
+    "query { sample_table_1s { int_field t3_rel { int_field t2_rel { int_field } } } }"
+)
+
+
+def test_batched_relationships_sync(db_sync, record_statements):
+    engine = build_ql_engine(AlchemyQLSync, "D", batch_relationships=True)
+
+    with db_sync("D") as db:
+        statements = record_statements(db.get_bind())
+        res = engine.execute_query(query=batched_query, db_session=db)
+
+        assert res.errors is None
+        assert len(res.data["sample_table_1s"]) == 5
+        # 1 root query + 1 query per relationship level
+        assert len(statements) == 3
+
+
+async def test_batched_relationships_async(db_async, record_statements):
+    engine = build_ql_engine(AlchemyQLAsync, "D", batch_relationships=True)
+
+    async with db_async("D") as db:
+        statements = record_statements(db.bind.sync_engine)
+        res = await engine.execute_query(query=batched_query, db_session=db)
+
+        assert res.errors is None
+        assert len(res.data["sample_table_1s"]) == 5
+        # 1 root query + 1 query per relationship level
+        assert len(statements) == 3
+
+
+async def test_event_loop_blocking_logged_async(db_async, caplog):
+    engine = build_ql_engine(AlchemyQLAsync, "A")
+
+    async with db_async("A") as db:
+        with caplog.at_level("DEBUG", logger="alchemyql"):
+            res = await engine.execute_query(
+                query="query { sample_tables { int_field } }", db_session=db
+            )
+
+        assert res.errors is None
+        assert "Event loop blocked" in caplog.text
+
+
+async def test_event_loop_blocking_reported_async(db_async):
+    engine = build_ql_engine(AlchemyQLAsync, "A")
+
+    async with db_async("A") as db:
+        res = await engine.execute_query(
+            query="query { sample_tables { int_field } }", db_session=db
+        )
+
+        assert res.errors is None
+        assert res.extensions["loop_blocking"] > 0  # type: ignore
+
+
+def test_event_loop_blocking_not_reported_sync(db_sync):
+    engine = build_ql_engine(AlchemyQLSync, "A")
+
+    with db_sync("A") as db:
+        res = engine.execute_query(
+            query="query { sample_tables { int_field } }", db_session=db
+        )
+
+        assert res.extensions is None
@@ -0,0 +1,305 @@
+import pytest
+from sqlalchemy import String, delete
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.approximate import count_rows
+from alchemyql.errors import ConfigurationError
+from alchemyql.resolver import build_sql_select_stmt
+
+from .databases.a import A_Table
+from .databases.h import H_Table
+
+
+def build_engine(cls=AlchemyQLSync, **kwargs):
+    engine = cls()
+    engine.register(
+        A_Table,
+        filter_fields=["enum_field", "int_field"],
+        order_fields=["int_field"],
+        default_order={"int_field": "ASC"},
+        row_count=True,
+        sample=True,
+        **kwargs,
+    )
+    engine.build_schema()
+    return engine
+
+
+def count(engine, db, args: str = "approximate: true") -> int:
+    res = engine.execute_query(f"query {{ sample_tables_count ({args}) }}", db)
+    assert res.errors is None
+    return res.data["sample_tables_count"]
+
+
+def test_exact_count(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("A") as db:
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            "query { odd: sample_tables_count (filter: {enum_field: {eq: ODD}}) all: sample_tables_count }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data == {"odd": 3, "all": 5}
+        assert len(statements) == 2
+        assert "count(*)" in statements[0]
+
+
+def test_approximate_count_cache(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("A") as db:
+        statements = record_statements(db)
+
+        assert count(engine, db) == 5
+        assert count(engine, db) == 5
+        # Counted once, then read from the row count cache
+        assert len(statements) == 1
+
+        # Rows added & deleted by the session are counted on commit
+        row = db.get(A_Table, 1)
+        values = {col.key: getattr(row, col.key) for col in A_Table.__table__.columns}
+        db.add(A_Table(**{**values, "int_field": 6}))
+        db.delete(db.get(A_Table, 2))
+        db.delete(db.get(A_Table, 3))
+        db.flush()
+        assert count(engine, db) == 5
+        db.commit()
+        statements.clear()
+        assert count(engine, db) == 4
+        assert len(statements) == 0
+
+        # Rolled back changes are not counted
+        db.delete(db.get(A_Table, 4))
+        db.flush()
+        db.rollback()
+        assert count(engine, db) == 4
+
+        # Bulk statements discard the count
+        db.execute(delete(A_Table).where(A_Table.int_field == 5))
+        db.commit()
+        statements.clear()
+        assert count(engine, db) == 3
+        assert len(statements) == 1
+
+
+def new_row(db, int_field: int) -> A_Table:
+    row = db.get(A_Table, 1)
+    values = {col.key: getattr(row, col.key) for col in A_Table.__table__.columns}
+    return A_Table(**{**values, "int_field": int_field})
+
+
+@pytest.mark.parametrize("end,expected", [("commit", 6), ("rollback", 5)])
+def test_count_with_uncommitted_changes_not_cached(db_sync, end, expected):
+    engine = build_engine()
+    with db_sync("A") as db:
+        # Counted by a session with flushed (uncommitted) changes
+        db.add(new_row(db, 6))
+        db.flush()
+        assert count(engine, db) == 6
+
+        getattr(db, end)()
+        assert count(engine, db) == expected
+        assert count(engine, db, "approximate: false") == expected
+
+
+def test_count_with_pending_changes_not_cached(db_sync):
+    engine = build_engine()
+    with db_sync("A") as db, db.no_autoflush:
+        db.add(new_row(db, 6))
+        assert count(engine, db) == 5
+
+        db.rollback()
+        assert engine.tables[0].row_count.get(db.get_bind()) is None
+
+
+def test_approximate_filtered_count(db_sync):
+    engine = build_engine()
+    with db_sync("A") as db:
+        # No estimates are available, the rows are counted exactly
+        assert count(engine, db, "filter: {int_field: {gt: 1}}, approximate: true") == 4
+
+
+async def test_count_async(db_async):
+    engine = build_engine(AlchemyQLAsync)
+    async with db_async("A") as db:
+        res = await engine.execute_query(
+            "query { a: sample_tables_count (approximate: true) b: sample_tables_count (filter: {enum_field: {eq: EVEN}}) }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data == {"a": 5, "b": 2}
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+    def scalar_one(self):
+        return self.value
+
+
+class FakeBind:
+    dialect = postgresql.dialect()
+
+
+class FakeSession:
+    """
+    Sync session on a PostgreSQL database, returning canned results.
+    """
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements: list[str] = []
+
+    def get_bind(self, *args):
+        return FakeBind()
+
+    def execute(self, stmt, params=None):
+        self.statements.append(str(stmt.compile(dialect=FakeBind.dialect)))
+        return FakeResult(self.results.pop(0))
+
+
+def test_postgresql_estimates():
+    table = build_engine().tables[0]
+
+    session = FakeSession(1234.0)
+    assert count_rows(session, table, None, True) == 1234
+    assert session.statements == [
+        "SELECT reltuples FROM pg_class WHERE oid = CAST(%(name)s AS regclass)"
+    ]
+
+    session = FakeSession([{"Plan": {"Plan Rows": 42}}])
+    assert count_rows(session, table, {"int_field": {"gt": 1}}, True) == 42
+    assert session.statements[0].startswith(
+        'EXPLAIN (FORMAT JSON) SELECT 1 \nFROM "SAMPLE_TABLE" \nWHERE "SAMPLE_TABLE".int_field >'
+    )
+
+    session = FakeSession('[{"Plan": {"Plan Rows": 7}}]')
+    assert count_rows(session, table, {"int_field": {"gt": 1}}, True) == 7
+
+    # Tables which were never analyzed are counted exactly
+    session = FakeSession(-1.0, 5)
+    assert count_rows(session, table, None, True) == 5
+    assert session.statements[1].startswith("SELECT count(*) AS count_1")
+
+
+def test_sample(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("A") as db:
+        statements = record_statements(db)
+
+        for _ in range(10):
+            res = engine.execute_query(
+                "query { sample_tables (sample: 40) { int_field } }", db
+            )
+
+            assert res.errors is None
+            ids = [row["int_field"] for row in res.data["sample_tables"]]
+            # A random range of primary keys (spanning 40% of the primary key range)
+            assert 1 <= len(ids) <= 2
+            assert ids == list(range(ids[0], ids[0] + len(ids)))
+
+        assert "min(" in statements[0] and "max(" in statements[0]
+
+        res = engine.execute_query(
+            "query { sample_tables (sample: 100, filter: {enum_field: {eq: ODD}}) { int_field } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_tables"] == [
+            {"int_field": 1},
+            {"int_field": 3},
+            {"int_field": 5},
+        ]
+
+
+@pytest.mark.parametrize("sample", [0, -1, 100.5])
+def test_sample_out_of_bounds(db_sync, sample):
+    engine = build_engine()
+    with db_sync("A") as db:
+        res = engine.execute_query(
+            f"query {{ sample_tables (sample: {sample}) {{ int_field }} }}", db
+        )
+
+        assert res.errors[0].message == (
+            f"Provided Sample is out of bounds (Value: {float(sample)}, Min: 0, Max: 100)"
+        )
+
+
+async def test_sample_micro_batch(db_async):
+    engine = build_engine(AlchemyQLAsync, micro_batch_window=0.001)
+    async with db_async("A") as db:
+        res = await engine.execute_query(
+            "query { sample_tables (sample: 100, filter: {int_field: {eq: 2}}) { int_field } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_tables"] == [{"int_field": 2}]
+
+
+def test_postgresql_tablesample():
+    table = build_engine().tables[0]
+    stmt = build_sql_select_stmt(table, {"int_field": True}, sample=2.5)
+
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert sql.endswith(
+        'WHERE "SAMPLE_TABLE".int_field IN (SELECT sample.int_field \n'
+        'FROM "SAMPLE_TABLE" AS sample TABLESAMPLE system(2.5))'
+    )
+
+
+def test_schema():
+    schema = build_engine().get_schema()
+
+    assert (
+        "sample_tables(filter: sample_table_filter, order: sample_table_order, sample: Float)"
+        in schema
+    )
+    assert (
+        "  sample_tables_count(filter: sample_table_filter, approximate: Boolean = false): Int!\n"
+        in schema
+    )
+
+
+def test_schema_not_opted_in():
+    engine = AlchemyQLSync()
+    engine.register(H_Table)
+    engine.build_schema()
+    schema = engine.get_schema()
+
+    assert "sample" not in schema.replace("sample_table", "")
+    assert "_count" not in schema
+
+
+class Base(DeclarativeBase): ...
+
+
+class Keyed(Base):
+    __tablename__ = "KEYED"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+
+
+def test_sample_requires_integer_key():
+    with pytest.raises(ConfigurationError, match="Sampling requires a single integer"):
+        AlchemyQLSync().register(Keyed, sample=True)
+
+
+def test_count_field_in_use():
+    engine = AlchemyQLSync()
+    engine.register(H_Table, graphql_name="sample_tables_count", pk_lookup=True)
+    engine.register(A_Table, row_count=True)
+
+    with pytest.raises(ConfigurationError, match="sample_tables_count is already"):
+        engine.build_schema()
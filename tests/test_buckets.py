@@ -0,0 +1,198 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.buckets import build_bucket_stmt
+from alchemyql.errors import ConfigurationError
+from alchemyql.scalars import Interval
+
+from .databases.a import A_Table
+from .databases.h import H_Table
+
+
+def build_engine(cls=AlchemyQLSync, **kwargs):
+    engine = cls(**kwargs)
+    engine.register(
+        A_Table,
+        filter_fields=["enum_field", "int_field"],
+        bucket_fields=["datetime_field"],
+        aggregate_fields=["int_field", "float_field"],
+        pagination=True,
+    )
+    engine.build_schema()
+    return engine
+
+
+def test_buckets(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("A") as db:
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            "query { sample_table_buckets (by: datetime_field, interval: YEAR, filter: {enum_field: {eq: ODD}}) { bucket count int_field_sum int_field_avg int_field_max } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_table_buckets"] == [
+            {
+                "bucket": "2000-01-01T00:00:00",
+                "count": 3,
+                "int_field_sum": 9,
+                "int_field_avg": 3.0,
+                "int_field_max": 5,
+            }
+        ]
+        # Rows are grouped in SQL (only the selected aggregates are computed)
+        assert len(statements) == 1
+        assert "GROUP BY strftime('%Y-01-01 00:00:00'" in statements[0]
+        assert "float_field" not in statements[0]
+
+
+@pytest.mark.parametrize(
+    "interval,expected",
+    [
+        ("MINUTE", "2000-01-01T01:01:00"),
+        ("HOUR", "2000-01-01T01:00:00"),
+        ("DAY", "2000-01-01T00:00:00"),
+        # Weeks start on monday
+        ("WEEK", "1999-12-27T00:00:00"),
+        ("MONTH", "2000-01-01T00:00:00"),
+    ],
+)
+def test_intervals(db_sync, interval, expected):
+    engine = build_engine()
+    with db_sync("A") as db:
+        res = engine.execute_query(
+            f"query {{ sample_table_buckets (by: datetime_field, interval: {interval}, limit: 2) {{ bucket count }} }}",
+            db,
+        )
+
+        assert res.errors is None
+        assert len(res.data["sample_table_buckets"]) == 2
+        assert res.data["sample_table_buckets"][0] == {"bucket": expected, "count": 1}
+
+
+async def test_date_buckets_async(db_async):
+    engine = AlchemyQLAsync()
+    engine.register(A_Table, bucket_fields=["date_field"], pagination=True)
+    engine.build_schema()
+    async with db_async("A") as db:
+        res = await engine.execute_query(
+            "query { sample_table_buckets (by: date_field, interval: WEEK, offset: 3) { bucket count } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_table_buckets"] == [
+            {"bucket": "2000-04-03", "count": 1},
+            {"bucket": "2000-05-01", "count": 1},
+        ]
+
+        res = await engine.execute_query(
+            "query { sample_table_buckets (by: date_field, interval: HOUR) { bucket } }",
+            db,
+        )
+
+        assert res.errors[0].message == (
+            "Date fields cannot be bucketed by HOUR (field=date_field)"
+        )
+
+
+def test_computed_aggregate(db_sync):
+    engine = AlchemyQLSync()
+    engine.register(
+        H_Table,
+        computed_fields=["total"],
+        bucket_fields=["joined"],
+        aggregate_fields=["total"],
+    )
+    engine.build_schema()
+    with db_sync("H") as db:
+        res = engine.execute_query(
+            "query { sample_table_buckets (by: joined, interval: MONTH) { bucket total_sum total_min } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_table_buckets"] == [
+            {"bucket": "2024-01-01", "total_sum": 27, "total_min": 12},
+            {"bucket": "2024-02-01", "total_sum": 9, "total_min": 9},
+        ]
+
+
+def test_postgresql_statement():
+    engine = build_engine()
+    stmt = build_bucket_stmt(
+        engine.tables[0], {"float_field_avg": True}, "datetime_field", Interval.DAY
+    )
+
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert sql.startswith(
+        "SELECT date_trunc('day', \"SAMPLE_TABLE\".datetime_field) AS bucket, count(*) AS count, "
+        'avg("SAMPLE_TABLE".float_field) AS float_field_avg'
+    )
+    assert sql.endswith(
+        "GROUP BY date_trunc('day', \"SAMPLE_TABLE\".datetime_field) "
+        "ORDER BY date_trunc('day', \"SAMPLE_TABLE\".datetime_field)"
+    )
+
+
+def test_postgresql_date_statement():
+    engine = AlchemyQLSync()
+    engine.register(A_Table, bucket_fields=["date_field"])
+    stmt = build_bucket_stmt(engine.tables[0], {}, "date_field", Interval.MONTH)
+
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    # Date buckets are cast back to dates
+    assert sql.startswith(
+        "SELECT CAST(date_trunc('month', \"SAMPLE_TABLE\".date_field) AS DATE) AS bucket"
+    )
+
+
+def test_schema():
+    schema = build_engine().get_schema()
+
+    assert (
+        "  sample_table_buckets(by: sample_table_bucket_field!, interval: Interval!, filter: sample_table_filter, limit: Int = null, offset: Int = 0): [sample_table_bucket]\n"
+        in schema
+    )
+    assert "  bucket: DateTime\n" in schema
+    assert "  int_field_avg: Float\n" in schema
+    assert "  float_field_sum: Float\n" in schema
+
+
+@pytest.mark.parametrize(
+    "kwargs,match",
+    [
+        ({"aggregate_fields": ["int_field"]}, "Aggregate fields require bucket fields"),
+        ({"bucket_fields": ["string_field"]}, "not supported for bucketing"),
+        (
+            {"bucket_fields": ["date_field"], "aggregate_fields": ["bool_field"]},
+            "not supported for aggregating",
+        ),
+        (
+            {"bucket_fields": ["date_field", "datetime_field"]},
+            "Bucket fields must all be dates or all be datetimes",
+        ),
+        (
+            {"bucket_fields": ["date_field"], "shards": {"a": sessionmaker()}},
+            "Bucket fields are not supported for sharded tables",
+        ),
+    ],
+)
+def test_register_errors(kwargs, match):
+    with pytest.raises(ConfigurationError, match=match):
+        AlchemyQLSync().register(A_Table, **kwargs)
+
+
+def test_query_field_in_use():
+    engine = AlchemyQLSync()
+    engine.register(H_Table, graphql_name="sample_table_bucket")
+    engine.register(A_Table, bucket_fields=["date_field"])
+
+    with pytest.raises(ConfigurationError, match="sample_table_buckets is already"):
+        engine.build_schema()
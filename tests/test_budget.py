@@ -0,0 +1,145 @@
+import pytest
+from sqlalchemy import event
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+
+from .databases.a import A_Table
+from .databases.d import D_Table_1, D_Table_2, D_Table_3
+
+modes = pytest.mark.parametrize(
+    "engine_kwargs", [{}, {"batch_relationships": True}], ids=["joined", "batched"]
+)
+
+
+def build_engine_a(cls, **kwargs):
+    engine = cls(**kwargs)
+    engine.register(A_Table)
+    engine.build_schema()
+    return engine
+
+
+def build_engine_d(cls, **kwargs):
+    engine = cls(**kwargs)
+    engine.register(D_Table_1, relationships=["t2_rel", "t3_rel"])
+    engine.register(D_Table_2, relationships=["t1_rel"])
+    engine.register(D_Table_3, relationships=["t1_rel"])
+    engine.build_schema()
+    return engine
+
+
+def assert_over_budget(res, message: str):
+    assert res.errors is not None
+    assert message in res.errors[0].message
+
+
+@pytest.mark.parametrize(
+    "query,max_rows,ok",
+    [
+        # 5 root rows
+        ("query { sample_table_1s { int_field } }", 5, True),
+        ("query { sample_table_1s { int_field } }", 4, False),
+        # 5 root rows + 5 to-one rows
+        ("query { sample_table_1s { t2_rel { int_field } } }", 10, True),
+        ("query { sample_table_1s { t2_rel { int_field } } }", 9, False),
+        # 5 root rows + 5 nested rows
+        ("query { sample_table_1s { t3_rel { int_field } } }", 10, True),
+        ("query { sample_table_1s { t3_rel { int_field } } }", 6, False),
+        # Budget is shared across root fields
+        (
+            "query { sample_table_1s { int_field } sample_table_3s { int_field } }",
+            9,
+            False,
+        ),
+    ],
+)
+@modes
+def test_max_rows_sync(db_sync, query, max_rows, ok, engine_kwargs):
+    engine = build_engine_d(AlchemyQLSync, max_rows=max_rows, **engine_kwargs)
+
+    with db_sync("D") as db:
+        res = engine.execute_query(query=query, db_session=db)
+
+        if ok:
+            assert res.errors is None
+        else:
+            assert_over_budget(res, "maximum number of rows")
+
+
+@pytest.mark.parametrize(
+    "query,max_rows,ok",
+    [
+        ("query { sample_table_1s { int_field } }", 5, True),
+        ("query { sample_table_1s { int_field } }", 4, False),
+        ("query { sample_table_1s { t3_rel { int_field } } }", 10, True),
+        ("query { sample_table_1s { t3_rel { int_field } } }", 6, False),
+    ],
+)
+@modes
+async def test_max_rows_async(db_async, query, max_rows, ok, engine_kwargs):
+    engine = build_engine_d(AlchemyQLAsync, max_rows=max_rows, **engine_kwargs)
+
+    async with db_async("D") as db:
+        res = await engine.execute_query(query=query, db_session=db)
+
+        if ok:
+            assert res.errors is None
+        else:
+            assert_over_budget(res, "maximum number of rows")
+
+
+def test_max_rows_limits_sql_sync(db_sync):
+    engine = build_engine_a(AlchemyQLSync, max_rows=2)
+
+    with db_sync("A") as db:
+        statements = []
+
+        @event.listens_for(db.get_bind(), "before_cursor_execute")
+        def _record(conn, cursor, statement, parameters, *args):
+            statements.append((statement, parameters))
+
+        res = engine.execute_query(
+            query="query { sample_tables { int_field } }", db_session=db
+        )
+
+        assert_over_budget(res, "maximum number of rows")
+        # Only 1 row more than the budget is loaded
+        assert "LIMIT" in statements[0][0]
+        assert 3 in statements[0][1]
+
+
+@modes
+def test_max_response_size_sync(db_sync, engine_kwargs):
+    query = "query { sample_table_1s { string_field t3_rel { string_field } } }"
+
+    engine = build_engine_d(AlchemyQLSync, max_response_size=1000, **engine_kwargs)
+    with db_sync("D") as db:
+        res = engine.execute_query(query=query, db_session=db)
+        assert res.errors is None
+
+    engine = build_engine_d(AlchemyQLSync, max_response_size=100, **engine_kwargs)
+    with db_sync("D") as db:
+        res = engine.execute_query(query=query, db_session=db)
+        assert_over_budget(res, "maximum response size")
+
+
+async def test_max_response_size_async(db_async):
+    engine = build_engine_a(AlchemyQLAsync, max_response_size=100)
+
+    async with db_async("A") as db:
+        res = await engine.execute_query(
+            query="query { sample_tables { string_field date_field datetime_field } }",
+            db_session=db,
+        )
+        assert_over_budget(res, "maximum response size")
+
+
+def test_auto_limit_sync(db_sync):
+    engine = build_engine_a(AlchemyQLSync, auto_limit=2)
+
+    with db_sync("A") as db:
+        res = engine.execute_query(
+            query="query { sample_tables { int_field } }", db_session=db
+        )
+
+        assert res.errors is None
+        assert len(res.data["sample_tables"]) == 2
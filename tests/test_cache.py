@@ -0,0 +1,350 @@
+import pytest
+from sqlalchemy import ForeignKey, delete, update
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.cache import CacheBackend, EntityCache, LRUCache
+from alchemyql.loader import foreign_key_fields
+
+from .databases.d import D_Table_1, D_Table_2, D_Table_3
+
+
+def build_engine(cls, backend=None, **kwargs):
+    engine = cls(**kwargs)
+    engine.register(
+        D_Table_1,
+        include_fields=["int_field", "string_field"],
+        relationships=["t2_rel"],
+        pk_lookup=True,
+        cache=True,
+        cache_backend=backend,
+    )
+    engine.register(D_Table_2, relationships=["t1_rel"], cache=True)
+    engine.register(D_Table_3, relationships=["t1_rel"], pk_lookup=True)
+    engine.build_schema()
+    return engine
+
+
+class DictBackend(CacheBackend):
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ttl):
+        self.values[key] = value
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.set("a", 1, None)
+    cache.set("b", 2, None)
+    cache.get("a")
+    cache.set("c", 3, None)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_lru_cache_ttl(monkeypatch):
+    now = 100.0
+    monkeypatch.setattr("alchemyql.cache.time.monotonic", lambda: now)
+
+    cache = LRUCache(10)
+    cache.set("a", 1, 5)
+    assert cache.get("a") == 1
+
+    now = 105.0
+    assert cache.get("a") is None
+    assert cache.values == {}
+
+
+def test_entity_cache_missing_fields():
+    backend = DictBackend()
+    cache = EntityCache(D_Table_1, ["int_field"], backend, None)
+    backend.set(cache.key((1,)), {"int_field": 1}, None)
+
+    assert cache.get((1,), {"int_field": True}) == {"int_field": 1}
+    assert cache.get((1,), {"string_field": True}) is None
+
+
+class Base(DeclarativeBase): ...
+
+
+class Country(Base):
+    __tablename__ = "COUNTRY"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    code: Mapped[str] = mapped_column(unique=True)
+
+
+class City(Base):
+    __tablename__ = "CITY"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    country_code: Mapped[str] = mapped_column(ForeignKey("COUNTRY.code"))
+
+    country: Mapped[Country] = relationship()
+
+
+@pytest.mark.parametrize(
+    "rel,expected",
+    [
+        (D_Table_1.t2_rel, ["t2_int_field"]),
+        (D_Table_3.t1_rel, ["t1_int_field"]),
+        # One-to-one backref & one-to-many
+        (D_Table_2.t1_rel, None),
+        (D_Table_1.t3_rel, None),
+        # Many-to-many
+        (D_Table_2.t3_rel, None),
+        # Foreign key not referencing the primary key
+        (City.country, None),
+    ],
+)
+def test_foreign_key_fields(rel, expected):
+    assert foreign_key_fields(rel.property) == expected
+
+
+lookup_query = "query { sample_table_1s_by_pk(ids: [1, 2]) { int_field string_field } }"
+lookup_expected = {
+    "sample_table_1s_by_pk": [
+        {"int_field": 1, "string_field": "One"},
+        {"int_field": 2, "string_field": "Two"},
+    ]
+}
+
+
+@pytest.mark.parametrize("engine_kwargs", [{}, {"batch_relationships": True}])
+def test_lookup_cached_sync(db_sync, engine_kwargs, record_statements):
+    engine = build_engine(AlchemyQLSync, **engine_kwargs)
+    with db_sync("D") as db:
+        statements = record_statements(db)
+
+        assert engine.execute_query(lookup_query, db).data == lookup_expected
+        assert len(statements) == 1
+
+        # Rows are served by the cache (not the session's identity map)
+        db.expunge_all()
+        assert engine.execute_query(lookup_query, db).data == lookup_expected
+        assert len(statements) == 1
+
+
+async def test_lookup_cached_async(db_async, record_statements):
+    engine = build_engine(AlchemyQLAsync)
+    async with db_async("D") as db:
+        statements = record_statements(db)
+
+        assert (await engine.execute_query(lookup_query, db)).data == lookup_expected
+        db.expunge_all()
+        assert (await engine.execute_query(lookup_query, db)).data == lookup_expected
+        assert len(statements) == 1
+
+
+def test_lookup_relationships_not_cached_sync(db_sync, record_statements):
+    engine = build_engine(AlchemyQLSync)
+    query = "query { sample_table_1(int_field: 1) { int_field t2_rel { int_field } } }"
+    with db_sync("D") as db:
+        statements = record_statements(db)
+
+        for _ in range(2):
+            db.expunge_all()
+            res = engine.execute_query(query, db)
+
+            assert res.data == {
+                "sample_table_1": {"int_field": 1, "t2_rel": {"int_field": 1}}
+            }
+        assert len(statements) == 2
+
+
+def test_lookup_custom_backend_sync(db_sync):
+    backend = DictBackend()
+    engine = build_engine(AlchemyQLSync, backend=backend)
+    with db_sync("D") as db:
+        engine.execute_query(lookup_query, db)
+
+        assert backend.values == {
+            "SAMPLE_TABLE_1:0:[1]": {"int_field": 1, "string_field": "One"},
+            "SAMPLE_TABLE_1:0:[2]": {"int_field": 2, "string_field": "Two"},
+        }
+
+
+relationship_query = (
+    "query { sample_table_3s { int_field t1_rel { int_field string_field } } }"
+)
+
+
+def relationship_expected(t1_rel: dict) -> dict:
+    t1_rels = {1: 1, 2: 2, 3: 1, 4: 2, 5: 1, 6: None}
+    return {
+        "sample_table_3s": [
+            {"int_field": i, "t1_rel": t1 and t1_rel[t1]} for i, t1 in t1_rels.items()
+        ]
+    }
+
+
+expected_t1_rel = {
+    1: {"int_field": 1, "string_field": "One"},
+    2: {"int_field": 2, "string_field": "Two"},
+}
+
+
+def test_many_to_one_cached_sync(db_sync, record_statements):
+    engine = build_engine(AlchemyQLSync, batch_relationships=True)
+    with db_sync("D") as db:
+        db.add(D_Table_3(int_field=6, string_field="Six", t1_int_field=None))
+        db.commit()
+        db.expunge_all()
+
+        statements = record_statements(db)
+        res = engine.execute_query(relationship_query, db)
+
+        assert res.data == relationship_expected(expected_t1_rel)
+        assert len(statements) == 2
+
+        # The relationship is served by the cache
+        db.expunge_all()
+        res = engine.execute_query(relationship_query, db)
+
+        assert res.data == relationship_expected(expected_t1_rel)
+        assert len(statements) == 3
+
+
+async def test_many_to_one_cached_async(db_async, record_statements):
+    engine = build_engine(AlchemyQLAsync, batch_relationships=True)
+    async with db_async("D") as db:
+        db.add(D_Table_3(int_field=6, string_field="Six", t1_int_field=None))
+        await db.commit()
+        db.expunge_all()
+
+        statements = record_statements(db)
+        for _ in range(2):
+            db.expunge_all()
+            res = await engine.execute_query(relationship_query, db)
+
+            assert res.data == relationship_expected(expected_t1_rel)
+        assert len(statements) == 3
+
+
+def test_many_to_one_foreign_key_not_loaded_sync(db_sync, record_statements):
+    engine = build_engine(AlchemyQLSync, batch_relationships=True)
+    query = "query { sample_table_3(int_field: 1) { int_field t1_rel { int_field } } }"
+    with db_sync("D") as db:
+        obj = db.get(D_Table_3, 1)
+        db.expire(obj, ["t1_int_field"])
+
+        statements = record_statements(db)
+        res = engine.execute_query(query, db)
+
+        assert res.data == {
+            "sample_table_3": {"int_field": 1, "t1_rel": {"int_field": 1}}
+        }
+        # Loaded by the relationship (from the identity of the object)
+        assert len(statements) == 1
+        assert "JOIN" in statements[0]
+
+
+@pytest.mark.parametrize("end", ["commit", "rollback"])
+def test_invalidation_sync(db_sync, end):
+    engine = build_engine(AlchemyQLSync)
+    query = "query { sample_table_1(int_field: 1) { string_field } }"
+    with db_sync("D") as db:
+        engine.execute_query(query, db)
+
+        obj = db.get(D_Table_1, 1)
+        obj.string_field = "Updated"
+        db.flush()
+
+        # Invalidated on flush
+        db.expunge_all()
+        res = engine.execute_query(query, db)
+        assert res.data == {"sample_table_1": {"string_field": "Updated"}}
+
+        # Invalidated again at the end of the transaction
+        getattr(db, end)()
+        db.expunge_all()
+        res = engine.execute_query(query, db)
+        expected = "Updated" if end == "commit" else "One"
+        assert res.data == {"sample_table_1": {"string_field": expected}}
+
+
+def test_invalidation_delete_sync(db_sync):
+    engine = build_engine(AlchemyQLSync)
+    query = "query { sample_table_1(int_field: 2) { string_field } }"
+    with db_sync("D") as db:
+        res = engine.execute_query(query, db)
+        assert res.data == {"sample_table_1": {"string_field": "Two"}}
+
+        db.delete(db.get(D_Table_1, 2))
+        db.flush()
+
+        db.expunge_all()
+        res = engine.execute_query(query, db)
+        assert res.data == {"sample_table_1": None}
+
+
+@pytest.mark.parametrize("query", [lookup_query, relationship_query])
+def test_uncommitted_changes_not_cached_sync(db_sync, query):
+    backend = DictBackend()
+    engine = build_engine(AlchemyQLSync, backend=backend, batch_relationships=True)
+    with db_sync("D") as db:
+        obj = db.get(D_Table_1, 1)
+        obj.string_field = "Uncommitted"
+        db.flush()
+
+        # Rows loaded within the transaction are not cached
+        db.expunge_all()
+        res = engine.execute_query(query, db)
+        assert "Uncommitted" in str(res.data)
+        assert backend.values == {}
+
+        db.rollback()
+        engine.execute_query(query, db)
+        assert backend.values["SAMPLE_TABLE_1:0:[1]"]["string_field"] == "One"
+
+
+@pytest.mark.parametrize("end", ["commit", "rollback"])
+def test_invalidation_bulk_sync(db_sync, end):
+    engine = build_engine(AlchemyQLSync)
+    query = "query { sample_table_1(int_field: 1) { string_field } }"
+    with db_sync("D") as db:
+        engine.execute_query(query, db)
+
+        db.execute(
+            update(D_Table_1)
+            .where(D_Table_1.string_field == "One")
+            .values(string_field="Updated")
+        )
+
+        # Invalidated on execute
+        db.expunge_all()
+        res = engine.execute_query(query, db)
+        assert res.data == {"sample_table_1": {"string_field": "Updated"}}
+
+        # Invalidated again at the end of the transaction
+        getattr(db, end)()
+        db.expunge_all()
+        res = engine.execute_query(query, db)
+        expected = "Updated" if end == "commit" else "One"
+        assert res.data == {"sample_table_1": {"string_field": expected}}
+
+
+def test_invalidation_bulk_delete_sync(db_sync):
+    engine = build_engine(AlchemyQLSync)
+    query = "query { sample_table_1(int_field: 2) { string_field } }"
+    with db_sync("D") as db:
+        engine.execute_query(query, db)
+
+        # Statements on other tables do not invalidate the cache
+        db.execute(delete(D_Table_3).where(D_Table_3.int_field == 2))
+        assert engine.tables[0].cache.generation == 0
+
+        db.execute(delete(D_Table_1).where(D_Table_1.int_field == 2))
+
+        db.expunge_all()
+        res = engine.execute_query(query, db)
+        assert res.data == {"sample_table_1": None}
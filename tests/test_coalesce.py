@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from alchemyql import AlchemyQLAsync
+
+from .databases.a import A_Table
+
+query = (
+    "query ($i: Int) { sample_tables (filter: {int_field: {eq: $i}}) { string_field } }"
+)
+
+
+def build_engine(**kwargs):
+    engine = AlchemyQLAsync(**kwargs)
+    engine.register(A_Table, filter_fields=["int_field"])
+    engine.build_schema()
+    return engine
+
+
+async def test_identical_queries_coalesced(db_async, record_statements):
+    engine = build_engine(coalesce=True)
+    async with db_async("A") as db:
+        statements = record_statements(db)
+
+        results = await asyncio.gather(
+            *[engine.execute_query(query, db, {"i": 1}) for _ in range(3)]
+        )
+
+        assert len(statements) == 1
+        assert results[0].data == {"sample_tables": [{"string_field": "One"}]}
+        assert all(res is results[0] for res in results)
+        assert engine.coalescer.stats.executions == 1  # type: ignore
+        assert engine.coalescer.stats.coalesced == 2  # type: ignore
+
+
+@pytest.mark.parametrize(
+    "other",
+    [
+        {"variables": {"i": 2}},
+        {"variables": {"i": 1}, "coalesce_scope": "tenant_b"},
+        {"variables": {"i": 1}, "timeout": 10},
+    ],
+)
+async def test_different_queries_not_coalesced(db_async, other, record_statements):
+    engine = build_engine(coalesce=True)
+    async with db_async("A") as db:
+        statements = record_statements(db)
+
+        await asyncio.gather(
+            engine.execute_query(
+                query, db, variables={"i": 1}, coalesce_scope="tenant_a"
+            ),
+            engine.execute_query(query, db, **{"coalesce_scope": "tenant_a", **other}),
+        )
+
+        assert len(statements) == 2
+        assert engine.coalescer.stats.coalesced == 0  # type: ignore
+
+
+async def test_different_sessions_not_coalesced(db_async, record_statements):
+    engine = build_engine(coalesce=True)
+    async with db_async("A") as db, db_async("A") as other:
+        statements = record_statements(db)
+        other_statements = record_statements(other)
+
+        results = await asyncio.gather(
+            engine.execute_query(query, db, {"i": 1}),
+            engine.execute_query(query, other, {"i": 1}),
+        )
+
+        assert len(statements) == len(other_statements) == 1
+        assert results[0] is not results[1]
+        assert engine.coalescer.stats.coalesced == 0  # type: ignore
+
+
+async def test_engine_sessions_coalesced(db_async, record_statements):
+    async with db_async("A") as db:
+        factory = sessionmaker(bind=db.bind, class_=AsyncSession)  # type: ignore
+        engine = build_engine(coalesce=True, session_factory=factory)
+        statements = record_statements(db)
+
+        results = await asyncio.gather(
+            *[engine.execute_query(query, variables={"i": 1}) for _ in range(2)]
+        )
+
+        assert len(statements) == 1
+        assert results[0] is results[1]
+        assert engine.coalescer.stats.coalesced == 1  # type: ignore
+
+
+async def test_sequential_queries_not_coalesced(db_async, record_statements):
+    engine = build_engine(coalesce=True)
+    async with db_async("A") as db:
+        statements = record_statements(db)
+
+        for _ in range(2):
+            await engine.execute_query(query, db, {"i": 1})
+
+        assert len(statements) == 2
+        assert engine.coalescer.in_flight == {}  # type: ignore
+
+
+async def test_cancelled_request_does_not_cancel_execution(db_async):
+    engine = build_engine(coalesce=True)
+    async with db_async("A") as db:
+        first = asyncio.ensure_future(engine.execute_query(query, db, {"i": 1}))
+        second = asyncio.ensure_future(engine.execute_query(query, db, {"i": 1}))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        res = await second
+
+        assert first.cancelled()
+        assert res.data == {"sample_tables": [{"string_field": "One"}]}
+
+
+async def test_coalescing_disabled(db_async, record_statements):
+    engine = build_engine()
+    async with db_async("A") as db:
+        statements = record_statements(db)
+
+        await asyncio.gather(
+            *[engine.execute_query(query, db, {"i": 1}) for _ in range(2)]
+        )
+
+        assert engine.coalescer is None
+        assert len(statements) == 2
@@ -0,0 +1,194 @@
+import asyncio
+
+import pytest
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.errors import ConfigurationError
+
+from .databases.h import H_Table
+
+
+def build_engine(cls=AlchemyQLSync, **kwargs):
+    engine = cls()
+    engine.register(
+        H_Table,
+        computed_fields=["total"],
+        filter_fields=["int_field", "full_name", "total"],
+        order_fields=["int_field", "full_name", "total"],
+        default_order={"int_field": "ASC"},
+        pk_lookup=True,
+        **kwargs,
+    )
+    engine.build_schema()
+    return engine
+
+
+def test_computed_in_select(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("H") as db:
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            "query { sample_tables { int_field full_name total } }", db
+        )
+
+        assert res.errors is None
+        assert res.data["sample_tables"] == [
+            {"int_field": 1, "full_name": "Ada Lovelace", "total": 15},
+            {"int_field": 2, "full_name": "Alan Turing", "total": 12},
+            {"int_field": 3, "full_name": "Grace Hopper", "total": 9},
+        ]
+        # The fields are computed by the database, in the same query
+        assert len(statements) == 1
+        assert "coalesce" in statements[0]
+
+
+def test_computed_not_selected(db_sync, int_fields, record_statements):
+    engine = build_engine()
+    with db_sync("H") as db:
+        statements = record_statements(db)
+
+        res = engine.execute_query("query { sample_tables { int_field } }", db)
+
+        assert int_fields(res) == [1, 2, 3]
+        assert "coalesce" not in statements[0]
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ("filter: {total: {gt: 10}}", [1, 2]),
+        ('filter: {full_name: {startswith: "Al"}}', [2]),
+        ("filter: {total: {le: 12}}, order: {total: DESC}", [2, 3]),
+        ("order: {full_name: DESC}", [3, 2, 1]),
+    ],
+)
+def test_filter_and_order(db_sync, query, expected, int_fields):
+    engine = build_engine()
+    with db_sync("H") as db:
+        res = engine.execute_query(
+            f"query {{ sample_tables ({query}) {{ int_field }} }}", db
+        )
+
+        assert int_fields(res) == expected
+
+
+async def test_computed_async(db_async):
+    engine = build_engine(AlchemyQLAsync, micro_batch_window=0.002)
+    async with db_async("H") as db:
+        res = await engine.execute_query(
+            "query { a: sample_table (int_field: 3) { total } b: sample_tables (filter: {total: {eq: 12}}) { int_field total } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data == {
+            "a": {"total": 9},
+            "b": [{"int_field": 2, "total": 12}],
+        }
+
+
+async def test_computed_micro_batched(db_async, record_statements):
+    async with db_async("H") as db:
+        engine = AlchemyQLAsync(
+            session_factory=sessionmaker(bind=db.bind, class_=AsyncSession)
+        )
+        engine.register(
+            H_Table, computed_fields=["total"], pk_lookup=True, micro_batch_window=0.002
+        )
+        engine.build_schema()
+        statements = record_statements(db)
+
+        results = await asyncio.gather(
+            *[
+                engine.execute_query(
+                    f"query {{ sample_table (int_field: {i}) {{ int_field total }} }}"
+                )
+                for i in [1, 3]
+            ]
+        )
+
+        assert [res.data["sample_table"] for res in results] == [
+            {"int_field": 1, "total": 15},
+            {"int_field": 3, "total": 9},
+        ]
+        # Computed in the batched query
+        assert len(statements) == 1
+
+
+def test_computed_not_cached(db_sync, record_statements):
+    engine = build_engine(cache=True)
+    with db_sync("H") as db:
+        # Rows held by the session's identity map
+        rows = db.scalars(select(H_Table)).all()
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            "query { sample_tables_by_pk (ids: [1, 2]) { total } }", db
+        )
+
+        assert res.errors is None
+        assert res.data["sample_tables_by_pk"] == [{"total": 15}, {"total": 12}]
+        assert len(rows) == 3
+        # Rows held by the identity map have their fields computed by 1 batched query
+        assert len(statements) == 1
+        assert "coalesce" in statements[0]
+
+
+async def test_computed_loaded_async(db_async):
+    engine = build_engine(AlchemyQLAsync)
+    async with db_async("H") as db:
+        rows = (await db.scalars(select(H_Table))).all()
+
+        res = await engine.execute_query(
+            "query { sample_table (int_field: 2) { int_field total } }", db
+        )
+
+        assert res.errors is None
+        assert res.data["sample_table"] == {"int_field": 2, "total": 12}
+        assert len(rows) == 3
+
+
+def test_mapped_class_not_modified(db_sync):
+    engines = [build_engine(), build_engine()]
+
+    assert not any(
+        key.startswith("_alchemyql_") for key in inspect(H_Table).attrs.keys()
+    )
+    with db_sync("H") as db:
+        for engine in engines:
+            res = engine.execute_query(
+                "query { sample_table (int_field: 3) { total } }", db
+            )
+
+            assert res.errors is None
+            assert res.data["sample_table"] == {"total": 9}
+
+
+def test_schema():
+    schema = build_engine().get_schema()
+
+    assert "  full_name: String\n" in schema
+    assert "  total: Int\n" in schema
+    assert "_alchemyql_" not in schema
+
+
+@pytest.mark.parametrize(
+    "kwargs,match",
+    [
+        ({"computed_fields": ["score"]}, "Computed field score is not a hybrid"),
+        ({"computed_fields": ["name_length"]}, "name_length has no SQL type"),
+        (
+            {"computed_fields": ["total"], "shards": {"a": sessionmaker()}},
+            "Computed fields are not supported for sharded tables",
+        ),
+        ({"filter_fields": ["total"]}, "Field total does not exist"),
+        ({"search_fields": ["full_name"]}, "full_name is not a table column"),
+    ],
+)
+def test_register_errors(kwargs, match):
+    with pytest.raises(ConfigurationError, match=match):
+        AlchemyQLSync().register(H_Table, **kwargs)
@@ -0,0 +1,221 @@
+import pytest
+from sqlalchemy import (
+    JSON,
+    Column,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Integer,
+    MetaData,
+    Table,
+)
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.errors import ConfigurationError
+
+from .databases.a import A_Table
+from .databases.d import D_Table_1, D_Table_2, D_Table_3
+
+T1 = D_Table_1.__table__
+T2 = D_Table_2.__table__
+T3 = D_Table_3.__table__
+
+
+def build_engine(cls=AlchemyQLSync, **kwargs):
+    engine = cls(**kwargs)
+    engine.register_table(
+        T1,
+        relationships=["sample_table_2", "sample_table_3"],
+        filter_fields=["int_field", "string_field"],
+        order_fields=["int_field"],
+        default_order={"int_field": "ASC"},
+        pagination=True,
+        pk_lookup=True,
+    )
+    engine.register_table(T2, relationships=["sample_table_1"], query=False)
+    engine.register_table(T3, relationships=["sample_table_1"], query=False)
+    engine.build_schema()
+    return engine
+
+
+def test_core_rows(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("D") as db:
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            "query { sample_table_1s (filter: {int_field: {le: 2}}) { string_field sample_table_2 { string_field } sample_table_3 { int_field sample_table_1 { int_field } } } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_table_1s"] == [
+            {
+                "string_field": "One",
+                "sample_table_2": {"string_field": "One"},
+                "sample_table_3": [
+                    {"int_field": 1, "sample_table_1": {"int_field": 1}},
+                    {"int_field": 3, "sample_table_1": {"int_field": 1}},
+                    {"int_field": 5, "sample_table_1": {"int_field": 1}},
+                ],
+            },
+            {
+                "string_field": "Two",
+                "sample_table_2": {"string_field": "Two"},
+                "sample_table_3": [
+                    {"int_field": 2, "sample_table_1": {"int_field": 2}},
+                    {"int_field": 4, "sample_table_1": {"int_field": 2}},
+                ],
+            },
+        ]
+        # 1 query per level & relationship
+        assert len(statements) == 4
+        # No ORM objects are loaded
+        assert len(db.identity_map) == 0
+
+
+def test_selected_columns(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("D") as db:
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            "query { sample_table_1s (order: {int_field: DESC}, limit: 2) { string_field } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_table_1s"] == [
+            {"string_field": "Five"},
+            {"string_field": "Four"},
+        ]
+        assert statements[0].startswith('SELECT "SAMPLE_TABLE_1".string_field \nFROM')
+
+
+async def test_core_rows_async(db_async):
+    engine = build_engine(AlchemyQLAsync, offload_threshold=1)
+    async with db_async("D") as db:
+        res = await engine.execute_query(
+            "query { sample_table_1_by_pk: sample_table_1s_by_pk (ids: [3, 9, 1]) { int_field sample_table_2 { sample_table_1 { string_field } } } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_table_1_by_pk"] == [
+            {
+                "int_field": 3,
+                "sample_table_2": {"sample_table_1": [{"string_field": "Three"}]},
+            },
+            None,
+            {
+                "int_field": 1,
+                "sample_table_2": {"sample_table_1": [{"string_field": "One"}]},
+            },
+        ]
+
+
+def test_lookup(db_sync):
+    engine = build_engine()
+    with db_sync("D") as db:
+        res = engine.execute_query(
+            "query { sample_table_1 (int_field: 4) { string_field sample_table_3 { int_field } } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_table_1"] == {
+            "string_field": "Four",
+            "sample_table_3": [],
+        }
+
+
+def test_orm_target(db_sync):
+    engine = AlchemyQLSync()
+    engine.register_table(T1, relationships=["sample_table_2"])
+    engine.register(D_Table_2, query=False)
+    engine.build_schema()
+    with db_sync("D") as db:
+        res = engine.execute_query(
+            "query { sample_table_1s { sample_table_2 { int_field } } }", db
+        )
+
+        assert res.errors is None
+        assert res.data["sample_table_1s"][0] == {"sample_table_2": {"int_field": 1}}
+
+
+def test_enum_and_json_columns(db_sync):
+    engine = AlchemyQLSync()
+    engine.register_table(
+        A_Table.__table__, include_fields=["int_field", "enum_field", "json_field"]
+    )
+    engine.build_schema()
+    with db_sync("A") as db:
+        res = engine.execute_query(
+            'query { sample_tables { enum_field key: json_field_path (path: "key") } }',
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_tables"][:2] == [
+            {"enum_field": "ODD", "key": "One"},
+            {"enum_field": "EVEN", "key": "Two"},
+        ]
+
+
+def test_schema():
+    schema = build_engine().get_schema()
+
+    assert "  sample_table_2: sample_table_2\n" in schema
+    assert "  sample_table_3: [sample_table_3]\n" in schema
+
+
+metadata = MetaData()
+
+Node = Table(
+    "NODE",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("parent_id", ForeignKey("NODE.id")),
+    Column("data", JSON),
+)
+
+Edge = Table(
+    "EDGE",
+    metadata,
+    Column("a", Integer, primary_key=True),
+    Column("b", Integer, primary_key=True),
+    Column("node_id", Integer),
+    Column("node", Integer),
+    ForeignKeyConstraint(["a", "b"], ["PAIR.a", "PAIR.b"]),
+    ForeignKeyConstraint(["node_id"], ["NODE.id"]),
+)
+
+Pair = Table(
+    "PAIR",
+    metadata,
+    Column("a", Integer, primary_key=True),
+    Column("b", Integer, primary_key=True),
+)
+
+
+@pytest.mark.parametrize(
+    "table,kwargs,match",
+    [
+        (Node, {"relationships": ["other"]}, "relationship other does not exist"),
+        (Node, {"relationships": ["node"]}, "Relationship node of NODE is ambiguous"),
+        (Edge, {"relationships": ["pair"]}, "relationship pair does not exist"),
+        (Edge, {"relationships": ["node"]}, "Field node already exists for EDGE"),
+    ],
+)
+def test_register_errors(table, kwargs, match):
+    with pytest.raises(ConfigurationError, match=match):
+        AlchemyQLSync().register_table(table, **kwargs)
+
+
+def test_target_not_registered():
+    engine = AlchemyQLSync()
+    engine.register_table(Node, relationships=["edge"])
+
+    with pytest.raises(
+        ConfigurationError, match="target table has not been registered"
+    ):
+        engine.build_schema()
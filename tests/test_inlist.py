@@ -0,0 +1,150 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.inlist import LargeIn, in_filter
+
+from .databases.a import A_Table
+from .databases.d import D_Table_1, D_Table_3
+
+
+def build_engine(cls=AlchemyQLSync, **kwargs):
+    engine = cls(in_list_threshold=2, **kwargs)
+    engine.register(
+        A_Table,
+        filter_fields=[
+            "int_field",
+            "string_field",
+            "enum_field",
+            "date_field",
+        ],
+        order_fields=["int_field"],
+        default_order={"int_field": "ASC"},
+    )
+    engine.build_schema()
+    return engine
+
+
+@pytest.mark.parametrize(
+    "filter,expected",
+    [
+        ("{int_field: {in: [5, 1, 3, 9]}}", [1, 3, 5]),
+        ('{string_field: {in: ["Two", "Four", "Six"]}}', [2, 4]),
+        ("{enum_field: {in: [ODD, ODD, ODD]}}", [1, 3, 5]),
+        ('{date_field: {in: ["2000-01-01", "2000-03-03", "1999-01-01"]}}', [1, 3]),
+    ],
+)
+def test_large_list_bound_as_json(
+    db_sync, filter, expected, int_fields, record_statements
+):
+    engine = build_engine()
+    with db_sync("A") as db:
+        statements = record_statements(db, parameters=True)
+
+        res = engine.execute_query(
+            f"query {{ sample_tables (filter: {filter}) {{ int_field }} }}", db
+        )
+
+        assert int_fields(res) == expected
+        statement, parameters = statements[0]
+        assert (
+            "IN (SELECT anon_1.value \nFROM json_each(?) AS anon_1) ORDER BY"
+            in statement
+        )
+        assert parameters[0].startswith("[")  # Values bound as 1 JSON parameter
+
+
+def test_small_list_expanded(db_sync, int_fields, record_statements):
+    engine = build_engine()
+    with db_sync("A") as db:
+        statements = record_statements(db, parameters=True)
+
+        res = engine.execute_query(
+            "query { sample_tables (filter: {int_field: {in: [4, 2]}}) { int_field } }",
+            db,
+        )
+
+        assert int_fields(res) == [2, 4]
+        assert "json_each" not in statements[0][0]
+        assert statements[0][1][:2] == (4, 2)
+
+
+def test_threshold_disabled(db_sync, int_fields, record_statements):
+    engine = AlchemyQLSync(in_list_threshold=None)
+    engine.register(A_Table, filter_fields=["int_field"])
+    engine.build_schema()
+    with db_sync("A") as db:
+        statements = record_statements(db, parameters=True)
+
+        res = engine.execute_query(
+            "query { sample_tables (filter: {int_field: {in: [1, 2, 3, 4]}}) { int_field } }",
+            db,
+        )
+
+        assert sorted(int_fields(res)) == [1, 2, 3, 4]
+        assert "json_each" not in statements[0][0]
+
+
+async def test_batched_relationships(db_async, record_statements):
+    engine = AlchemyQLAsync(in_list_threshold=2, batch_relationships=True)
+    engine.register(D_Table_1, relationships=["t3_rel"])
+    engine.register(D_Table_3)
+    engine.build_schema()
+    async with db_async("D") as db:
+        statements = record_statements(db, parameters=True)
+
+        res = await engine.execute_query(
+            "query { sample_table_1s { int_field t3_rel { int_field } } }", db
+        )
+
+        assert res.errors is None
+        assert "json_each" in statements[1][0]
+
+
+def test_compile_chunked():
+    stmt = select(A_Table.int_field).where(LargeIn(A_Table.int_field, [1, 2, 3], 2))
+
+    sql = str(stmt.compile(dialect=mysql.dialect()))
+
+    assert sql.endswith(
+        "WHERE `SAMPLE_TABLE`.int_field IN (__[POSTCOMPILE_int_field_1]) "
+        "OR `SAMPLE_TABLE`.int_field IN (__[POSTCOMPILE_int_field_2])"
+    )
+
+
+def test_compile_postgresql_array():
+    stmt = select(A_Table.int_field).where(LargeIn(A_Table.int_field, [1, 2, 3], 2))
+
+    compiled = stmt.compile(dialect=postgresql.dialect())
+
+    assert str(compiled).endswith(
+        'WHERE "SAMPLE_TABLE".int_field = ANY (%(param_1)s::INTEGER[])'
+    )
+    assert compiled.params == {"param_1": [1, 2, 3]}
+
+
+def test_compile_sqlite_json():
+    stmt = select(A_Table.int_field).where(LargeIn(A_Table.int_field, [1, 2, 3], 2))
+
+    compiled = stmt.compile(dialect=sqlite.dialect())
+
+    assert compiled.params == {"param_1": "[1, 2, 3]"}
+
+
+def test_compile_sqlite_unencodable_values():
+    stmt = select(A_Table.int_field).where(
+        LargeIn(A_Table.bytes_field, [b"a", b"b", b"c"], 2)
+    )
+
+    sql = str(stmt.compile(dialect=sqlite.dialect()))
+
+    assert "json_each" not in sql
+    assert sql.count(" IN ") == 2
+
+
+@pytest.mark.parametrize("threshold,expected", [(None, False), (3, False), (2, True)])
+def test_in_filter(threshold, expected):
+    condition = in_filter(A_Table.int_field, [1, 2, 3], threshold, 1000)
+
+    assert isinstance(condition, LargeIn) is expected
@@ -0,0 +1,257 @@
+import pytest
+from sqlalchemy import JSON, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.errors import ConfigurationError
+from alchemyql.jsonpath import extract_json_path, json_path_expression
+
+from .databases.f import F_Table
+
+
+def build_engine(cls=AlchemyQLSync, **kwargs):
+    engine = cls(**kwargs)
+    engine.register(
+        F_Table,
+        filter_fields=["int_field", "json_field"],
+        order_fields=["int_field"],
+        default_order={"int_field": "ASC"},
+        pk_lookup=True,
+    )
+    engine.build_schema()
+    return engine
+
+
+def test_path_projection(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("F") as db:
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            'query { sample_tables { name: json_field_path (path: "name") city: json_field_path (path: "address.city") tag: json_field_path (path: "tags.1") } }',
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_tables"] == [
+            {"name": "One", "city": "London", "tag": "b"},
+            {"name": "Two", "city": "Paris", "tag": None},
+            {"name": "Three", "city": None, "tag": None},
+            {"name": "Four", "city": None, "tag": None},
+        ]
+        # The documents are not loaded, 1 query loads the values at all paths
+        assert len(statements) == 2
+        assert "json_field" not in statements[0]
+        assert statements[1].count("JSON_EXTRACT") == 3
+
+
+async def test_path_projection_async(db_async):
+    engine = build_engine(AlchemyQLAsync)
+    async with db_async("F") as db:
+        res = await engine.execute_query(
+            'query { sample_tables { int_field size: json_field_path (path: "size") } }',
+            db,
+        )
+
+        assert res.errors is None
+        assert [row["size"] for row in res.data["sample_tables"]] == [
+            10,
+            2.5,
+            30,
+            None,
+        ]
+
+
+def test_path_with_whole_document(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("F") as db:
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            'query { sample_table (int_field: 1) { json_field name: json_field_path (path: "name") } }',
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_table"]["name"] == "One"
+        assert res.data["sample_table"]["json_field"]["tags"] == ["a", "b"]
+        # The values are extracted from the loaded document
+        assert len(statements) == 1
+
+
+def test_invalid_path(db_sync):
+    engine = build_engine()
+    with db_sync("F") as db:
+        res = engine.execute_query(
+            'query { sample_tables { json_field_path (path: "address..city") } }', db
+        )
+
+        assert res.errors is not None
+        assert "Provided JSON Path is invalid" in res.errors[0].message
+
+
+@pytest.mark.parametrize(
+    "filter,expected",
+    [
+        ('{path: "name", eq: "Two"}', [2]),
+        ('{path: "name", ne: "Two"}', [1, 3, 4]),
+        ('{path: "size", gt: 5}', [1, 3]),
+        ('{path: "size", le: 10}', [1, 2]),
+        ('{path: "size", lt: 3, ge: 2.5}', [2]),
+        ('{path: "active", eq: true}', [1, 3]),
+        ('{path: "address.city", in: ["Paris", "Rome"]}', [2]),
+        ('{path: "address.city", in: []}', []),
+        ('{path: "size", in: [30, "10", 2.5]}', [2, 3]),
+        ('{path: "name", in: ["Four", true]}', [4]),
+        ('{path: "size", eq: null}', [4]),
+        ('{path: "address", ne: null}', [1, 2]),
+        ('{path: "tags.0", eq: "b"}', [2]),
+    ],
+)
+def test_path_filter(db_sync, filter, expected, int_fields):
+    engine = build_engine()
+    with db_sync("F") as db:
+        res = engine.execute_query(
+            f"query {{ sample_tables (filter: {{json_field: [{filter}]}}) {{ int_field }} }}",
+            db,
+        )
+
+        assert int_fields(res) == expected
+
+
+def test_multiple_path_filters(db_sync, int_fields):
+    engine = build_engine()
+    with db_sync("F") as db:
+        res = engine.execute_query(
+            'query { sample_tables (filter: {json_field: [{path: "active", eq: true}, {path: "size", lt: 20}]}) { int_field } }',
+            db,
+        )
+
+        assert int_fields(res) == [1]
+
+
+def test_non_scalar_filter_value(db_sync):
+    engine = build_engine()
+    with db_sync("F") as db:
+        res = engine.execute_query(
+            'query { sample_tables (filter: {json_field: [{path: "tags", eq: ["a"]}]}) { int_field } }',
+            db,
+        )
+
+        assert res.errors is not None
+        assert "Provided JSON filter value is not a scalar" in res.errors[0].message
+
+
+def test_schema():
+    schema = build_engine().get_schema()
+
+    # Non-nullable columns stay non-nullable, values at paths may be missing
+    assert "  json_field: JSON!\n" in schema
+    assert "  json_field_path(path: String!): JSON\n" in schema
+    assert "  json_field: [JSONFilter!]\n" in schema
+
+
+@pytest.mark.parametrize(
+    "path,expected",
+    [
+        ("name", "One"),
+        ("tags.0", "a"),
+        ("tags.5", None),
+        ("address.city", "London"),
+        ("address.city.name", None),
+        ("other", None),
+    ],
+)
+def test_extract_json_path(path, expected):
+    document = {"name": "One", "tags": ["a"], "address": {"city": "London"}}
+
+    assert extract_json_path(document, path) == expected
+
+
+def test_compile_postgresql():
+    stmt = select(json_path_expression(F_Table.json_field, "address.city"))
+
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert '"SAMPLE_TABLE".json_field #> %(json_field_1)s' in sql
+
+
+def test_sharded_table(db_sync):
+    with db_sync("F") as db:
+        engine = AlchemyQLSync()
+        engine.register(F_Table, shards={"a": sessionmaker(bind=db.get_bind())})
+        engine.build_schema()
+
+        res = engine.execute_query(
+            'query { sample_tables { name: json_field_path (path: "name") } }', db
+        )
+
+        # The whole documents are loaded within the shard
+        assert res.errors is None
+        assert [row["name"] for row in res.data["sample_tables"]] == [
+            "One",
+            "Two",
+            "Three",
+            "Four",
+        ]
+
+
+async def test_lookup_with_variables(db_async):
+    engine = build_engine(AlchemyQLAsync, batch_relationships=True)
+    async with db_async("F") as db:
+        res = await engine.execute_query(
+            'query ($p: String!) { sample_tables_by_pk (ids: [3, 1]) { a: json_field_path (path: $p) b: json_field_path (path: $p) c: json_field_path (path: "size") } }',
+            db,
+            {"p": "name"},
+        )
+
+        assert res.errors is None
+        assert res.data["sample_tables_by_pk"] == [
+            {"a": "Three", "b": "Three", "c": 30},
+            {"a": "One", "b": "One", "c": 10},
+        ]
+
+
+def test_document_in_identity_map(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("F") as db:
+        obj = db.get(F_Table, 2)
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            'query { sample_tables_by_pk (ids: [2]) { json_field_path (path: "address.city") } }',
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_tables_by_pk"] == [{"json_field_path": "Paris"}]
+        # The values are extracted from the document of the loaded object
+        assert obj.json_field["name"] == "Two"
+        assert len(statements) == 0
+
+
+class Base(DeclarativeBase): ...
+
+
+class Documents(Base):
+    __tablename__ = "DOCUMENTS"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    data_path: Mapped[str]
+    data: Mapped[dict] = mapped_column(JSON)
+
+
+def test_path_field_in_use():
+    engine = AlchemyQLSync()
+
+    with pytest.raises(ConfigurationError, match="Field data_path already exists"):
+        engine.register(Documents)
+
+
+def test_path_field_of_excluded_column():
+    engine = AlchemyQLSync()
+    engine.register(Documents, exclude_fields=["data"])
+    engine.build_schema()
+
+    assert "  data_path: String!\n" in engine.get_schema()
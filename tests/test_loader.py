@@ -0,0 +1,23 @@
+from sqlalchemy import select
+
+from alchemyql.loader import primary_key_in
+
+from .databases.d import D_Table_1, T2_T3_Link
+
+
+def test_primary_key_in_single_column(db_sync):
+    with db_sync("D") as db:
+        stmt = select(D_Table_1.int_field).where(
+            primary_key_in(D_Table_1, [(1,), (3,)])
+        )
+
+        assert db.execute(stmt).scalars().all() == [1, 3]
+
+
+def test_primary_key_in_composite(db_sync):
+    with db_sync("D") as db:
+        stmt = select(T2_T3_Link.t2_int_field, T2_T3_Link.t3_int_field).where(
+            primary_key_in(T2_T3_Link, [(1, 3), (2, 4), (2, 5)])
+        )
+
+        assert sorted(db.execute(stmt).all()) == [(1, 3), (2, 4)]
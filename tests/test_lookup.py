@@ -0,0 +1,204 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+
+from .databases.d import D_Table_1, D_Table_2, D_Table_3, T2_T3_Link
+
+modes = pytest.mark.parametrize(
+    "engine_kwargs", [{}, {"batch_relationships": True}], ids=["joined", "batched"]
+)
+
+
+def build_engine(cls, **kwargs):
+    engine = cls(**kwargs)
+    engine.register(D_Table_1, relationships=["t2_rel", "t3_rel"], pk_lookup=True)
+    engine.register(D_Table_2, relationships=["t1_rel"])
+    engine.register(D_Table_3, relationships=["t1_rel"])
+    engine.register(T2_T3_Link, pk_lookup=True)
+    engine.build_schema()
+    return engine
+
+
+composite_query = """query {
+    t2_t3_links_by_pk(ids: [
+        {t2_int_field: 2, t3_int_field: 4},
+        {t2_int_field: 1, t3_int_field: 3},
+        {t2_int_field: 2, t3_int_field: 4},
+        {t2_int_field: 1, t3_int_field: 4}
+    ]) { t2_int_field t3_int_field }
+}"""
+composite_expected = {
+    "t2_t3_links_by_pk": [
+        {"t2_int_field": 2, "t3_int_field": 4},
+        {"t2_int_field": 1, "t3_int_field": 3},
+        None,
+    ]
+}
+
+
+def test_composite_pk_sync(db_sync):
+    engine = build_engine(AlchemyQLSync)
+    with db_sync("D") as db:
+        res = engine.execute_query(composite_query, db)
+
+        assert res.errors is None
+        assert res.data == composite_expected
+
+
+async def test_composite_pk_async(db_async):
+    engine = build_engine(AlchemyQLAsync)
+    async with db_async("D") as db:
+        res = await engine.execute_query(composite_query, db)
+
+        assert res.errors is None
+        assert res.data == composite_expected
+
+
+def test_batch_lookup_single_query_sync(db_sync, record_statements):
+    engine = build_engine(AlchemyQLSync)
+    with db_sync("D") as db:
+        statements = record_statements(db)
+        res = engine.execute_query(
+            "query { sample_table_1s_by_pk(ids: [2, 1, 2]) { int_field } }", db
+        )
+
+        assert res.errors is None
+        assert res.data == {
+            "sample_table_1s_by_pk": [{"int_field": 2}, {"int_field": 1}]
+        }
+        assert len(statements) == 1
+        assert " IN " in statements[0]
+
+
+@modes
+def test_identity_map_hits_sync(db_sync, engine_kwargs, record_statements):
+    engine = build_engine(AlchemyQLSync, **engine_kwargs)
+    with db_sync("D") as db:
+        # Loads all columns of row 1 into the session (which only holds weak references)
+        obj = db.get(D_Table_1, 1)  # noqa: F841
+
+        statements = record_statements(db)
+        res = engine.execute_query(
+            "query { sample_table_1(int_field: 1) { int_field string_field } }", db
+        )
+
+        assert res.errors is None
+        assert res.data == {"sample_table_1": {"int_field": 1, "string_field": "One"}}
+        assert statements == []
+
+
+@modes
+async def test_identity_map_hits_async(db_async, engine_kwargs, record_statements):
+    engine = build_engine(AlchemyQLAsync, **engine_kwargs)
+    async with db_async("D") as db:
+        obj = await db.get(D_Table_1, 1)  # noqa: F841
+
+        statements = record_statements(db)
+        res = await engine.execute_query(
+            "query { sample_table_1s_by_pk(ids: [1]) { string_field } }", db
+        )
+
+        assert res.errors is None
+        assert res.data == {"sample_table_1s_by_pk": [{"string_field": "One"}]}
+        assert statements == []
+
+
+def test_identity_map_partial_hits_sync(db_sync, record_statements):
+    engine = build_engine(AlchemyQLSync)
+    with db_sync("D") as db:
+        obj = db.get(D_Table_1, 1)  # noqa: F841
+
+        statements = record_statements(db)
+        res = engine.execute_query(
+            "query { sample_table_1s_by_pk(ids: [1, 2]) { string_field } }", db
+        )
+
+        assert res.errors is None
+        assert res.data == {
+            "sample_table_1s_by_pk": [{"string_field": "One"}, {"string_field": "Two"}]
+        }
+        # Only the missing row is queried
+        assert len(statements) == 1
+
+
+def test_identity_map_unloaded_fields_sync(db_sync, record_statements):
+    engine = build_engine(AlchemyQLSync)
+    with db_sync("D") as db:
+        obj = db.get(D_Table_1, 1)
+        db.expire(obj, ["string_field"])
+
+        statements = record_statements(db)
+        res = engine.execute_query(
+            "query { sample_table_1(int_field: 1) { string_field } }", db
+        )
+
+        assert res.errors is None
+        assert res.data == {"sample_table_1": {"string_field": "One"}}
+        assert len(statements) == 1
+
+
+relationship_query = """query {
+    sample_table_1(int_field: 1) {
+        int_field t2_rel { int_field } t3_rel { int_field t1_rel { int_field } }
+    }
+}"""
+
+
+def test_identity_map_relationships_sync(db_sync, record_statements):
+    engine = build_engine(AlchemyQLSync)
+    with db_sync("D") as db:
+        stmt = select(D_Table_1).options(
+            selectinload(D_Table_1.t2_rel),
+            selectinload(D_Table_1.t3_rel).selectinload(D_Table_3.t1_rel),
+        )
+        objs = db.execute(stmt).scalars().all()  # noqa: F841
+
+        statements = record_statements(db)
+        res = engine.execute_query(relationship_query, db)
+
+        assert res.errors is None
+        assert res.data["sample_table_1"]["t3_rel"][1] == {
+            "int_field": 3,
+            "t1_rel": {"int_field": 1},
+        }
+        assert statements == []
+
+
+def test_identity_map_relationships_not_loaded_sync(db_sync, record_statements):
+    engine = build_engine(AlchemyQLSync)
+    with db_sync("D") as db:
+        obj = db.get(D_Table_1, 1)
+        # Relationship loaded, but a column of one of its rows is not
+        obj.t2_rel, obj.t3_rel[0].t1_rel
+        db.expire(obj.t3_rel[1], ["int_field"])
+
+        statements = record_statements(db)
+        res = engine.execute_query(relationship_query, db)
+
+        assert res.errors is None
+        assert res.data["sample_table_1"]["t3_rel"][1] == {
+            "int_field": 3,
+            "t1_rel": {"int_field": 1},
+        }
+        assert len(statements) == 1
+
+
+def test_identity_map_hits_batched_relationships_sync(db_sync, record_statements):
+    engine = build_engine(AlchemyQLSync, batch_relationships=True)
+    with db_sync("D") as db:
+        obj = db.get(D_Table_1, 1)  # noqa: F841
+
+        statements = record_statements(db)
+        res = engine.execute_query(
+            "query { sample_table_1(int_field: 1) { int_field t2_rel { int_field } } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data == {
+            "sample_table_1": {"int_field": 1, "t2_rel": {"int_field": 1}}
+        }
+        # Only the relationship is queried (by its batch loader)
+        assert len(statements) == 1
@@ -0,0 +1,273 @@
+import asyncio
+
+import pytest
+from sqlalchemy import UniqueConstraint, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.errors import ConfigurationError
+from alchemyql.microbatch import unique_columns
+
+from .databases.a import A_Table
+from .databases.d import D_Table_1
+
+
+def build_engine(cls=AlchemyQLAsync, **kwargs):
+    engine = cls(**kwargs)
+    engine.register(
+        A_Table,
+        include_fields=["int_field", "string_field", "enum_field"],
+        filter_fields=["int_field", "string_field", "enum_field"],
+        order_fields=["int_field"],
+        pagination=True,
+        pk_lookup=True,
+        micro_batch_window=0.002,
+    )
+    engine.build_schema()
+    return engine
+
+
+def factory(db) -> sessionmaker:
+    """
+    Factory of sessions on the database of a test session (opened by the engine per request).
+    """
+    return sessionmaker(bind=db.bind, class_=AsyncSession)
+
+
+async def test_lookups_batched(db_async, record_statements):
+    async with db_async("A") as db:
+        engine = build_engine(session_factory=factory(db))
+        statements = record_statements(db)
+
+        results = await asyncio.gather(
+            *[
+                engine.execute_query(
+                    f"query {{ sample_tables (filter: {{int_field: {{eq: {i}}}}}) {{ int_field string_field }} }}"
+                )
+                for i in [1, 3, 9]
+            ],
+            engine.execute_query(
+                "query { sample_tables (filter: {int_field: {in: [2, 3]}}) { int_field string_field } }"
+            ),
+        )
+
+        assert [res.data for res in results] == [
+            {"sample_tables": [{"int_field": 1, "string_field": "One"}]},
+            {"sample_tables": [{"int_field": 3, "string_field": "Three"}]},
+            {"sample_tables": []},
+            {
+                "sample_tables": [
+                    {"int_field": 2, "string_field": "Two"},
+                    {"int_field": 3, "string_field": "Three"},
+                ]
+            },
+        ]
+        # Engine sessions (1 per request) share 1 query, on a session of the batcher
+        assert len(statements) == 1
+        assert " IN " in statements[0]
+
+
+async def test_each_request_paginated(db_async, int_fields, record_statements):
+    async with db_async("A") as db:
+        engine = build_engine(session_factory=factory(db))
+        statements = record_statements(db)
+
+        results = await asyncio.gather(
+            engine.execute_query(
+                "query { sample_tables (filter: {int_field: {in: [1, 2, 3, 4, 5]}}, order: {int_field: DESC}, offset: 1, limit: 2) { int_field } }"
+            ),
+            engine.execute_query(
+                "query { sample_tables (filter: {int_field: {in: [2, 5]}}, order: {int_field: DESC}) { int_field } }"
+            ),
+        )
+
+        assert [int_fields(res) for res in results] == [[4, 3], [5, 2]]
+        assert len(statements) == 1
+
+
+async def test_different_selections_not_batched_together(db_async, record_statements):
+    async with db_async("A") as db:
+        engine = build_engine(session_factory=factory(db))
+        statements = record_statements(db)
+
+        results = await asyncio.gather(
+            engine.execute_query(
+                "query { sample_tables (filter: {int_field: {eq: 1}}) { int_field } }"
+            ),
+            engine.execute_query(
+                "query { sample_tables (filter: {int_field: {eq: 2}}) { string_field } }"
+            ),
+        )
+
+        assert results[1].data == {"sample_tables": [{"string_field": "Two"}]}
+        assert len(statements) == 2
+
+
+async def test_caller_sessions_not_batched(db_async, int_fields, record_statements):
+    async with db_async("A") as db:
+        engine = build_engine(session_factory=factory(db))
+        statements = record_statements(db)
+
+        results = await asyncio.gather(
+            *[
+                engine.execute_query(
+                    f"query {{ sample_tables (filter: {{int_field: {{eq: {i}}}}}) {{ int_field }} }}",
+                    db,
+                )
+                for i in [1, 2]
+            ]
+        )
+
+        assert [int_fields(res) for res in results] == [[1], [2]]
+        assert len(statements) == 2
+        assert engine.tables[0].micro_batch.batches == {}  # type: ignore
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        "",
+        "(filter: {int_field: {gt: 3}})",
+        "(filter: {int_field: {gt: 3, in: [4, 5]}})",
+        '(filter: {int_field: {eq: 4}, string_field: {eq: "Four"}})',
+        "(filter: {enum_field: {eq: ODD}})",
+        "(filter: {int_field: {in: [4, null]}})",
+        # Not a unique column (the IN query would not be bounded by the values)
+        '(filter: {string_field: {eq: "Four"}}, limit: 1)',
+    ],
+)
+async def test_not_batchable(db_async, args, record_statements):
+    async with db_async("A") as db:
+        engine = build_engine(session_factory=factory(db))
+        statements = record_statements(db)
+
+        results = await asyncio.gather(
+            *[
+                engine.execute_query(
+                    f"query {{ sample_tables {args} {{ int_field }} }}"
+                )
+                for _ in range(2)
+            ]
+        )
+
+        assert all(res.errors is None for res in results)
+        assert len(statements) == 2
+
+
+async def test_pk_lookups_batched(db_async, int_fields, record_statements):
+    async with db_async("A") as db:
+        engine = build_engine(session_factory=factory(db))
+        statements = record_statements(db)
+
+        single, many, rows = await asyncio.gather(
+            engine.execute_query("query { sample_table(int_field: 1) { int_field } }"),
+            engine.execute_query(
+                "query { sample_tables_by_pk(ids: [3, 2, 9]) { int_field } }"
+            ),
+            engine.execute_query(
+                "query { sample_tables (filter: {int_field: {eq: 4}}) { int_field } }"
+            ),
+        )
+
+        assert single.data == {"sample_table": {"int_field": 1}}
+        assert many.data == {
+            "sample_tables_by_pk": [{"int_field": 3}, {"int_field": 2}, None]
+        }
+        assert int_fields(rows) == [4]
+        # Primary key lookups & the root query (without order) are batched together
+        assert len(statements) == 1
+
+
+async def test_pk_lookups_on_caller_session(db_async, record_statements):
+    async with db_async("A") as db:
+        engine = build_engine(session_factory=factory(db))
+        statements = record_statements(db)
+
+        results = await asyncio.gather(
+            *[
+                engine.execute_query(
+                    f"query {{ sample_table(int_field: {i}) {{ int_field }} }}", db
+                )
+                for i in [1, 2]
+            ]
+        )
+
+        assert [res.data for res in results] == [
+            {"sample_table": {"int_field": 1}},
+            {"sample_table": {"int_field": 2}},
+        ]
+        assert len(statements) == 2
+
+
+async def test_sequential_lookups(db_async, int_fields, record_statements):
+    async with db_async("A") as db:
+        engine = build_engine(session_factory=factory(db))
+        statements = record_statements(db)
+
+        for i in [1, 2]:
+            res = await engine.execute_query(
+                f"query {{ sample_tables (filter: {{int_field: {{eq: {i}}}}}) {{ int_field }} }}"
+            )
+            assert int_fields(res) == [i]
+
+        assert len(statements) == 2
+        assert engine.tables[0].micro_batch.batches == {}  # type: ignore
+
+
+class Base(DeclarativeBase): ...
+
+
+class Coded(Base):
+    __tablename__ = "CODED"
+    __table_args__ = (UniqueConstraint("region", "number"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    code: Mapped[str] = mapped_column(unique=True, index=True)
+    region: Mapped[str]
+    number: Mapped[int]
+
+
+@pytest.mark.parametrize(
+    "cls,expected",
+    [
+        # Primary key & unique foreign key
+        (D_Table_1, {"int_field", "t2_int_field"}),
+        # Unique index (not multi column constraints)
+        (Coded, {"id", "code"}),
+    ],
+)
+def test_unique_columns(cls, expected):
+    assert unique_columns(inspect(cls)) == expected
+
+
+def test_sync_engine_not_batched(db_sync, int_fields):
+    with db_sync("A") as db:
+        engine = build_engine(AlchemyQLSync, session_factory=sessionmaker(db.bind))
+        res = engine.execute_query(
+            "query { sample_tables (filter: {int_field: {eq: 2}}) { int_field } }"
+        )
+
+        assert int_fields(res) == [2]
+
+
+@pytest.mark.parametrize(
+    "kwargs,match",
+    [
+        ({"micro_batch_window": 0}, "Micro batch window must be a positive number"),
+        (
+            {"micro_batch_window": 0.1, "shards": {"a": sessionmaker()}},
+            "Micro batching is not supported for sharded tables",
+        ),
+    ],
+)
+def test_register_errors(kwargs, match):
+    with pytest.raises(ConfigurationError, match=match):
+        AlchemyQLAsync().register(A_Table, **kwargs)
+
+
+def test_disabled_without_query():
+    engine = AlchemyQLAsync()
+    engine.register(A_Table, query=False, micro_batch_window=0.1)
+
+    assert engine.tables[0].micro_batch is None
@@ -0,0 +1,224 @@
+import pytest
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.errors import ConfigurationError
+
+from .databases.h import H_Table
+from .databases.i import I_Employee, I_Engineer, I_Intern, I_Manager, I_Team
+
+
+def build_engine(cls=AlchemyQLSync, **kwargs):
+    engine = cls(**kwargs)
+    engine.register(
+        I_Employee,
+        filter_fields=["name"],
+        order_fields=["int_field"],
+        default_order={"int_field": "ASC"},
+        pk_lookup=True,
+    )
+    engine.register(I_Engineer, relationships=["team"], query=False)
+    engine.register(I_Manager, query=False)
+    engine.register(I_Team, relationships=["engineers"], query=False)
+    engine.build_schema()
+    return engine
+
+
+QUERY = """
+query {
+    employees {
+        __typename
+        name
+        ... on engineer { language team { name } }
+        ... on manager { reports }
+    }
+}
+"""
+
+
+def test_polymorphic_rows(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("I") as db:
+        statements = record_statements(db)
+
+        res = engine.execute_query(QUERY, db)
+
+        assert res.errors is None
+        assert res.data["employees"] == [
+            {
+                "__typename": "engineer",
+                "name": "Ada",
+                "language": "Python",
+                "team": {"name": "Compilers"},
+            },
+            {"__typename": "manager", "name": "Grace", "reports": 3},
+            {
+                "__typename": "engineer",
+                "name": "Alan",
+                "language": "C",
+                "team": {"name": "Databases"},
+            },
+            # Rows of unregistered subclasses resolve to their closest registered class
+            {
+                "__typename": "engineer",
+                "name": "Linus",
+                "language": "Rust",
+                "team": {"name": "Compilers"},
+            },
+            {"__typename": "employee", "name": "Barbara"},
+        ]
+        # The subclass tables are joined in 1 query
+        assert len(statements) == 1
+        assert '"ENGINEER"' in statements[0] and '"MANAGER"' in statements[0]
+
+
+def test_only_selected_subclasses_joined(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("I") as db:
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            'query { employees (filter: {name: {startswith: "A"}}) { name ... on manager { reports } } }',
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["employees"] == [{"name": "Ada"}, {"name": "Alan"}]
+        assert len(statements) == 1
+        assert '"MANAGER"' in statements[0]
+        assert '"ENGINEER"' not in statements[0]
+
+
+def test_base_fields_only(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("I") as db:
+        statements = record_statements(db)
+
+        res = engine.execute_query("query { employees { int_field } }", db)
+
+        assert res.errors is None
+        assert [row["int_field"] for row in res.data["employees"]] == [1, 2, 3, 4, 5]
+        assert statements[0].startswith(
+            'SELECT "EMPLOYEE".int_field, "EMPLOYEE".type \nFROM "EMPLOYEE"'
+        )
+
+
+async def test_polymorphic_async(db_async):
+    engine = build_engine(AlchemyQLAsync, batch_relationships=True)
+    async with db_async("I") as db:
+        res = await engine.execute_query(
+            "query { employees_by_pk (ids: [4, 2]) { ... on engineer { team { name engineers { name } } } ... on manager { name } } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["employees_by_pk"] == [
+            {
+                "team": {
+                    "name": "Compilers",
+                    "engineers": [{"name": "Ada"}, {"name": "Linus"}],
+                }
+            },
+            {"name": "Grace"},
+        ]
+
+
+def test_lookup_identity_map(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("I") as db:
+        engineer = db.get(I_Employee, 3)
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            "query { employee (int_field: 3) { name ... on engineer { language } } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["employee"] == {"name": "Alan", "language": "C"}
+        # The subclass columns were not loaded yet
+        assert len(statements) == 1
+        assert engineer.language == "C"
+
+
+def test_lookup_loaded_subclass(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("I") as db:
+        manager = db.get(I_Manager, 2)
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            "query { employee (int_field: 2) { name ... on engineer { language } ... on manager { reports } } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["employee"] == {"name": "Grace", "reports": 3}
+        # The manager is fully loaded (fields of other subclasses are not loaded)
+        assert len(statements) == 0
+        assert manager.reports == 3
+
+
+def test_registered_intermediate_class(db_sync):
+    engine = AlchemyQLSync()
+    engine.register(I_Employee)
+    engine.register(I_Engineer, query=False, exclude_fields=["team_int_field"])
+    engine.register(I_Intern, graphql_name="intern", query=False)
+    engine.build_schema()
+    with db_sync("I") as db:
+        res = engine.execute_query(
+            "query { employees { __typename ... on engineer { language } } }", db
+        )
+
+        assert res.errors is None
+        assert [row["__typename"] for row in res.data["employees"]] == [
+            "engineer",
+            "employee",
+            "engineer",
+            "intern",
+            "employee",
+        ]
+        assert res.data["employees"][3] == {"__typename": "intern"}
+
+
+def test_schema():
+    schema = build_engine().get_schema()
+
+    assert "interface employee_interface {" in schema
+    assert "type engineer implements employee_interface {" in schema
+    assert "  employees(filter: employee_filter" in schema
+    assert ": [employee_interface]\n" in schema
+    # Relationships to the base class return its type
+    assert "  engineers: [engineer]\n" in schema
+
+
+def test_not_polymorphic():
+    engine = AlchemyQLSync()
+    engine.register(H_Table)
+    engine.build_schema()
+
+    assert "interface" not in engine.get_schema()
+
+
+def test_no_discriminator():
+    class Base(DeclarativeBase): ...
+
+    class Parent(Base):
+        __tablename__ = "PARENT"
+
+        int_field: Mapped[int] = mapped_column(primary_key=True)
+
+    class Child(Parent):
+        __tablename__ = "CHILD"
+
+        int_field: Mapped[int] = mapped_column(
+            ForeignKey("PARENT.int_field"), primary_key=True
+        )
+
+    engine = AlchemyQLSync()
+    engine.register(Parent)
+    engine.register(Child)
+
+    with pytest.raises(ConfigurationError, match="has registered subclasses but no"):
+        engine.build_schema()
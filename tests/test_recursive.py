@@ -0,0 +1,212 @@
+import pytest
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    mapped_column,
+    relationship,
+    sessionmaker,
+)
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.errors import ConfigurationError
+
+from .databases.d import D_Table_1
+from .databases.e import E_Table
+
+
+def build_engine(cls=AlchemyQLSync, recursive="children", **kwargs):
+    engine = cls(**kwargs)
+    engine.register(
+        E_Table,
+        relationships=["children", "parent"],
+        recursive=recursive,
+        filter_fields=["int_field"],
+        order_fields=["int_field"],
+        default_order={"int_field": "ASC"},
+        pk_lookup=True,
+    )
+    engine.build_schema()
+    return engine
+
+
+def int_fields(rows: list[dict]) -> list[int]:
+    return [row["int_field"] for row in rows]
+
+
+@pytest.mark.parametrize("recursive", ["children", "parent"])
+def test_descendants_and_ancestors(db_sync, recursive, record_statements):
+    engine = build_engine(recursive=recursive)
+    with db_sync("E") as db:
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            "query { sample_tables { int_field descendants { int_field } ancestors { int_field } } }",
+            db,
+        )
+
+        assert res.errors is None
+        rows = res.data["sample_tables"]
+        # Descendants are ordered by depth
+        assert [int_fields(row["descendants"]) for row in rows] == [
+            [2, 3, 4, 5, 6],
+            [4, 5, 6],
+            [],
+            [6],
+            [],
+            [],
+            [],
+        ]
+        # Ancestors are ordered from the parent to the root
+        assert [int_fields(row["ancestors"]) for row in rows] == [
+            [],
+            [1],
+            [1],
+            [2, 1],
+            [2, 1],
+            [4, 2, 1],
+            [],
+        ]
+        # 1 recursive query per field (for all rows)
+        assert len(statements) == 3
+        assert "WITH RECURSIVE" in statements[1]
+
+
+@pytest.mark.parametrize(
+    "max_depth,expected",
+    [(1, [2, 3]), (2, [2, 3, 4, 5]), (10, [2, 3, 4, 5, 6])],
+)
+def test_max_depth(db_sync, max_depth, expected):
+    engine = build_engine()
+    with db_sync("E") as db:
+        res = engine.execute_query(
+            f"query {{ sample_table (int_field: 1) {{ descendants (max_depth: {max_depth}) {{ int_field }} }} }}",
+            db,
+        )
+
+        assert res.errors is None
+        assert int_fields(res.data["sample_table"]["descendants"]) == expected
+
+
+def test_invalid_max_depth(db_sync):
+    engine = build_engine()
+    with db_sync("E") as db:
+        res = engine.execute_query(
+            "query { sample_tables { descendants (max_depth: 0) { int_field } } }", db
+        )
+
+        assert res.errors is not None
+        assert "Provided Max Depth is not positive" in res.errors[0].message
+
+
+def test_merged_selections(db_sync):
+    engine = build_engine()
+    with db_sync("E") as db:
+        res = engine.execute_query(
+            "query { sample_tables (filter: {int_field: {eq: 2}}) { a: descendants { int_field } b: descendants { string_field } } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_tables"][0]["b"] == [
+            {"string_field": "Four"},
+            {"string_field": "Five"},
+            {"string_field": "Six"},
+        ]
+
+        res = engine.execute_query(
+            "query { sample_tables { a: descendants { int_field } b: descendants (max_depth: 1) { int_field } } }",
+            db,
+        )
+
+        assert res.errors is not None
+        assert "cannot be selected with different arguments" in res.errors[0].message
+
+
+async def test_nested_fields(db_async):
+    engine = build_engine(AlchemyQLAsync, batch_relationships=True)
+    async with db_async("E") as db:
+        res = await engine.execute_query(
+            "query { sample_tables (filter: {int_field: {eq: 6}}) { ancestors { string_field parent { int_field } descendants (max_depth: 1) { int_field } } } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_tables"][0]["ancestors"] == [
+            {
+                "string_field": "Four",
+                "parent": {"int_field": 2},
+                "descendants": [{"int_field": 6}],
+            },
+            {
+                "string_field": "Two",
+                "parent": {"int_field": 1},
+                "descendants": [{"int_field": 4}, {"int_field": 5}],
+            },
+            {
+                "string_field": "One",
+                "parent": None,
+                "descendants": [{"int_field": 2}, {"int_field": 3}],
+            },
+        ]
+
+
+def test_joined_relationships(db_sync):
+    engine = build_engine()
+    with db_sync("E") as db:
+        res = engine.execute_query(
+            "query { sample_table (int_field: 2) { descendants { int_field children { int_field } } } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_table"]["descendants"] == [
+            {"int_field": 4, "children": [{"int_field": 6}]},
+            {"int_field": 5, "children": []},
+            {"int_field": 6, "children": []},
+        ]
+
+
+def test_schema():
+    schema = build_engine().get_schema()
+
+    assert "  descendants(max_depth: Int): [sample_table]" in schema
+    assert "  ancestors(max_depth: Int): [sample_table]" in schema
+
+
+class Base(DeclarativeBase): ...
+
+
+class Node(Base):
+    __tablename__ = "NODE"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    parent_id: Mapped[int | None] = mapped_column(ForeignKey("NODE.id"))
+    ancestors: Mapped[str]
+    children: Mapped[list["Node"]] = relationship()
+
+
+@pytest.mark.parametrize(
+    "cls,kwargs,match",
+    [
+        (
+            E_Table,
+            {"recursive": "other"},
+            "Requested relationship other does not exist for E_Table",
+        ),
+        (
+            D_Table_1,
+            {"recursive": "t3_rel"},
+            "Relationship t3_rel cannot be recursive, it is not self-referential",
+        ),
+        (Node, {"recursive": "children"}, "Field ancestors already exists for Node"),
+        (
+            E_Table,
+            {"recursive": "children", "shards": {"a": sessionmaker()}},
+            "Recursive relationships are not supported for sharded tables",
+        ),
+    ],
+)
+def test_register_errors(cls, kwargs, match):
+    with pytest.raises(ConfigurationError, match=match):
+        AlchemyQLSync().register(cls, **kwargs)
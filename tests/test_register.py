@@ -1,4 +1,5 @@
 import pytest
+from sqlalchemy.orm import sessionmaker
 
 from alchemyql import AlchemyQLAsync, AlchemyQLSync, Order
 from alchemyql.engine import AlchemyQL
@@ -68,7 +69,7 @@ def test_register_invalid_column_ref(cls: type[AlchemyQL]):
 
 
 @pytest.mark.parametrize("cls", [AlchemyQLSync, AlchemyQLAsync])
-@pytest.mark.parametrize("field", ["bytes_field", "json_field"])
+@pytest.mark.parametrize("field", ["bytes_field"])
 def test_register_invalid_filter_column(cls: type[AlchemyQL], field: str):
     engine = cls()
 
@@ -119,3 +120,31 @@ def test_register_invalid_relationship(cls: type[AlchemyQL], field: str):
 
     with pytest.raises(ConfigurationError):
         engine.register(D_Table_1, relationships=[field])
+
+
+@pytest.mark.parametrize("cls", [AlchemyQLSync, AlchemyQLAsync])
+@pytest.mark.parametrize("kwargs", [{"cache_size": 0}, {"cache_ttl": -1}])
+def test_register_invalid_cache(cls: type[AlchemyQL], kwargs: dict):
+    engine = cls()
+
+    with pytest.raises(ConfigurationError):
+        engine.register(A_Table, cache=True, **kwargs)
+
+
+@pytest.mark.parametrize("cls", [AlchemyQLSync, AlchemyQLAsync])
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"shard_key": "int_field"},
+        {"shard_for": str},
+        {"shards": {}},
+        {"shards": {"a": sessionmaker()}, "shard_key": "does_not_exist"},
+        {"shards": {"a": sessionmaker()}, "shard_for": str},
+        {"shards": {"a": sessionmaker()}, "pk_lookup": True},
+    ],
+)
+def test_register_invalid_sharding(cls: type[AlchemyQL], kwargs: dict):
+    engine = cls()
+
+    with pytest.raises(ConfigurationError):
+        engine.register(A_Table, **kwargs)
@@ -0,0 +1,184 @@
+import pytest
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    mapped_column,
+    relationship,
+    sessionmaker,
+)
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.errors import ConfigurationError
+
+from .databases.d import D_Table_1, D_Table_2, D_Table_3
+
+
+def build_engine(cls=AlchemyQLSync, **kwargs):
+    engine = cls(**kwargs)
+    engine.register(
+        D_Table_1,
+        include_fields=["int_field"],
+        relationships=["t2_rel", "t3_rel"],
+        relationship_counts=["t3_rel"],
+        order_fields=["int_field"],
+        default_order={"int_field": "ASC"},
+    )
+    engine.register(
+        D_Table_2,
+        include_fields=["int_field"],
+        relationships=["t3_rel"],
+        relationship_counts=["t3_rel"],
+        query=False,
+    )
+    engine.register(D_Table_3, filter_fields=["int_field", "string_field"])
+    engine.build_schema()
+    return engine
+
+
+def counts(res, field="t3_rel_count") -> list[int]:
+    assert res.errors is None
+    return [row[field] for row in res.data["sample_table_1s"]]
+
+
+def test_count(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("D") as db:
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            "query { sample_table_1s { int_field t3_rel_count } }", db
+        )
+
+        assert counts(res) == [3, 2, 0, 0, 0]
+        # 1 grouped aggregate query for all counts (no related rows are loaded)
+        assert len(statements) == 2
+        assert "count(*)" in statements[1]
+        assert "GROUP BY" in statements[1]
+
+
+@pytest.mark.parametrize(
+    "filter,expected",
+    [
+        ("{int_field: {gt: 2}}", [2, 1, 0, 0, 0]),
+        ('{string_field: {in: ["Two", "Five"]}}', [1, 1, 0, 0, 0]),
+        ("{}", [3, 2, 0, 0, 0]),
+    ],
+)
+def test_count_filter(db_sync, filter, expected):
+    engine = build_engine()
+    with db_sync("D") as db:
+        res = engine.execute_query(
+            f"query {{ sample_table_1s {{ t3_rel_count (filter: {filter}) }} }}", db
+        )
+
+        assert counts(res) == expected
+
+
+def test_count_filter_variables(db_sync):
+    engine = build_engine()
+    with db_sync("D") as db:
+        res = engine.execute_query(
+            "query ($f: sample_table_3_filter) { sample_table_1s { n: t3_rel_count (filter: $f) m: t3_rel_count (filter: $f) } }",
+            db,
+            {"f": {"int_field": {"lt": 3}}},
+        )
+
+        assert counts(res, "n") == [1, 1, 0, 0, 0]
+        assert counts(res, "m") == [1, 1, 0, 0, 0]
+
+
+def test_count_with_different_arguments(db_sync):
+    engine = build_engine()
+    with db_sync("D") as db:
+        res = engine.execute_query(
+            "query { sample_table_1s { a: t3_rel_count b: t3_rel_count (filter: {int_field: {eq: 1}}) } }",
+            db,
+        )
+
+        assert res.errors is not None
+        assert "cannot be selected with different arguments" in res.errors[0].message
+
+
+async def test_nested_count(db_async, record_statements):
+    engine = build_engine(AlchemyQLAsync, batch_relationships=True)
+    async with db_async("D") as db:
+        statements = record_statements(db)
+
+        res = await engine.execute_query(
+            "query { sample_table_1s { t3_rel_count t2_rel { int_field t3_rel_count } } }",
+            db,
+        )
+
+        assert res.errors is None
+        rows = res.data["sample_table_1s"]
+        assert [row["t2_rel"]["t3_rel_count"] for row in rows] == [3, 2, 3, 2, 3]
+        # Root query, T2 relationship & 1 count query per level
+        assert len(statements) == 4
+
+
+def test_schema():
+    schema = build_engine().get_schema()
+
+    assert "t3_rel_count(filter: sample_table_3_filter): Int!" in schema
+
+
+def test_schema_without_target_filter():
+    engine = AlchemyQLSync()
+    engine.register(D_Table_1, relationships=["t3_rel"], relationship_counts=["t3_rel"])
+    engine.register(D_Table_3)
+    engine.build_schema()
+
+    assert "  t3_rel_count: Int!" in engine.get_schema()
+
+
+class Base(DeclarativeBase): ...
+
+
+class Parent(Base):
+    __tablename__ = "PARENT"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    children_count: Mapped[int]
+    children: Mapped[list["Child"]] = relationship()
+
+
+class Child(Base):
+    __tablename__ = "CHILD"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    parent_id: Mapped[int] = mapped_column(ForeignKey("PARENT.id"))
+
+
+@pytest.mark.parametrize(
+    "cls,kwargs,match",
+    [
+        (
+            D_Table_1,
+            {"relationship_counts": ["t3_rel"]},
+            "Relationship t3_rel must be exposed to be counted",
+        ),
+        (
+            D_Table_1,
+            {"relationships": ["t2_rel"], "relationship_counts": ["t2_rel"]},
+            "Relationship t2_rel cannot be counted, it is not a list relationship",
+        ),
+        (
+            Parent,
+            {"relationships": ["children"], "relationship_counts": ["children"]},
+            "Field children_count already exists for Parent",
+        ),
+        (
+            D_Table_1,
+            {
+                "relationships": ["t3_rel"],
+                "relationship_counts": ["t3_rel"],
+                "shards": {"a": sessionmaker()},
+            },
+            "Relationship counts are not supported for sharded tables",
+        ),
+    ],
+)
+def test_register_errors(cls, kwargs, match):
+    with pytest.raises(ConfigurationError, match=match):
+        AlchemyQLSync().register(cls, **kwargs)
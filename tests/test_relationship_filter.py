@@ -0,0 +1,179 @@
+import pytest
+from sqlalchemy import ForeignKey, create_engine
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    Session,
+    mapped_column,
+    relationship,
+)
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.errors import ConfigurationError
+
+from .databases.d import D_Table_1, D_Table_2, D_Table_3
+
+
+def build_engine(cls=AlchemyQLSync):
+    engine = cls()
+    engine.register(
+        D_Table_1,
+        include_fields=["int_field", "string_field"],
+        relationships=["t2_rel", "t3_rel"],
+        filter_fields=["int_field", "string_field", "t2_rel", "t3_rel"],
+        order_fields=["int_field"],
+        default_order={"int_field": "ASC"},
+    )
+    engine.register(
+        D_Table_2,
+        relationships=["t3_rel"],
+        filter_fields=["string_field", "t3_rel"],
+        order_fields=["int_field"],
+        default_order={"int_field": "ASC"},
+    )
+    engine.register(
+        D_Table_3,
+        relationships=["t1_rel"],
+        filter_fields=["int_field", "string_field", "t1_rel"],
+    )
+    engine.build_schema()
+    return engine
+
+
+@pytest.mark.parametrize(
+    "filter,expected",
+    [
+        ('{t3_rel: {some: {string_field: {eq: "Four"}}}}', [2]),
+        ("{t3_rel: {some: {}}}", [1, 2]),
+        ("{t3_rel: {every: {int_field: {in: [1, 3, 5]}}}}", [1, 3, 4, 5]),
+        ("{t3_rel: {none: {int_field: {gt: 3}}}}", [3, 4, 5]),
+        ("{t3_rel: {some: {int_field: {gt: 3}}, none: {int_field: {eq: 5}}}}", [2]),
+        ("{t3_rel: {some: null}}", [1, 2, 3, 4, 5]),
+        ('{t2_rel: {some: {string_field: {eq: "Two"}}}}', [2]),
+        ('{t2_rel: {none: {string_field: {eq: "Two"}}}}', [1, 3, 4, 5]),
+        ('{t2_rel: {every: {string_field: {eq: "Two"}}}}', [2]),
+        ("{int_field: {lt: 2}, t3_rel: {some: {}}}", [1]),
+    ],
+)
+def test_relationship_filter(db_sync, filter, expected, int_fields, record_statements):
+    engine = build_engine()
+    with db_sync("D") as db:
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            f"query {{ sample_table_1s (filter: {filter}) {{ int_field }} }}", db
+        )
+
+        assert int_fields(res, "sample_table_1s") == expected
+        assert len(statements) == 1
+
+
+def test_compiled_to_exists(db_sync, record_statements):
+    engine = build_engine()
+    with db_sync("D") as db:
+        statements = record_statements(db)
+
+        engine.execute_query(
+            "query { sample_table_1s (filter: {t3_rel: {none: {int_field: {gt: 3}}}}) { int_field } }",
+            db,
+        )
+
+        assert "WHERE NOT (EXISTS (SELECT 1 \nFROM" in statements[0]
+
+
+async def test_nested_relationship_filter(db_async, int_fields):
+    engine = build_engine(AlchemyQLAsync)
+    async with db_async("D") as db:
+        res = await engine.execute_query(
+            'query { sample_table_2s (filter: {t3_rel: {some: {t1_rel: {some: {string_field: {eq: "Two"}}}}}}) { int_field } }',
+            db,
+        )
+
+        assert int_fields(res, "sample_table_2s") == [2, 4]
+
+
+def test_schema():
+    schema = build_engine().get_schema()
+
+    assert "t3_rel: sample_table_1_t3_rel_filter" in schema
+    assert (
+        "input sample_table_1_t3_rel_filter {\n"
+        "  some: sample_table_3_filter\n"
+        "  every: sample_table_3_filter\n"
+        "  none: sample_table_3_filter\n"
+        "}"
+    ) in schema
+
+
+def test_relationship_not_exposed():
+    with pytest.raises(
+        ConfigurationError,
+        match="Relationship t3_rel must be exposed to be filtered on",
+    ):
+        AlchemyQLSync().register(D_Table_1, filter_fields=["t3_rel"])
+
+
+def test_target_not_filterable():
+    engine = AlchemyQLSync()
+    engine.register(D_Table_1, relationships=["t3_rel"], filter_fields=["t3_rel"])
+    engine.register(D_Table_3)
+
+    with pytest.raises(
+        ConfigurationError, match="Relationship target table has no filter fields"
+    ):
+        engine.build_schema()
+
+
+class Base(DeclarativeBase): ...
+
+
+class Parent(Base):
+    __tablename__ = "PARENT"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    kids: Mapped[list["Kid"]] = relationship()
+
+
+class Kid(Base):
+    __tablename__ = "KID"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    parent_id: Mapped[int] = mapped_column(ForeignKey("PARENT.id"))
+    status: Mapped[str | None]
+
+
+@pytest.mark.parametrize(
+    "filter,expected",
+    [
+        ('{kids: {every: {status: {eq: "X"}}}}', [2, 3]),
+        ('{kids: {none: {status: {eq: "X"}}}}', [3]),
+        ('{kids: {some: {status: {ne: "X"}}}}', []),
+    ],
+)
+def test_null_related_columns(filter, expected):
+    engine = AlchemyQLSync()
+    engine.register(Parent, relationships=["kids"], filter_fields=["id", "kids"])
+    engine.register(Kid, filter_fields=["status"])
+    engine.build_schema()
+
+    db_engine = create_engine("sqlite://")
+    Base.metadata.create_all(db_engine)
+    with Session(db_engine) as db:
+        db.add_all(
+            [
+                # A row with a NULL status does not match "every"
+                Parent(id=1, kids=[Kid(status="X"), Kid(status=None)]),
+                Parent(id=2, kids=[Kid(status="X")]),
+                Parent(id=3),
+            ]
+        )
+        db.commit()
+
+        res = engine.execute_query(
+            f"query {{ parents (filter: {filter}) {{ id }} }}", db
+        )
+
+        assert res.errors is None
+        assert [row["id"] for row in res.data["parents"]] == expected
+
+    db_engine.dispose()
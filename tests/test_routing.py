@@ -0,0 +1,433 @@
+import pytest
+from sqlalchemy import create_engine, delete, event, text, update
+from sqlalchemy.exc import DisconnectionError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync, LeastOutstanding
+from alchemyql.errors import ConfigurationError
+from alchemyql.routing import DatabaseNode, is_disconnect, read_only_transaction
+
+from .conftest import populate_db_stmts
+from .databases.a import A_Table, Base
+
+query = "query { sample_tables (filter: {int_field: {eq: 1}}) { string_field } }"
+
+
+def create_db(path, name: str | None):
+    """
+    Create a SQLite file database (tables are only created if it has a name, which is
+    stored as the string field of row 1).
+    """
+    engine = create_engine(f"sqlite:///{path}")
+    if name:
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            for stmt in populate_db_stmts(Base, "A"):
+                conn.execute(stmt)
+            conn.execute(
+                update(A_Table).where(A_Table.int_field == 1).values(string_field=name)
+            )
+    engine.dispose()
+
+
+@pytest.fixture
+def sync_factory():
+    engines = []
+
+    def _factory(path):
+        engines.append(create_engine(f"sqlite:///{path}"))
+        return sessionmaker(bind=engines[-1])
+
+    yield _factory
+
+    for engine in engines:
+        engine.dispose()
+
+
+@pytest.fixture
+async def async_factory():
+    engines = []
+
+    def _factory(path):
+        engines.append(create_async_engine(f"sqlite+aiosqlite:///{path}"))
+        return sessionmaker(bind=engines[-1], class_=AsyncSession)  # type: ignore
+
+    yield _factory
+
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest.fixture
+def dbs(tmp_path):
+    """
+    Paths of a primary, 2 replicas, a replica without tables & an unreachable replica.
+    """
+    paths = {}
+    for name in ["primary", "replica_0", "replica_1", "empty"]:
+        paths[name] = tmp_path / f"{name}.db"
+        create_db(paths[name], None if name == "empty" else name)
+    paths["unreachable"] = tmp_path / "missing" / "unreachable.db"
+    return paths
+
+
+def build_engine(cls, factory, dbs, primary="primary", replicas=(), **kwargs):
+    engine = cls(
+        session_factory=factory(dbs[primary]) if primary else None,
+        replica_session_factories=[factory(dbs[name]) for name in replicas],
+        **kwargs,
+    )
+    engine.register(A_Table, filter_fields=["int_field"])
+    engine.build_schema()
+    return engine
+
+
+def routed_to(res) -> str:
+    assert res.errors is None
+    return res.data["sample_tables"][0]["string_field"]
+
+
+def test_round_robin_sync(dbs, sync_factory):
+    engine = build_engine(
+        AlchemyQLSync, sync_factory, dbs, replicas=["replica_0", "replica_1"]
+    )
+
+    names = [routed_to(engine.execute_query(query)) for _ in range(4)]
+
+    assert names == ["replica_0", "replica_1", "replica_0", "replica_1"]
+
+
+async def test_round_robin_async(dbs, async_factory):
+    engine = build_engine(
+        AlchemyQLAsync, async_factory, dbs, replicas=["replica_0", "replica_1"]
+    )
+
+    names = [routed_to(await engine.execute_query(query)) for _ in range(3)]
+
+    assert names == ["replica_0", "replica_1", "replica_0"]
+
+
+def test_read_your_writes_sync(dbs, sync_factory):
+    engine = build_engine(AlchemyQLSync, sync_factory, dbs, replicas=["replica_0"])
+
+    assert routed_to(engine.execute_query(query, read_your_writes=True)) == "primary"
+    assert routed_to(engine.execute_query(query)) == "replica_0"
+
+
+async def test_read_your_writes_async(dbs, async_factory):
+    engine = build_engine(AlchemyQLAsync, async_factory, dbs, replicas=["replica_0"])
+
+    res = await engine.execute_query(query, read_your_writes=True)
+    assert routed_to(res) == "primary"
+
+
+def test_primary_only_sync(dbs, sync_factory):
+    engine = build_engine(AlchemyQLSync, sync_factory, dbs)
+
+    assert routed_to(engine.execute_query(query)) == "primary"
+
+
+def test_explicit_session_sync(dbs, sync_factory):
+    engine = build_engine(AlchemyQLSync, sync_factory, dbs, replicas=["replica_0"])
+
+    with sync_factory(dbs["replica_1"])() as db:
+        assert routed_to(engine.execute_query(query, db)) == "replica_1"
+
+
+def test_no_session_sync():
+    engine = AlchemyQLSync()
+    engine.register(A_Table)
+    engine.build_schema()
+
+    with pytest.raises(ConfigurationError):
+        engine.execute_query(query)
+
+
+async def test_no_session_async():
+    engine = AlchemyQLAsync()
+    engine.register(A_Table)
+    engine.build_schema()
+
+    with pytest.raises(ConfigurationError):
+        await engine.execute_query(query)
+
+
+def test_least_outstanding():
+    replicas = [DatabaseNode(f"replica_{i}", sessionmaker()) for i in range(3)]
+    replicas[0].outstanding = 2
+    replicas[2].outstanding = 1
+
+    assert LeastOutstanding().choose(replicas) is replicas[1]
+
+    with replicas[1].track(), replicas[1].track():
+        assert LeastOutstanding().choose(replicas) is replicas[2]
+    assert replicas[1].outstanding == 0
+
+
+def test_least_outstanding_sync(dbs, sync_factory):
+    engine = build_engine(
+        AlchemyQLSync,
+        sync_factory,
+        dbs,
+        replicas=["replica_0", "replica_1"],
+        routing_policy=LeastOutstanding(),
+    )
+    engine.router.replicas[0].outstanding = 1  # type: ignore
+
+    assert routed_to(engine.execute_query(query)) == "replica_1"
+
+
+def test_unreachable_replica_sync(dbs, sync_factory):
+    engine = build_engine(
+        AlchemyQLSync, sync_factory, dbs, replicas=["unreachable", "replica_1"]
+    )
+
+    names = [routed_to(engine.execute_query(query)) for _ in range(2)]
+
+    assert names == ["replica_1", "replica_1"]
+    assert [r.healthy for r in engine.router.replicas] == [False, True]  # type: ignore
+
+
+async def test_unreachable_replica_async(dbs, async_factory):
+    engine = build_engine(
+        AlchemyQLAsync, async_factory, dbs, replicas=["unreachable", "replica_1"]
+    )
+
+    assert routed_to(await engine.execute_query(query)) == "replica_1"
+    assert [r.healthy for r in engine.router.replicas] == [False, True]  # type: ignore
+
+
+def test_all_replicas_unhealthy_sync(dbs, sync_factory):
+    engine = build_engine(AlchemyQLSync, sync_factory, dbs, replicas=["unreachable"])
+
+    assert routed_to(engine.execute_query(query)) == "primary"
+
+
+def test_all_replicas_unhealthy_without_primary_sync(dbs, sync_factory):
+    engine = build_engine(
+        AlchemyQLSync,
+        sync_factory,
+        dbs,
+        primary=None,
+        replicas=["replica_0"],
+        health_check=lambda session: False,
+    )
+
+    assert routed_to(engine.execute_query(query)) == "replica_0"
+
+
+def test_health_check_interval_sync(dbs, sync_factory):
+    lagging = {"replica_0"}
+
+    def health_check(session) -> bool:
+        # e.g. check the replication lag of the replica
+        name = session.execute(
+            text("SELECT string_field FROM SAMPLE_TABLE WHERE int_field = 1")
+        ).scalar()
+        return name not in lagging
+
+    engine = build_engine(
+        AlchemyQLSync,
+        sync_factory,
+        dbs,
+        replicas=["replica_0"],
+        health_check=health_check,
+        health_check_interval=0,
+    )
+
+    assert routed_to(engine.execute_query(query)) == "primary"
+
+    # Back into rotation once the health check succeeds
+    lagging.clear()
+    assert routed_to(engine.execute_query(query)) == "replica_0"
+
+
+def mark_disconnects(factory):
+    """
+    Make every error of a database's queries a disconnect (as if the connection was lost).
+    """
+    bind = factory.kw["bind"]
+
+    @event.listens_for(getattr(bind, "sync_engine", bind), "handle_error")
+    def _disconnect(context):
+        context.is_disconnect = True
+
+
+def test_failed_query_keeps_replica_healthy_sync(dbs, sync_factory):
+    engine = build_engine(
+        AlchemyQLSync, sync_factory, dbs, replicas=["empty", "replica_1"]
+    )
+
+    # The replica without tables fails the query, which is not a connection failure
+    res = engine.execute_query(query)
+    assert res.errors is not None
+
+    assert engine.execute_query(query).errors is None
+    assert engine.execute_query(query).errors is not None
+    assert [r.healthy for r in engine.router.replicas] == [True, True]  # type: ignore
+
+
+def test_disconnect_marks_replica_unhealthy_sync(dbs, sync_factory):
+    engine = build_engine(
+        AlchemyQLSync, sync_factory, dbs, replicas=["empty", "replica_1"]
+    )
+    mark_disconnects(engine.router.replicas[0].session_factory)  # type: ignore
+
+    # The replica loses its connection & is taken out of rotation
+    res = engine.execute_query(query)
+    assert res.errors is not None
+
+    names = [routed_to(engine.execute_query(query)) for _ in range(2)]
+    assert names == ["replica_1", "replica_1"]
+
+
+async def test_disconnect_marks_replica_unhealthy_async(dbs, async_factory):
+    engine = build_engine(AlchemyQLAsync, async_factory, dbs, replicas=["empty"])
+    mark_disconnects(engine.router.replicas[0].session_factory)  # type: ignore
+
+    assert (await engine.execute_query(query)).errors is not None
+    assert routed_to(await engine.execute_query(query)) == "primary"
+
+
+@pytest.mark.parametrize(
+    "err,expected",
+    [
+        (OperationalError("SELECT 1", {}, Exception("canceling statement")), False),
+        (
+            OperationalError(
+                "SELECT 1", {}, Exception("closed"), connection_invalidated=True
+            ),
+            True,
+        ),
+        (DisconnectionError("closed"), True),
+        (ValueError("invalid"), False),
+        (None, False),
+    ],
+)
+def test_is_disconnect(err, expected):
+    assert is_disconnect(err) is expected
+
+
+def test_failed_query_on_primary_sync(dbs, sync_factory):
+    engine = build_engine(AlchemyQLSync, sync_factory, dbs, primary="empty")
+
+    assert engine.execute_query(query).errors is not None
+    assert engine.execute_query(query).errors is not None
+
+
+def record_connects(factory) -> list:
+    connects = []
+    bind = factory.kw["bind"]
+
+    @event.listens_for(getattr(bind, "sync_engine", bind), "connect")
+    def _record(dbapi_conn, record):
+        connects.append(dbapi_conn)
+
+    return connects
+
+
+def test_read_only_sync(dbs, sync_factory, record_statements):
+    engine = build_engine(AlchemyQLSync, sync_factory, dbs, read_only=True)
+    statements = record_statements(engine.router.primary.session_factory)  # type: ignore
+
+    assert routed_to(engine.execute_query(query)) == "primary"
+    assert statements[0] == "PRAGMA query_only = ON"
+    assert statements[-1] == "PRAGMA query_only = OFF"
+
+
+async def test_read_only_async(dbs, async_factory, record_statements):
+    engine = build_engine(AlchemyQLAsync, async_factory, dbs, read_only=True)
+    statements = record_statements(engine.router.primary.session_factory)  # type: ignore
+
+    assert routed_to(await engine.execute_query(query)) == "primary"
+    assert statements[0] == "PRAGMA query_only = ON"
+    assert statements[-1] == "PRAGMA query_only = OFF"
+
+
+def test_read_only_transaction_sync(dbs, sync_factory):
+    factory = sync_factory(dbs["primary"])
+    row = delete(A_Table).where(A_Table.int_field == 1)
+
+    with factory() as session:
+        with read_only_transaction(session, True):
+            with pytest.raises(OperationalError, match="readonly"):
+                session.execute(row)
+        session.rollback()
+
+        # The connection is writable again
+        session.execute(row)
+
+
+def test_warmup_sync(dbs, sync_factory, record_statements):
+    engine = build_engine(
+        AlchemyQLSync, sync_factory, dbs, replicas=["replica_0", "unreachable"]
+    )
+    primary, replica, unreachable = engine.router.nodes  # type: ignore
+    connects = record_connects(primary.session_factory)
+    statements = record_statements(replica.session_factory)
+
+    engine.warmup([query], connections=2)
+
+    assert len(connects) == 2
+    assert any("SAMPLE_TABLE" in statement for statement in statements)
+    assert [primary.healthy, replica.healthy, unreachable.healthy] == [
+        True,
+        True,
+        False,
+    ]
+
+
+async def test_warmup_async(dbs, async_factory, record_statements):
+    engine = build_engine(
+        AlchemyQLAsync, async_factory, dbs, replicas=["replica_0", "unreachable"]
+    )
+    primary, replica, unreachable = engine.router.nodes  # type: ignore
+    connects = record_connects(primary.session_factory)
+    statements = record_statements(replica.session_factory)
+
+    await engine.warmup([query], connections=2)
+
+    assert len(connects) == 2
+    assert any("SAMPLE_TABLE" in statement for statement in statements)
+    assert unreachable.healthy is False
+
+
+def test_warmup_failed_query_sync(dbs, sync_factory):
+    engine = build_engine(AlchemyQLSync, sync_factory, dbs, replicas=["empty"])
+
+    with pytest.raises(ConfigurationError, match="Warm up query failed"):
+        engine.warmup([query])
+
+
+async def test_warmup_failed_query_async(dbs, async_factory):
+    engine = build_engine(AlchemyQLAsync, async_factory, dbs)
+
+    with pytest.raises(ConfigurationError, match="Warm up query failed"):
+        await engine.warmup(["query { unknown }"])
+
+
+def test_warmup_unreachable_primary_sync(dbs, sync_factory):
+    engine = build_engine(AlchemyQLSync, sync_factory, dbs, primary="unreachable")
+
+    with pytest.raises(OperationalError):
+        engine.warmup()
+
+
+async def test_warmup_unreachable_primary_async(dbs):
+    def session_factory():
+        raise ConnectionError("Database is down")
+
+    engine = build_engine(AlchemyQLAsync, lambda path: session_factory, dbs)
+
+    with pytest.raises(ConnectionError):
+        await engine.warmup()
+
+
+def test_warmup_without_session_factory_sync():
+    engine = AlchemyQLSync()
+    engine.register(A_Table)
+    engine.build_schema()
+
+    with pytest.raises(ConfigurationError):
+        engine.warmup()
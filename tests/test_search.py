@@ -0,0 +1,236 @@
+import pytest
+from sqlalchemy import Column, Integer, String, delete, insert, select, update
+from sqlalchemy.dialects import mysql, postgresql
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.errors import ConfigurationError
+from alchemyql.search import (
+    SearchMatch,
+    SearchRank,
+    fts5_query,
+    search_index_statements,
+)
+
+from .databases.a import A_Table
+from .databases.g import G_Table
+
+
+def build_engine(cls=AlchemyQLSync):
+    engine = cls()
+    engine.register(
+        G_Table,
+        search_fields=["title", "body"],
+        filter_fields=["int_field"],
+        order_fields=["int_field"],
+        default_order={"int_field": "ASC"},
+    )
+    engine.build_schema()
+    return engine
+
+
+@pytest.mark.parametrize(
+    "filter,expected",
+    [
+        ('{body: {search: "fox"}}', [1, 2]),
+        ('{body: {search: "lazy dog"}}', [1, 5]),
+        ('{body: {search: "\\"lazy dog\\""}}', [1, 5]),
+        ('{body: {search: "\\"dog lazy\\""}}', []),
+        ('{body: {search: "fox or tomatoes"}}', [1, 2, 3]),
+        ('{body: {search: "lazy -training"}}', [1]),
+        ('{title: {search: "quick"}}', [4]),
+        ('{title: {search: "quick"}, int_field: {gt: 4}}', []),
+        ('{body: {search: "   "}}', []),
+        ("{body: {search: null}}", [1, 2, 3, 4, 5]),
+        ('{title: {search: "fox", startswith: "Fox"}}', [2]),
+    ],
+)
+def test_search_filter(db_sync, filter, expected, int_fields, record_statements):
+    engine = build_engine()
+    with db_sync("G") as db:
+        engine.create_search_indexes(db.connection())
+        statements = record_statements(db)
+
+        res = engine.execute_query(
+            f"query {{ sample_tables (filter: {filter}) {{ int_field }} }}", db
+        )
+
+        assert int_fields(res) == expected
+        assert "LIKE" not in statements[0] or "startswith" in filter
+
+
+def test_relevance_order(db_sync, int_fields):
+    engine = build_engine()
+    with db_sync("G") as db:
+        engine.create_search_indexes(db.connection())
+
+        res = engine.execute_query(
+            'query { sample_tables (filter: {body: {search: "fox"}}, order: {body_rank: DESC}) { int_field } }',
+            db,
+        )
+
+        # Article 2 mentions the fox twice (in a shorter body)
+        assert int_fields(res) == [2, 1]
+
+        res = engine.execute_query(
+            'query { sample_tables (filter: {body: {search: ""}}, order: {body_rank: DESC}) { int_field } }',
+            db,
+        )
+
+        assert int_fields(res) == []
+
+
+def test_relevance_order_without_search(db_sync):
+    engine = build_engine()
+    with db_sync("G") as db:
+        res = engine.execute_query(
+            "query { sample_tables (order: {body_rank: DESC}) { int_field } }", db
+        )
+
+        assert res.errors is not None
+        assert (
+            "Ordering by body_rank requires a search filter on body"
+            in res.errors[0].message
+        )
+
+
+def test_index_maintained(db_sync, int_fields):
+    engine = build_engine()
+    with db_sync("G") as db:
+        engine.create_search_indexes(db.connection())
+        # Indexes are only created once
+        engine.create_search_indexes(db.connection())
+
+        db.execute(insert(G_Table).values(int_field=6, title="Foxes", body="Red fox"))
+        db.execute(update(G_Table).where(G_Table.int_field == 1).values(body="None"))
+        db.execute(delete(G_Table).where(G_Table.int_field == 2))
+
+        res = engine.execute_query(
+            'query { sample_tables (filter: {body: {search: "fox"}}) { int_field } }',
+            db,
+        )
+
+        assert int_fields(res) == [6]
+
+
+async def test_search_async(db_async):
+    engine = build_engine(AlchemyQLAsync)
+    async with db_async("G") as db:
+        conn = await db.connection()
+        await conn.run_sync(engine.create_search_indexes)
+
+        res = await engine.execute_query(
+            'query { sample_tables (filter: {title: {search: "dogs"}}) { int_field title } }',
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["sample_tables"] == [{"int_field": 5, "title": "Dogs"}]
+
+
+def test_schema():
+    schema = build_engine().get_schema()
+
+    assert "  body: SearchFilter\n" in schema
+    assert "  search: String\n" in schema
+    assert "  title_rank: Order\n" in schema
+    assert "  body_rank: Order\n" in schema
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("fox", '"fox"'),
+        ("lazy dog", '"lazy" "dog"'),
+        ('"lazy dog" fox', '"lazy dog" "fox"'),
+        ("fox OR dog", '"fox" OR "dog"'),
+        ("or fox or", '"fox"'),
+        ("fox -dog", '"fox" NOT "dog"'),
+        ("-dog fox", '"fox"'),
+        ("fox or -dog", '"fox"'),
+        ('fox"s AND', '"fox""s" "AND"'),
+        ('"" - fox', '"fox"'),
+        ("", ""),
+    ],
+)
+def test_fts5_query(text, expected):
+    assert fts5_query(text) == expected
+
+
+def test_compile_postgresql():
+    stmt = (
+        select(G_Table.int_field)
+        .where(SearchMatch(G_Table.body, "fox"))
+        .order_by(SearchRank(G_Table.body, "fox"))
+    )
+
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert (
+        "WHERE to_tsvector('english'::regconfig, \"SAMPLE_TABLE\".body) @@ "
+        "websearch_to_tsquery('english'::regconfig, %(param_1)s) "
+        "ORDER BY ts_rank(to_tsvector('english'::regconfig, \"SAMPLE_TABLE\".body), "
+        "websearch_to_tsquery('english'::regconfig, %(param_2)s))"
+    ) in sql
+
+
+def test_compile_fallback():
+    stmt = (
+        select(G_Table.int_field)
+        .where(SearchMatch(G_Table.body, "fox"))
+        .order_by(SearchRank(G_Table.body, "fox"))
+    )
+
+    sql = str(stmt.compile(dialect=mysql.dialect()))
+
+    assert sql.endswith(
+        "WHERE `SAMPLE_TABLE`.body LIKE concat('%%', %s, '%%') ORDER BY %s"
+    )
+
+
+class Base(DeclarativeBase): ...
+
+
+class Article(Base):
+    __tablename__ = "ARTICLE"
+
+    id = Column(Integer, primary_key=True)
+    text = Column(String, info={"search_config": "simple"})
+
+
+def test_index_statements():
+    assert search_index_statements(postgresql.dialect(), Article, ["text"]) == [
+        'CREATE INDEX IF NOT EXISTS "ARTICLE_text_search" ON "ARTICLE" '
+        "USING gin (to_tsvector('simple'::regconfig, text))"
+    ]
+
+    with pytest.raises(
+        ConfigurationError, match="Search indexes are not supported for mysql"
+    ):
+        search_index_statements(mysql.dialect(), Article, ["text"])
+
+
+class Ranked(Base):
+    __tablename__ = "RANKED"
+
+    id = Column(Integer, primary_key=True)
+    text = Column(String)
+    text_rank = Column(Integer)
+
+
+@pytest.mark.parametrize(
+    "cls,kwargs,match",
+    [
+        (A_Table, {"search_fields": ["int_field"]}, "not supported for searching"),
+        (A_Table, {"search_fields": ["other"]}, "Field other does not exist"),
+        (Ranked, {"search_fields": ["text"]}, "Field text_rank already exists"),
+        (
+            G_Table,
+            {"search_fields": ["body"], "shards": {"a": sessionmaker()}},
+            "Search fields are not supported for sharded tables",
+        ),
+    ],
+)
+def test_register_errors(cls, kwargs, match):
+    with pytest.raises(ConfigurationError, match=match):
+        AlchemyQLSync().register(cls, **kwargs)
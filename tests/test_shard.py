@@ -0,0 +1,355 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, delete, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.errors import ConfigurationError
+from alchemyql.shard import OrderKey, hash_shard_for, merge_shards
+
+from .conftest import populate_db_stmts
+from .databases.a import A_Table
+from .databases.d import Base, D_Table_1, D_Table_2, D_Table_3
+
+SHARDS = ["odd", "even"]
+
+
+def parity(value: int) -> str:
+    return "odd" if value % 2 else "even"
+
+
+@pytest.fixture
+def shard_paths(tmp_path):
+    """
+    SQLite files of 2 shards of database D (sample table 1 is sharded by int field parity,
+    the other tables are present in both shards).
+    """
+    paths = {}
+    for name in SHARDS:
+        paths[name] = tmp_path / f"{name}.db"
+        engine = create_engine(f"sqlite:///{paths[name]}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            for stmt in populate_db_stmts(Base, "D"):
+                conn.execute(stmt)
+            conn.execute(
+                delete(D_Table_1).where(
+                    (D_Table_1.int_field % 2) == (0 if name == "odd" else 1)
+                )
+            )
+        engine.dispose()
+    return paths
+
+
+@pytest.fixture
+def sync_shards(shard_paths):
+    engines = {name: create_engine(f"sqlite:///{p}") for name, p in shard_paths.items()}
+
+    yield {name: sessionmaker(bind=engine) for name, engine in engines.items()}
+
+    for engine in engines.values():
+        engine.dispose()
+
+
+@pytest.fixture
+async def async_shards(shard_paths):
+    engines = {
+        name: create_async_engine(f"sqlite+aiosqlite:///{p}")
+        for name, p in shard_paths.items()
+    }
+
+    yield {
+        name: sessionmaker(bind=engine, class_=AsyncSession)  # type: ignore
+        for name, engine in engines.items()
+    }
+
+    for engine in engines.values():
+        await engine.dispose()
+
+
+def build_engine(cls, shards, **register_kwargs):
+    engine = cls()
+    engine.register(
+        D_Table_1,
+        include_fields=["int_field", "string_field"],
+        relationships=["t3_rel"],
+        filter_fields=["int_field", "string_field"],
+        order_fields=["int_field"],
+        pagination=True,
+        shards=shards,
+        **register_kwargs,
+    )
+    engine.register(D_Table_3, relationships=["t1_rel"])
+    engine.build_schema()
+    return engine
+
+
+fan_out_cases = [
+    ("{ int_field }", [1, 3, 5, 2, 4]),
+    ("(order: {int_field: ASC}) { int_field }", [1, 2, 3, 4, 5]),
+    ("(order: {int_field: DESC}) { int_field }", [5, 4, 3, 2, 1]),
+    ("(order: {int_field: ASC}, offset: 1, limit: 3) { int_field }", [2, 3, 4]),
+    ("(order: {int_field: DESC}, limit: 2) { int_field }", [5, 4]),
+    (
+        '(filter: {string_field: {ne: "Three"}}, order: {int_field: ASC}) { int_field }',
+        [1, 2, 4, 5],
+    ),
+]
+
+
+@pytest.mark.parametrize("args,expected", fan_out_cases)
+def test_fan_out_sync(db_sync, sync_shards, args, expected, int_fields):
+    engine = build_engine(AlchemyQLSync, sync_shards)
+    with db_sync("D") as db:
+        res = engine.execute_query(f"query {{ sample_table_1s {args} }}", db)
+
+        assert int_fields(res, "sample_table_1s") == expected
+
+
+@pytest.mark.parametrize("args,expected", fan_out_cases)
+async def test_fan_out_async(db_async, async_shards, args, expected, int_fields):
+    engine = build_engine(AlchemyQLAsync, async_shards)
+    async with db_async("D") as db:
+        res = await engine.execute_query(f"query {{ sample_table_1s {args} }}", db)
+
+        assert int_fields(res, "sample_table_1s") == expected
+
+
+def test_offset_limit_pushed_down_sync(db_sync, sync_shards, int_fields):
+    engine = build_engine(AlchemyQLSync, sync_shards)
+    parameters = {name: [] for name in SHARDS}
+    for name in SHARDS:
+
+        @event.listens_for(sync_shards[name].kw["bind"], "before_cursor_execute")
+        def _record(conn, cursor, statement, params, *args, name=name):
+            parameters[name].append(params)
+
+    with db_sync("D") as db:
+        res = engine.execute_query(
+            "query { sample_table_1s (order: {int_field: ASC}, offset: 1, limit: 2) { int_field } }",
+            db,
+        )
+
+    assert int_fields(res, "sample_table_1s") == [2, 3]
+    # Every shard returns its first "offset + limit" rows (LIMIT 3 OFFSET 0)
+    assert parameters == {name: [(3, 0)] for name in SHARDS}
+
+
+@pytest.mark.parametrize(
+    "shard_filter,expected,queried",
+    [
+        ("{eq: 3}", [3], ["odd"]),
+        ("{eq: 4}", [4], ["even"]),
+        ("{in: [1, 5]}", [1, 5], ["odd"]),
+        ("{in: [1, 4]}", [1, 4], ["odd", "even"]),
+    ],
+)
+def test_shard_key_filter_sync(
+    db_sync, sync_shards, shard_filter, expected, queried, int_fields, record_statements
+):
+    engine = build_engine(
+        AlchemyQLSync, sync_shards, shard_key="int_field", shard_for=parity
+    )
+    statements = {
+        name: record_statements(factory) for name, factory in sync_shards.items()
+    }
+    query = f"query {{ sample_table_1s (filter: {{int_field: {shard_filter}}}, order: {{int_field: ASC}}) {{ int_field }} }}"
+    with db_sync("D") as db:
+        res = engine.execute_query(query, db)
+
+        assert int_fields(res, "sample_table_1s") == expected
+        assert [name for name in SHARDS if statements[name]] == queried
+
+
+async def test_shard_key_filter_async(
+    db_async, async_shards, int_fields, record_statements
+):
+    engine = build_engine(
+        AlchemyQLAsync, async_shards, shard_key="int_field", shard_for=parity
+    )
+    statements = {
+        name: record_statements(factory) for name, factory in async_shards.items()
+    }
+    query = "query { sample_table_1s (filter: {int_field: {eq: 2}}) { int_field } }"
+    async with db_async("D") as db:
+        res = await engine.execute_query(query, db)
+
+        assert int_fields(res, "sample_table_1s") == [2]
+        assert statements["odd"] == []
+
+
+def test_shard_key_unknown_shard_sync(db_sync, sync_shards, int_fields):
+    engine = build_engine(
+        AlchemyQLSync, sync_shards, shard_key="int_field", shard_for=lambda v: "none"
+    )
+    query = "query { sample_table_1s (filter: {int_field: {eq: 2}}) { int_field } }"
+    with db_sync("D") as db:
+        assert int_fields(engine.execute_query(query, db), "sample_table_1s") == []
+
+
+def test_default_shard_for_sync(db_sync, sync_shards, int_fields):
+    engine = build_engine(AlchemyQLSync, sync_shards, shard_key="int_field")
+    shard_for = hash_shard_for(SHARDS)
+    # Only rows stored on the shard chosen by the hash are found
+    expected = [i for i in range(1, 6) if shard_for(i) == parity(i)]
+    with db_sync("D") as db:
+        found = []
+        for i in range(1, 6):
+            res = engine.execute_query(
+                f"query {{ sample_table_1s (filter: {{int_field: {{eq: {i}}}}}) {{ int_field }} }}",
+                db,
+            )
+            found += int_fields(res, "sample_table_1s")
+
+    assert found == expected
+
+
+def test_hash_shard_for_is_stable():
+    shard_for = hash_shard_for(SHARDS)
+
+    assert [shard_for(i) for i in range(4)] == [shard_for(i) for i in range(4)]
+    assert {shard_for(i) for i in range(20)} == set(SHARDS)
+
+
+relationship_query = """query {
+    sample_table_1s (order: {int_field: ASC}) { int_field t3_rel { int_field } }
+}"""
+
+
+def test_relationships_within_shard_sync(db_sync, sync_shards):
+    engine = build_engine(AlchemyQLSync, sync_shards)
+    unsharded = AlchemyQLSync()
+    unsharded.register(D_Table_1, relationships=["t3_rel"], order_fields=["int_field"])
+    unsharded.register(D_Table_3)
+    unsharded.build_schema()
+
+    with db_sync("D") as db:
+        res = engine.execute_query(relationship_query, db)
+
+        assert res.errors is None
+        assert res.data == unsharded.execute_query(relationship_query, db).data
+
+
+async def test_relationships_within_shard_async(db_async, async_shards):
+    engine = build_engine(AlchemyQLAsync, async_shards)
+    async with db_async("D") as db:
+        res = await engine.execute_query(relationship_query, db)
+
+        assert res.errors is None
+        assert res.data["sample_table_1s"][:2] == [
+            {
+                "int_field": 1,
+                "t3_rel": [{"int_field": 1}, {"int_field": 3}, {"int_field": 5}],
+            },
+            {"int_field": 2, "t3_rel": [{"int_field": 2}, {"int_field": 4}]},
+        ]
+
+
+@pytest.mark.parametrize(
+    "left,right,descending,expected",
+    [
+        ((1,), (2,), (False,), True),
+        ((2,), (1,), (False,), False),
+        ((1,), (2,), (True,), False),
+        ((None,), (1,), (False,), True),
+        ((1,), (None,), (False,), False),
+        ((None,), (1,), (True,), True),
+        ((1,), (None,), (True,), False),
+        ((1, "a"), (1, "b"), (False, True), False),
+        ((1, "b"), (1, "a"), (False, True), True),
+        ((1, "a"), (1, "a"), (False, False), False),
+    ],
+)
+def test_order_key(left, right, descending, expected):
+    assert (OrderKey(left, descending) < OrderKey(right, descending)) is expected
+
+
+@pytest.mark.parametrize(
+    "direction,expected",
+    [("ASC", [None, None, 1, 2, 3, 4]), ("DESC", [None, None, 4, 3, 2, 1])],
+)
+def test_merge_shards_nulls_first(direction, expected):
+    odd = [None, 1, 3] if direction == "ASC" else [None, 3, 1]
+    even = [None, 2, 4] if direction == "ASC" else [None, 4, 2]
+    results = [
+        [SimpleNamespace(int_field=val) for val in shard] for shard in [odd, even]
+    ]
+
+    rows = merge_shards(results, {"int_field": direction}, 0, None)
+
+    assert [row.int_field for row in rows] == expected
+
+
+@pytest.mark.parametrize("direction", ["ASC", "DESC"])
+def test_shards_order_nulls_first_sync(
+    db_sync, sync_shards, direction, record_statements
+):
+    engine = build_engine(AlchemyQLSync, sync_shards)
+    statements = record_statements(sync_shards["odd"])
+    with db_sync("D") as db:
+        res = engine.execute_query(
+            f"query {{ sample_table_1s (order: {{int_field: {direction}}}) {{ int_field }} }}",
+            db,
+        )
+
+    assert res.errors is None
+    suffix = " DESC" if direction == "DESC" else ""
+    assert f"int_field{suffix} NULLS FIRST" in statements[0]
+
+
+def test_unsharded_tables_unaffected_sync(db_sync, sync_shards):
+    engine = build_engine(AlchemyQLSync, sync_shards)
+    engine.register(D_Table_2)
+    engine.build_schema()
+
+    with db_sync("D") as db:
+        res = engine.execute_query("query { sample_table_2s { int_field } }", db)
+
+        assert res.errors is None
+        assert len(res.data["sample_table_2s"]) == 5
+
+
+@pytest.mark.parametrize("field", ["string_field", "enum_field"])
+def test_order_fields_not_comparable(field):
+    with pytest.raises(ConfigurationError, match="not supported for ordering sharded"):
+        AlchemyQLSync().register(
+            A_Table, order_fields=[field], shards={"a": sessionmaker()}
+        )
+
+
+@pytest.mark.parametrize(
+    "field",
+    [
+        "int_field",
+        "float_field",
+        "bool_field",
+        "date_field",
+        "datetime_field",
+        "time_field",
+    ],
+)
+def test_order_fields_comparable(field):
+    AlchemyQLSync().register(
+        A_Table, order_fields=[field], shards={"a": sessionmaker()}
+    )
+
+
+@pytest.mark.parametrize(
+    "target_kwargs,other_kwargs",
+    [
+        # Directly related table
+        ({"relationships": ["t2_rel"], "relationship_counts": ["t2_rel"]}, {}),
+        # Transitively related table
+        ({"relationships": ["t2_rel"]}, {"relationship_counts": ["t3_rel"]}),
+    ],
+)
+def test_relationships_to_batch_loaded_fields(target_kwargs, other_kwargs):
+    engine = AlchemyQLSync()
+    engine.register(D_Table_1, relationships=["t3_rel"], shards={"a": sessionmaker()})
+    engine.register(D_Table_3, **target_kwargs)
+    engine.register(D_Table_2, relationships=["t3_rel"], **other_kwargs)
+
+    with pytest.raises(ConfigurationError, match="fields loaded by batch loaders"):
+        engine.build_schema()
@@ -0,0 +1,305 @@
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.errors import ConfigurationError
+
+from .conftest import populate_db_stmts
+from .databases.d import Base, D_Table_1, D_Table_2, D_Table_3
+
+
+@pytest.fixture
+def remote_path(tmp_path):
+    """
+    SQLite file of a second (remote) database D, whose rows have "Remote" string fields.
+    """
+    path = tmp_path / "remote.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for stmt in populate_db_stmts(Base, "D"):
+            conn.execute(stmt)
+        for cls in (D_Table_1, D_Table_3):
+            conn.execute(update(cls).values(string_field="Remote " + cls.string_field))
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def sync_remote(remote_path):
+    engine = create_engine(f"sqlite:///{remote_path}")
+
+    yield sessionmaker(bind=engine)
+
+    engine.dispose()
+
+
+@pytest.fixture
+async def async_remote(remote_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{remote_path}")
+
+    yield sessionmaker(bind=engine, class_=AsyncSession)  # type: ignore
+
+    await engine.dispose()
+
+
+def build_engine(cls, remote, **kwargs):
+    engine = cls(**kwargs)
+    engine.register(D_Table_1, relationships=["t3_rel"], pk_lookup=True)
+    engine.register(D_Table_3, relationships=["t1_rel"], filter_fields=["int_field"])
+    # Rows of sample table 3 stored in the remote database
+    engine.register_relationship(
+        D_Table_1,
+        "remote_t3s",
+        D_Table_3,
+        local_key="int_field",
+        remote_key="t1_int_field",
+        session_factory=remote,
+    )
+    # Owner of a row of sample table 3 (in the query's database)
+    engine.register_relationship(
+        D_Table_3,
+        "owner",
+        D_Table_1,
+        local_key="t1_int_field",
+        remote_key="int_field",
+        uselist=False,
+    )
+    engine.build_schema()
+    return engine
+
+
+query = """query {
+    sample_table_1s { int_field remote_t3s { int_field string_field t1_rel { string_field } owner { string_field } } }
+}"""
+
+
+def remote_t3(i: int, name: str, owner: str) -> dict:
+    return {
+        "int_field": i,
+        "string_field": f"Remote {name}",
+        "t1_rel": {"string_field": f"Remote {owner}"},
+        "owner": {"string_field": owner},
+    }
+
+
+expected = {
+    "sample_table_1s": [
+        {
+            "int_field": 1,
+            "remote_t3s": [
+                remote_t3(1, "One", "One"),
+                remote_t3(3, "Three", "One"),
+                remote_t3(5, "Five", "One"),
+            ],
+        },
+        {
+            "int_field": 2,
+            "remote_t3s": [remote_t3(2, "Two", "Two"), remote_t3(4, "Four", "Two")],
+        },
+        {"int_field": 3, "remote_t3s": []},
+        {"int_field": 4, "remote_t3s": []},
+        {"int_field": 5, "remote_t3s": []},
+    ]
+}
+
+
+@pytest.mark.parametrize("batch_relationships,remote_queries", [(False, 1), (True, 2)])
+def test_stitched_relationship_sync(
+    db_sync, sync_remote, batch_relationships, remote_queries, record_statements
+):
+    engine = build_engine(
+        AlchemyQLSync, sync_remote, batch_relationships=batch_relationships
+    )
+    remote_statements = record_statements(sync_remote.kw["bind"])
+    with db_sync("D") as db:
+        statements = record_statements(db.get_bind())
+        res = engine.execute_query(query, db)
+
+        assert res.errors is None
+        assert res.data == expected
+        # 1 query per level (relationships of remote rows are loaded from the remote database)
+        assert len(statements) == 2
+        assert len(remote_statements) == remote_queries
+        assert all(" IN " in statement for statement in remote_statements)
+
+
+@pytest.mark.parametrize("batch_relationships", [False, True])
+async def test_stitched_relationship_async(
+    db_async, async_remote, batch_relationships, record_statements
+):
+    engine = build_engine(
+        AlchemyQLAsync, async_remote, batch_relationships=batch_relationships
+    )
+    async with db_async("D") as db:
+        statements = record_statements(db.get_bind())
+        res = await engine.execute_query(query, db)
+
+        assert res.errors is None
+        assert res.data == expected
+        assert len(statements) == 2
+
+
+def test_remote_session_closed_sync(db_sync, sync_remote):
+    sessions = []
+
+    def session_factory():
+        sessions.append(sync_remote())
+        return sessions[-1]
+
+    engine = build_engine(AlchemyQLSync, session_factory)
+    with db_sync("D") as db:
+        engine.execute_query(query, db)
+        engine.execute_query(query, db)
+
+    # 1 session per request
+    assert len(sessions) == 2
+    assert not any(session.in_transaction() for session in sessions)
+
+
+def test_stitched_relationship_null_key_sync(db_sync, sync_remote):
+    engine = build_engine(AlchemyQLSync, sync_remote)
+    with db_sync("D") as db:
+        db.add(D_Table_3(int_field=6, string_field="Six", t1_int_field=None))
+        db.commit()
+
+        res = engine.execute_query(
+            "query { sample_table_3s (filter: {int_field: {in: [1, 6]}}) { int_field owner { int_field } } }",
+            db,
+        )
+
+        assert res.data == {
+            "sample_table_3s": [
+                {"int_field": 1, "owner": {"int_field": 1}},
+                {"int_field": 6, "owner": None},
+            ]
+        }
+
+
+def test_stitched_relationship_lookup_sync(db_sync, sync_remote, record_statements):
+    engine = build_engine(AlchemyQLSync, sync_remote)
+    with db_sync("D") as db:
+        # The row is in the identity map, but its stitched relationship is not loaded
+        obj = db.get(D_Table_1, 2)
+        statements = record_statements(db.get_bind())
+
+        res = engine.execute_query(
+            "query { sample_table_1(int_field: 2) { remote_t3s { int_field } } }", db
+        )
+
+        assert res.data == {
+            "sample_table_1": {"remote_t3s": [{"int_field": 2}, {"int_field": 4}]}
+        }
+        assert obj is db.get(D_Table_1, 2)
+        assert len(statements) == 1
+
+
+def test_stitched_relationship_nested_in_join_sync(db_sync, sync_remote):
+    engine = build_engine(AlchemyQLSync, sync_remote)
+    with db_sync("D") as db:
+        res = engine.execute_query(
+            "query { sample_table_3s (filter: {int_field: {eq: 2}}) { t1_rel { remote_t3s { string_field } } } }",
+            db,
+        )
+
+        assert res.data == {
+            "sample_table_3s": [
+                {
+                    "t1_rel": {
+                        "remote_t3s": [
+                            {"string_field": "Remote Two"},
+                            {"string_field": "Remote Four"},
+                        ]
+                    }
+                }
+            ]
+        }
+
+
+@pytest.mark.parametrize(
+    "cls,kwargs,match",
+    [
+        (
+            D_Table_2,
+            {},
+            "Sqlalchemy Table is not registered",
+        ),
+        (
+            D_Table_1,
+            {"name": "string_field"},
+            "Field string_field already exists for D_Table_1",
+        ),
+        (
+            D_Table_1,
+            {"name": "t3_rel"},
+            "Field t3_rel already exists for D_Table_1",
+        ),
+        (
+            D_Table_1,
+            {"local_key": "unknown"},
+            "Field unknown does not exist for D_Table_1",
+        ),
+        (
+            D_Table_1,
+            {"remote_key": "unknown"},
+            "Field unknown does not exist for D_Table_3",
+        ),
+    ],
+)
+def test_register_relationship_errors(cls, kwargs, match):
+    engine = AlchemyQLSync()
+    engine.register(D_Table_1)
+    engine.register(D_Table_3)
+
+    with pytest.raises(ConfigurationError, match=match):
+        engine.register_relationship(
+            cls,
+            **{
+                "name": "remote_t3s",
+                "target_cls": D_Table_3,
+                "local_key": "int_field",
+                "remote_key": "t1_int_field",
+                **kwargs,
+            },
+        )
+
+
+def test_register_relationship_twice():
+    engine = AlchemyQLSync()
+    engine.register(D_Table_1)
+    engine.register(D_Table_3)
+    engine.register_relationship(
+        D_Table_1, "remote", D_Table_3, "int_field", "int_field"
+    )
+
+    with pytest.raises(ConfigurationError, match="Field remote already exists"):
+        engine.register_relationship(
+            D_Table_1, "remote", D_Table_3, "int_field", "int_field"
+        )
+
+
+def test_register_relationship_sharded_table():
+    engine = AlchemyQLSync()
+    engine.register(D_Table_1, shards={"a": sessionmaker()})
+    engine.register(D_Table_3)
+
+    with pytest.raises(ConfigurationError, match="not supported for sharded tables"):
+        engine.register_relationship(
+            D_Table_1, "remote", D_Table_3, "int_field", "int_field"
+        )
+
+
+def test_register_relationship_target_not_registered():
+    engine = AlchemyQLSync()
+    engine.register(D_Table_1)
+    engine.register(D_Table_2, query=False)
+    engine.register_relationship(
+        D_Table_2, "remote", D_Table_3, "int_field", "int_field"
+    )
+
+    with pytest.raises(
+        ConfigurationError, match="target table has not been registered"
+    ):
+        engine.build_schema()
@@ -0,0 +1,333 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import event, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync
+from alchemyql.errors import QueryTimeoutError
+from alchemyql.timeout import (
+    STATEMENT_TIMEOUTS,
+    async_deadline_scope,
+    async_statement_timeout,
+    deadline_scope,
+    get_deadline,
+    statement_timeout,
+)
+
+from .databases.a import A_Table
+
+query = "query { sample_tables { int_field } }"
+
+# Never terminates unless interrupted
+infinite_stmt = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+)
+
+
+def build_engine(cls, **kwargs):
+    engine = cls(**kwargs)
+    engine.register(A_Table)
+    engine.build_schema()
+    return engine
+
+
+def interrupted_error() -> OperationalError:
+    return OperationalError("SELECT 1", {}, Exception("interrupted"))
+
+
+def test_get_deadline():
+    assert get_deadline(None) is None
+    assert get_deadline(1) > time.monotonic()
+
+
+def test_timeout_sync(db_sync):
+    engine = build_engine(AlchemyQLSync)
+
+    with db_sync("A") as db:
+        res = engine.execute_query(query=query, db_session=db, timeout=0)
+
+        assert res.data is None
+        assert res.errors is not None
+        assert res.errors[0].message == "Query execution timed out"
+        assert res.errors[0].extensions == {"code": "TIMEOUT"}
+
+        # Connection is usable after a timeout
+        res = engine.execute_query(query=query, db_session=db)
+        assert res.errors is None
+
+
+def test_timeout_keeps_caller_transaction_sync(db_sync):
+    engine = build_engine(AlchemyQLSync)
+
+    with db_sync("A") as db:
+        db.execute(update(A_Table).where(A_Table.int_field == 1).values(int_field=11))
+
+        res = engine.execute_query(query=query, db_session=db, timeout=0)
+        assert res.errors[0].message == "Query execution timed out"
+
+        # The caller's transaction is not rolled back
+        assert db.in_transaction()
+        db.commit()
+        assert db.get(A_Table, 11) is not None
+
+
+@pytest.fixture
+def record_rollbacks():
+    rollbacks = []
+
+    def listener(session):
+        rollbacks.append(session)
+
+    event.listen(Session, "after_rollback", listener)
+    yield rollbacks
+    event.remove(Session, "after_rollback", listener)
+
+
+def test_timeout_rolls_back_engine_session_sync(db_sync, record_rollbacks):
+    with db_sync("A") as db:
+        factory = sessionmaker(bind=db.get_bind())
+        engine = build_engine(AlchemyQLSync, session_factory=factory)
+
+        res = engine.execute_query(query=query, timeout=0)
+
+        assert res.errors[0].message == "Query execution timed out"
+        assert len(record_rollbacks) == 1
+
+
+def test_timeout_engine_default_sync(db_sync):
+    engine = build_engine(AlchemyQLSync, timeout=0)
+
+    with db_sync("A") as db:
+        res = engine.execute_query(query=query, db_session=db)
+
+        assert res.data is None
+        assert res.errors[0].extensions == {"code": "TIMEOUT"}
+
+        # Request timeout takes precedence over the engine default
+        res = engine.execute_query(query=query, db_session=db, timeout=10)
+        assert res.errors is None
+
+
+def test_timeout_partial_results_sync(db_sync):
+    engine = build_engine(AlchemyQLSync, partial_results=True)
+
+    with db_sync("A") as db:
+        res = engine.execute_query(query=query, db_session=db, timeout=0)
+
+        assert res.data == {"sample_tables": None}
+        assert res.errors[0].path == ["sample_tables"]
+        assert res.errors[0].extensions == {"code": "TIMEOUT"}
+
+
+async def test_timeout_async(db_async):
+    engine = build_engine(AlchemyQLAsync)
+
+    async with db_async("A") as db:
+        res = await engine.execute_query(query=query, db_session=db, timeout=0)
+
+        assert res.data is None
+        assert res.errors[0].message == "Query execution timed out"
+        assert res.errors[0].extensions == {"code": "TIMEOUT"}
+
+        # Connection is usable after a timeout
+        res = await engine.execute_query(query=query, db_session=db)
+        assert res.errors is None
+
+
+def slow_execute(db, delay: float):
+    """
+    Slow down the execution of statements on an async session.
+    """
+    execute = db.execute
+
+    async def _execute(*args, **kwargs):
+        await asyncio.sleep(delay)
+        return await execute(*args, **kwargs)
+
+    return _execute
+
+
+async def test_timeout_keeps_caller_transaction_async(db_async):
+    engine = build_engine(AlchemyQLAsync)
+
+    async with db_async("A") as db:
+        await db.execute(
+            update(A_Table).where(A_Table.int_field == 1).values(int_field=11)
+        )
+
+        res = await engine.execute_query(query=query, db_session=db, timeout=0)
+        assert res.errors[0].message == "Query execution timed out"
+
+        # The caller's transaction is not rolled back
+        assert db.in_transaction()
+        await db.commit()
+        assert await db.get(A_Table, 11) is not None
+
+
+async def test_timeout_rolls_back_engine_session_async(db_async, record_rollbacks):
+    async with db_async("A") as db:
+        factory = sessionmaker(bind=db.bind, class_=AsyncSession)
+        engine = build_engine(AlchemyQLAsync, session_factory=factory)
+
+        res = await engine.execute_query(query=query, timeout=0)
+
+        assert res.errors[0].message == "Query execution timed out"
+        assert len(record_rollbacks) == 1
+
+
+async def test_timeout_during_execution_async(db_async, monkeypatch):
+    engine = build_engine(AlchemyQLAsync)
+
+    async with db_async("A") as db:
+        monkeypatch.setattr(db, "execute", slow_execute(db, 1))
+        res = await engine.execute_query(query=query, db_session=db, timeout=0.05)
+
+        assert res.data is None
+        assert res.errors[0].extensions == {"code": "TIMEOUT"}
+
+
+async def test_timeout_partial_results_async(db_async, monkeypatch):
+    partial_query = "query { fast: sample_tables (filter: {int_field: {eq: 1}}) { int_field } slow: sample_tables { int_field } }"
+    engine = AlchemyQLAsync(partial_results=True)
+    engine.register(A_Table, filter_fields=["int_field"])
+    engine.build_schema()
+
+    async with db_async("A") as db:
+        execute = db.execute
+        calls = []
+
+        async def _execute(*args, **kwargs):
+            # Only the second root query is slow
+            calls.append(args)
+            if len(calls) > 1:
+                await asyncio.sleep(1)
+            return await execute(*args, **kwargs)
+
+        monkeypatch.setattr(db, "execute", _execute)
+        res = await engine.execute_query(
+            query=partial_query, db_session=db, timeout=0.1
+        )
+
+        assert res.data == {"fast": [{"int_field": 1}], "slow": None}
+        assert res.errors[0].path == ["slow"]
+        assert res.errors[0].extensions == {"code": "TIMEOUT"}
+
+
+def test_statement_interrupted_sync(db_sync):
+    with db_sync("A") as db:
+        deadline = get_deadline(0.05)
+
+        with pytest.raises(QueryTimeoutError):
+            with statement_timeout(db, deadline), deadline_scope(deadline):
+                db.execute(infinite_stmt)
+
+
+async def test_statement_interrupted_async(db_async):
+    async with db_async("A") as db:
+        deadline = get_deadline(0.05)
+
+        # Only the database enforces the deadline here (no asyncio cancellation)
+        with pytest.raises(OperationalError, match="interrupted"):
+            async with async_statement_timeout(db, deadline):
+                await db.execute(infinite_stmt)
+
+
+# Statement timeout "setting" of SQLite test databases (stored in a table)
+SETTINGS_STATEMENTS = (
+    text("SELECT value FROM settings"),
+    lambda value: text("UPDATE settings SET value = :value").bindparams(value=value),
+)
+CREATE_SETTINGS = [
+    text("CREATE TABLE settings (value TEXT)"),
+    text("INSERT INTO settings VALUES ('30s')"),
+]
+
+
+def test_transaction_statement_timeout_sync(db_sync, monkeypatch):
+    monkeypatch.setitem(STATEMENT_TIMEOUTS, "sqlite", SETTINGS_STATEMENTS)
+
+    with db_sync("A") as db:
+        for stmt in CREATE_SETTINGS:
+            db.execute(stmt)
+
+        with statement_timeout(db, get_deadline(10)):
+            assert 0 < int(db.execute(SETTINGS_STATEMENTS[0]).scalar()) <= 10_000
+
+        # Restored for the rest of the transaction
+        assert db.execute(SETTINGS_STATEMENTS[0]).scalar() == "30s"
+
+        # Settings of aborted transactions are not restored
+        with statement_timeout(db, get_deadline(10)):
+            db.execute(text("DROP TABLE settings"))
+
+
+async def test_transaction_statement_timeout_async(db_async, monkeypatch):
+    monkeypatch.setitem(STATEMENT_TIMEOUTS, "sqlite", SETTINGS_STATEMENTS)
+
+    async with db_async("A") as db:
+        for stmt in CREATE_SETTINGS:
+            await db.execute(stmt)
+
+        async with async_statement_timeout(db, get_deadline(10)):
+            value = (await db.execute(SETTINGS_STATEMENTS[0])).scalar()
+            assert 0 < int(value) <= 10_000
+
+        assert (await db.execute(SETTINGS_STATEMENTS[0])).scalar() == "30s"
+
+        async with async_statement_timeout(db, get_deadline(10)):
+            await db.execute(text("DROP TABLE settings"))
+
+
+def test_caller_statement_timeout_restored_sync(db_sync, monkeypatch):
+    monkeypatch.setitem(STATEMENT_TIMEOUTS, "sqlite", SETTINGS_STATEMENTS)
+    engine = build_engine(AlchemyQLSync)
+
+    with db_sync("A") as db:
+        for stmt in CREATE_SETTINGS:
+            db.execute(stmt)
+
+        res = engine.execute_query(query=query, db_session=db, timeout=10)
+
+        assert res.errors is None
+        assert db.execute(SETTINGS_STATEMENTS[0]).scalar() == "30s"
+
+
+async def test_caller_statement_timeout_restored_async(db_async, monkeypatch):
+    monkeypatch.setitem(STATEMENT_TIMEOUTS, "sqlite", SETTINGS_STATEMENTS)
+    engine = build_engine(AlchemyQLAsync)
+
+    async with db_async("A") as db:
+        for stmt in CREATE_SETTINGS:
+            await db.execute(stmt)
+
+        res = await engine.execute_query(query=query, db_session=db, timeout=10)
+
+        assert res.errors is None
+        assert (await db.execute(SETTINGS_STATEMENTS[0])).scalar() == "30s"
+
+
+def test_deadline_scope():
+    # Errors before the deadline are raised as is
+    with pytest.raises(OperationalError):
+        with deadline_scope(get_deadline(10)):
+            raise interrupted_error()
+
+    # Errors after the deadline are reported as timeouts
+    with pytest.raises(QueryTimeoutError):
+        with deadline_scope(get_deadline(0.01)):
+            time.sleep(0.02)
+            raise interrupted_error()
+
+
+async def test_async_deadline_scope():
+    with pytest.raises(OperationalError):
+        async with async_deadline_scope(get_deadline(10)):
+            raise interrupted_error()
+
+    with pytest.raises(QueryTimeoutError):
+        async with async_deadline_scope(get_deadline(0.01)):
+            await asyncio.sleep(1)
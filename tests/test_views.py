@@ -0,0 +1,320 @@
+import time
+
+import pytest
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    delete,
+    func,
+    select,
+    update,
+)
+from sqlalchemy.dialects import postgresql
+
+from alchemyql import AlchemyQLAsync, AlchemyQLSync, MaterializedView
+from alchemyql.errors import ConfigurationError
+from alchemyql.views import ViewRefresher
+
+from .databases.a import A_Table
+
+SUMMARY_QUERY = select(
+    A_Table.enum_field,
+    func.count().label("records"),
+    func.sum(A_Table.int_field).label("total"),
+).group_by(A_Table.enum_field)
+
+SUMMARY_OPTIONS = {
+    "filter_fields": ["enum_field", "total"],
+    "order_fields": ["total"],
+    "default_order": {"total": "ASC"},
+    "pagination": True,
+}
+
+
+def build_engine(view, cls=AlchemyQLSync, **kwargs):
+    engine = cls()
+    engine.register_view(view, **kwargs)
+    engine.build_schema()
+    return engine
+
+
+def materialized_view() -> MaterializedView:
+    return MaterializedView("enum_summary", SUMMARY_QUERY, primary_key=["enum_field"])
+
+
+def test_named_select(db_sync):
+    view = SUMMARY_QUERY.subquery("enum_summary")
+    engine = build_engine(view, primary_key=["enum_field"], **SUMMARY_OPTIONS)
+    with db_sync("A") as db:
+        res = engine.execute_query(
+            "query { enum_summarys { enum_field records total } }", db
+        )
+
+        assert res.errors is None
+        assert res.data["enum_summarys"] == [
+            {"enum_field": "EVEN", "records": 2, "total": 6},
+            {"enum_field": "ODD", "records": 3, "total": 9},
+        ]
+
+        res = engine.execute_query(
+            "query { enum_summarys (filter: {total: {gt: 6}}, limit: 1) { enum_field } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["enum_summarys"] == [{"enum_field": "ODD"}]
+
+
+def test_table(db_sync):
+    # e.g. a reflected view
+    view = Table(
+        "SAMPLE_TABLE",
+        MetaData(),
+        Column("int_field", Integer),
+        Column("string_field", String),
+    )
+    engine = build_engine(
+        view,
+        primary_key=["int_field"],
+        graphql_name="sample",
+        filter_fields=["int_field"],
+        pk_lookup=True,
+    )
+    with db_sync("A") as db:
+        res = engine.execute_query(
+            "query { samples (filter: {int_field: {le: 2}}) { string_field } samples_by_pk (ids: [5]) { string_field } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data == {
+            "samples": [{"string_field": "One"}, {"string_field": "Two"}],
+            "samples_by_pk": [{"string_field": "Five"}],
+        }
+
+
+def test_materialized_view(db_sync, record_statements):
+    view = materialized_view()
+    engine = build_engine(view, **SUMMARY_OPTIONS)
+    with db_sync("A") as db:
+        engine.create_materialized_views(db.connection())
+        statements = record_statements(db)
+
+        res = engine.execute_query("query { enum_summarys { enum_field total } }", db)
+
+        assert res.errors is None
+        assert res.data["enum_summarys"] == [
+            {"enum_field": "EVEN", "total": 6},
+            {"enum_field": "ODD", "total": 9},
+        ]
+        # The rows are read from the cache table (not aggregated)
+        assert "count" not in statements[0].lower()
+
+        db.execute(delete(A_Table).where(A_Table.int_field == 4))
+        engine.refresh_materialized_views(db.connection())
+
+        res = engine.execute_query("query { enum_summarys { enum_field total } }", db)
+
+        assert res.errors is None
+        assert res.data["enum_summarys"] == [
+            {"enum_field": "EVEN", "total": 2},
+            {"enum_field": "ODD", "total": 9},
+        ]
+
+
+async def test_materialized_view_async(db_async):
+    engine = build_engine(materialized_view(), AlchemyQLAsync, **SUMMARY_OPTIONS)
+    async with db_async("A") as db:
+        conn = await db.connection()
+        await conn.run_sync(engine.create_materialized_views)
+        # Views are only created once
+        await conn.run_sync(engine.create_materialized_views)
+
+        res = await engine.execute_query(
+            "query { enum_summarys (filter: {enum_field: {eq: ODD}}) { records } }",
+            db,
+        )
+
+        assert res.errors is None
+        assert res.data["enum_summarys"] == [{"records": 3}]
+
+
+def test_refresh_on_commit(db_sync):
+    engine = build_engine(materialized_view(), **SUMMARY_OPTIONS)
+    with db_sync("A") as db:
+        engine.create_materialized_views(db.connection())
+        db.commit()
+        # Not started (the stale views are refreshed explicitly)
+        refresher = ViewRefresher(db.get_bind(), engine.views, on_commit=True)
+
+        try:
+            # Changes to other tables do not make the view stale
+            db.execute(update(engine.tables[0].sqlalchemy_cls).values(records=0))
+            db.commit()
+            refresher.refresh_stale()
+            assert refresher.refreshes == 0
+
+            # ORM changes (the commit only marks the view stale)
+            obj = db.get(A_Table, 1)
+            obj.int_field = 11
+            db.commit()
+            assert refresher.refreshes == 0
+            refresher.refresh_stale()
+            assert refresher.refreshes == 1
+
+            # Bulk changes
+            db.execute(delete(A_Table).where(A_Table.int_field == 2))
+            db.commit()
+            refresher.refresh_stale()
+            assert refresher.refreshes == 2
+
+            # Rolled back changes
+            db.execute(delete(A_Table).where(A_Table.int_field == 3))
+            db.rollback()
+            db.commit()
+            refresher.refresh_stale()
+            assert refresher.refreshes == 2
+
+            res = engine.execute_query(
+                "query { enum_summarys { enum_field records total } }", db
+            )
+
+            assert res.errors is None
+            assert res.data["enum_summarys"] == [
+                {"enum_field": "EVEN", "records": 1, "total": 4},
+                {"enum_field": "ODD", "records": 3, "total": 19},
+            ]
+        finally:
+            refresher.stop()
+
+        db.execute(delete(A_Table))
+        db.commit()
+        refresher.refresh_stale()
+        assert refresher.refreshes == 2
+
+
+def test_refresh_on_commit_background(db_sync):
+    engine = build_engine(materialized_view(), **SUMMARY_OPTIONS)
+    with db_sync("A") as db:
+        engine.create_materialized_views(db.connection())
+        db.commit()
+        refresher = engine.schedule_view_refresh(db.get_bind(), on_commit=True)
+
+        try:
+            db.execute(delete(A_Table).where(A_Table.int_field == 2))
+            db.commit()
+
+            # Refreshed by the background thread
+            deadline = time.monotonic() + 5
+            while refresher.refreshes < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert refresher.refreshes == 1
+            assert not refresher.stale
+        finally:
+            refresher.stop()
+
+        assert refresher.thread is None
+
+
+def test_refresh_interval(db_sync):
+    engine = build_engine(materialized_view(), **SUMMARY_OPTIONS)
+    with db_sync("A") as db:
+        engine.create_materialized_views(db.connection())
+        db.commit()
+
+        refresher = engine.schedule_view_refresh(db.get_bind(), interval=0.01)
+        # Starting again does not start another thread
+        refresher.start()
+        deadline = time.monotonic() + 5
+        while refresher.refreshes < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        refresher.stop()
+
+        assert refresher.refreshes >= 2
+        assert refresher.thread is None
+
+
+def test_refresh_failure_logged(tmp_path, caplog):
+    view = materialized_view()
+    bind = create_engine(f"sqlite:///{tmp_path / 'views.db'}")
+    refresher = ViewRefresher(bind, [view], interval=0.01)
+
+    try:
+        with caplog.at_level("ERROR", logger="alchemyql"):
+            # The view's tables do not exist yet
+            refresher.start()
+            deadline = time.monotonic() + 5
+            while not caplog.records and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert "Refresh of materialized views failed" in caplog.text
+            assert refresher.refreshes == 0
+
+        # Refreshes once the tables exist (the thread survived the failures)
+        with bind.begin() as connection:
+            A_Table.metadata.create_all(connection)
+            view.create(connection)
+        deadline = time.monotonic() + 5
+        while refresher.refreshes < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert refresher.refreshes >= 1
+    finally:
+        refresher.stop()
+        bind.dispose()
+
+
+def test_postgresql_statements():
+    view = materialized_view()
+    dialect = postgresql.dialect()
+
+    [create] = view.create_statements(dialect)
+    [refresh] = view.refresh_statements(dialect)
+
+    assert str(create).startswith(
+        "CREATE MATERIALIZED VIEW IF NOT EXISTS enum_summary AS SELECT "
+        '"SAMPLE_TABLE".enum_field, count(*) AS records'
+    )
+    assert str(refresh) == "REFRESH MATERIALIZED VIEW enum_summary"
+
+
+def test_schema():
+    engine = build_engine(materialized_view(), **SUMMARY_OPTIONS)
+    schema = engine.get_schema()
+
+    assert "type enum_summary {" in schema
+    assert "  enum_summarys(filter: enum_summary_filter" in schema
+
+
+@pytest.mark.parametrize(
+    "build,match",
+    [
+        (
+            lambda: AlchemyQLSync().register_view(SUMMARY_QUERY),
+            "Select statements must be named",
+        ),
+        (
+            lambda: AlchemyQLSync().register_view(SUMMARY_QUERY.subquery("s")),
+            "View s has no primary key",
+        ),
+        (
+            lambda: AlchemyQLSync().register_view(
+                SUMMARY_QUERY.subquery("s"), primary_key=["other"]
+            ),
+            "Column other does not exist for view s",
+        ),
+        (
+            lambda: MaterializedView("s", SUMMARY_QUERY, primary_key=["other"]),
+            "Primary key of view s must be columns of its query",
+        ),
+        (
+            lambda: ViewRefresher(None, [], interval=0),
+            "Refresh interval must be a positive number",
+        ),
+    ],
+)
+def test_register_errors(build, match):
+    with pytest.raises(ConfigurationError, match=match):
+        build()